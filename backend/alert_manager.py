@@ -0,0 +1,260 @@
+"""
+Alert Manager - deduplicated, rate-limited alerts
+Alerts are keyed by a fingerprint (type + zone + message with the numbers
+masked out), so "Soil moisture low: 21.3%" and "... 20.8%" are the same
+alert. Repeats only bump an in-memory counter; the alerts table is written
+when an alert opens, becomes ongoing, resolves or reopens, plus a counter
+sync at most every ALERT_SYNC_SECONDS.
+
+States: open -> ongoing (seen again) -> resolved (condition clear for
+ALERT_CLEAR_SECONDS, or resolved by hand). The clear window is checked on
+every report and by a timer, so one clear() is enough even if the
+condition is never evaluated again. A resolved alert that comes back
+within ALERT_COOLDOWN_SECONDS reopens its old row instead of adding one.
+"""
+import atexit
+import re
+import threading
+from database import get_db, now_ms, ms_to_iso
+from event_hub import event_hub
+from config import ALERT_CLEAR_SECONDS, ALERT_COOLDOWN_SECONDS, ALERT_SYNC_SECONDS
+
+_NUMBER_RE = re.compile(r'-?\d+(?:\.\d+)?')
+
+
+def fingerprint(alert_type, message, zone_id=None):
+    template = _NUMBER_RE.sub('#', message)
+    return f"{alert_type}:{'' if zone_id is None else zone_id}:{template}"
+
+
+class AlertManager:
+    """Tracks alert state in memory and persists only the transitions"""
+
+    def __init__(self, clear_seconds=ALERT_CLEAR_SECONDS, cooldown_seconds=ALERT_COOLDOWN_SECONDS,
+                 sync_seconds=ALERT_SYNC_SECONDS, timers=True):
+        self.clear_ms = clear_seconds * 1000
+        self.cooldown_ms = cooldown_seconds * 1000
+        self.sync_ms = sync_seconds * 1000
+        self._alerts = {}  # fingerprint -> state dict
+        self._loaded = False
+        self._lock = threading.Lock()
+        self.timers = timers
+        self._timer = None
+        self.writes = 0
+        self.suppressed = 0
+
+    def _load(self):
+        """Pick up open alerts, and recently resolved ones still cooling down"""
+        cutoff = now_ms() - self.cooldown_ms
+        with get_db(readonly=True) as conn:
+            rows = conn.execute('''
+                SELECT id, fingerprint, alert_type, zone_id, state, occurrences,
+                       last_seen, resolved_at
+                FROM alerts
+                WHERE fingerprint IS NOT NULL AND (resolved = 0 OR resolved_at >= ?)
+                ORDER BY id
+            ''', (cutoff,)).fetchall()
+        for row in rows:
+            self._alerts[row['fingerprint']] = {
+                'id': row['id'],
+                'alert_type': row['alert_type'],
+                'zone_id': row['zone_id'],
+                'state': row['state'],
+                'occurrences': row['occurrences'],
+                'synced_occurrences': row['occurrences'],
+                'last_seen': row['last_seen'],
+                'last_sync': row['last_seen'] or 0,
+                'resolved_at': row['resolved_at'],
+                'clear_since': None
+            }
+        self._loaded = True
+
+    def _prune(self, now):
+        """Forget resolved alerts whose cooldown has passed (caller holds _lock)"""
+        for key, alert in list(self._alerts.items()):
+            if alert['state'] == 'resolved' and now - alert['resolved_at'] > self.cooldown_ms:
+                del self._alerts[key]
+
+    def _publish(self, alert):
+        """Active alerts by id on /api/stream; resolved ones are removed"""
+        summary = None
+        if alert['state'] != 'resolved':
+            summary = {
+                'alert_type': alert['alert_type'],
+                'zone_id': alert['zone_id'],
+                'state': alert['state'],
+                'occurrences': alert['occurrences'],
+                'last_seen': ms_to_iso(alert['last_seen'])
+            }
+        event_hub.update('alerts', {str(alert['id']): summary})
+
+    def _write(self, sql, params):
+        with get_db() as conn:
+            cursor = conn.execute(sql, params)
+            conn.commit()
+        self.writes += 1
+        return cursor.lastrowid
+
+    def _sync(self, alert, now, **changes):
+        """Write the alert's state and counters (a transition, or a periodic sync)"""
+        alert.update(changes)
+        self._write('''
+            UPDATE alerts SET state = ?, resolved = ?, occurrences = ?, last_seen = ?,
+                              resolved_at = ?, severity = COALESCE(?, severity),
+                              message = COALESCE(?, message)
+            WHERE id = ?
+        ''', (alert['state'], 1 if alert['state'] == 'resolved' else 0, alert['occurrences'],
+              alert['last_seen'], alert['resolved_at'], changes.get('severity'),
+              changes.get('message'), alert['id']))
+        alert['synced_occurrences'] = alert['occurrences']
+        alert['last_sync'] = now
+        self._publish(alert)
+
+    def _settle(self, now):
+        """Resolve alerts clear for the whole window (caller holds _lock)"""
+        resolved = []
+        for alert in self._alerts.values():
+            if (alert['state'] != 'resolved' and alert['clear_since'] is not None
+                    and now - alert['clear_since'] >= self.clear_ms):
+                self._sync(alert, now, state='resolved', resolved_at=now, clear_since=None)
+                resolved.append(alert['id'])
+        return resolved
+
+    def _arm(self, now):
+        """Run settle() when the earliest pending clear window ends (caller holds _lock)"""
+        if not self.timers or self._timer is not None:
+            return
+        pending = [alert['clear_since'] for alert in self._alerts.values()
+                   if alert['state'] != 'resolved' and alert['clear_since'] is not None]
+        if pending:
+            delay = max(0, min(pending) + self.clear_ms - now) / 1000.0
+            self._timer = threading.Timer(delay, self.settle)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def settle(self):
+        """Resolve alerts whose clear window has passed. Returns the ids resolved."""
+        now = now_ms()
+        with self._lock:
+            self._timer = None
+            resolved = self._settle(now)
+            self._arm(now)
+        return resolved
+
+    def raise_alert(self, alert_type, severity, message, zone_id=None):
+        """Report that a condition is active. Returns the alert row id."""
+        key = fingerprint(alert_type, message, zone_id)
+        now = now_ms()
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            self._settle(now)
+            alert = self._alerts.get(key)
+
+            if alert is None or (alert['state'] == 'resolved'
+                                 and now - alert['resolved_at'] > self.cooldown_ms):
+                self._prune(now)
+                alert_id = self._write('''
+                    INSERT INTO alerts (timestamp, alert_type, severity, message, fingerprint,
+                                        zone_id, state, occurrences, last_seen)
+                    VALUES (?, ?, ?, ?, ?, ?, 'open', 1, ?)
+                ''', (now, alert_type, severity, message, key, zone_id, now))
+                self._alerts[key] = {
+                    'id': alert_id, 'alert_type': alert_type, 'zone_id': zone_id,
+                    'state': 'open', 'occurrences': 1, 'synced_occurrences': 1,
+                    'last_seen': now, 'last_sync': now, 'resolved_at': None,
+                    'clear_since': None
+                }
+                self._publish(self._alerts[key])
+                return alert_id
+
+            alert['occurrences'] += 1
+            alert['last_seen'] = now
+            alert['clear_since'] = None
+            if alert['state'] == 'resolved':
+                # Back inside the cooldown window: same row, reopened
+                self._sync(alert, now, state='open', resolved_at=None,
+                           severity=severity, message=message)
+            elif alert['state'] == 'open':
+                self._sync(alert, now, state='ongoing', message=message)
+            elif now - alert['last_sync'] >= self.sync_ms:
+                self._sync(alert, now, message=message)
+            else:
+                self.suppressed += 1
+            return alert['id']
+
+    def clear(self, alert_type, zone_id=None, force=False):
+        """Report that a condition is no longer active.
+
+        Matching alerts resolve once they have been clear for the hysteresis
+        window (immediately with ``force``), whether or not clear() is called
+        again. Returns the ids of the matching alerts it resolved.
+        """
+        now = now_ms()
+        resolved = []
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            for alert in self._alerts.values():
+                if alert['alert_type'] != alert_type or alert['state'] == 'resolved':
+                    continue
+                if zone_id is not None and alert['zone_id'] != zone_id:
+                    continue
+                if alert['clear_since'] is None:
+                    alert['clear_since'] = now
+                if force or now - alert['clear_since'] >= self.clear_ms:
+                    self._sync(alert, now, state='resolved', resolved_at=now, clear_since=None)
+                    resolved.append(alert['id'])
+            self._settle(now)
+            self._arm(now)
+        return resolved
+
+    def resolve(self, alert_id):
+        """Resolve one alert by row id (operator action from the API)"""
+        now = now_ms()
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            for alert in self._alerts.values():
+                if alert['id'] == alert_id:
+                    if alert['state'] != 'resolved':
+                        self._sync(alert, now, state='resolved', resolved_at=now, clear_since=None)
+                    return True
+        # Not tracked (legacy row); resolve it directly
+        self._write('''
+            UPDATE alerts SET resolved = 1, state = 'resolved', resolved_at = ? WHERE id = ?
+        ''', (now, alert_id))
+        return True
+
+    def annotate(self, rows):
+        """Overlay live counters on alert rows read from the database"""
+        with self._lock:
+            live = {alert['id']: alert for alert in self._alerts.values()}
+            for row in rows:
+                alert = live.get(row['id'])
+                if alert is not None:
+                    row['occurrences'] = alert['occurrences']
+                    row['last_seen'] = alert['last_seen']
+        return rows
+
+    def flush(self):
+        """Write pending occurrence counters (shutdown, or before reading them)"""
+        now = now_ms()
+        with self._lock:
+            for alert in self._alerts.values():
+                if alert['occurrences'] != alert['synced_occurrences']:
+                    self._sync(alert, now)
+
+    def get_stats(self):
+        with self._lock:
+            active = sum(1 for a in self._alerts.values() if a['state'] != 'resolved')
+        return {
+            'active': active,
+            'tracked': len(self._alerts),
+            'writes': self.writes,
+            'suppressed': self.suppressed
+        }
+
+
+alert_manager = AlertManager()
+atexit.register(alert_manager.flush)
@@ -1,20 +1,46 @@
-from flask import Flask, jsonify, request, send_from_directory, make_response
+import sys
+from startup import startup_profiler, LazyService, warm_up
+if '--profile-startup' in sys.argv:
+    startup_profiler.enable()
+
+from logging_setup import setup_logging
+# Before anything else logs: all records go through the background listener
+setup_logging()
+
+from flask import Flask, jsonify, request, send_from_directory, make_response, Response, stream_with_context
 from flask_cors import CORS
+from werkzeug.exceptions import NotFound
 import os
-import sys
+import io
+import csv
 import json
-from datetime import datetime, timedelta
-from database import (init_database, get_recent_sensor_data, get_recent_logs, 
-                     get_active_schedules, get_unresolved_alerts, get_db)
-from main_controller import MainController
+import time
+import logging
+from importlib import import_module
+from datetime import datetime, timedelta, timezone
+from database import (init_database, sensor_buffer, write_buffer,
+                     get_active_schedules, get_unresolved_alerts, get_db,
+                     get_sensor_history, get_sensor_rollup, ROLLUP_RESOLUTIONS,
+                     to_epoch_ms, ms_to_iso, get_irrigation_totals, get_irrigation_history,
+                     count_zones_below_moisture, get_zone_last_reading,
+                     search_text, SEARCH_SOURCES,
+                     keyset_query, iter_rows)
 from auth import require_api_key, create_api_key, get_all_api_keys, revoke_api_key
-from config import DEVICE_NAME, API_VERSION
-from irrigation_service import IrrigationService
-from ai_decision_service import AIDecisionService
-from sensor_service import SensorService
-from system_monitor import SystemMonitor
-from system_stats import get_system_stats
+from config import (DEVICE_NAME, API_VERSION, API_MAX_PAGE_SIZE, API_MAX_STREAM_ROWS, API_STREAM_CHUNK_ROWS,
+                    SERVER_MODE, SERVER_HOST, SERVER_PORT, SERVER_THREADS, STARTUP_BUDGET_SECONDS)
 from irrigation_simulator import irrigation_simulator
+from backup_service import BackupService
+from status_sampler import StatusSampler
+from alert_manager import alert_manager
+from event_hub import event_hub
+from server import serve
+from telemetry import telemetry
+from request_telemetry import request_telemetry
+from batch_requests import BatchDispatcher, BatchError
+from irrigation_jobs import job_runner
+from rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
 
 # Import terminal API blueprint for debugging
 try:
@@ -22,58 +48,166 @@ try:
     TERMINAL_AVAILABLE = True
 except ImportError:
     TERMINAL_AVAILABLE = False
-    print("Warning: Terminal API not available")
+    logger.warning("Terminal API not available")
 
 # Use absolute path for static folder to avoid path issues
 static_folder_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'frontend')
 app = Flask(__name__, static_folder=static_folder_path)
 CORS(app)
 
-# Debug: Print static folder configuration
-print(f"\n{'='*60}")
-print(f"STATIC FOLDER CONFIGURATION")
-print(f"{'='*60}")
-print(f"Static folder path: {app.static_folder}")
-print(f"Static folder exists: {os.path.exists(app.static_folder)}")
-if os.path.exists(app.static_folder):
-    files = os.listdir(app.static_folder)
-    print(f"Files in static folder: {len(files)} files")
-    print(f"HTML files: {[f for f in files if f.endswith('.html')]}")
-print(f"{'='*60}\n")
+# Per-route latency histograms and in-flight counts for /api/metrics
+request_telemetry.init_app(app)
+
+# 429s for clients hammering the expensive endpoints (policy in
+# data/system_limits.json); batch sub-requests are limited like the rest
+rate_limiter.init_app(app)
 
-init_database()
+if os.path.exists(app.static_folder):
+    logger.debug("Static folder %s (%d entries)", app.static_folder, len(os.listdir(app.static_folder)))
+else:
+    logger.error("Static folder missing: %s", app.static_folder)
+
+with startup_profiler.phase('init_database'):
+    init_database()
+
+def load_static_assets():
+    """Content-hashed, precompressed frontend (rebuilt if frontend/ changed)"""
+    assets = import_module('static_assets').static_assets
+    assets.load()
+    return assets
+
+static_assets = LazyService('static_assets', load_static_assets)
+
+# Host metrics sampler; psutil and platform probing happen on construction
+metrics_collector = LazyService(
+    'metrics_collector', lambda: import_module('metrics_collector').metrics_collector)
+
+# Built on first use or by the warm-up thread once the server is up;
+# their modules pull in requests, psutil and the hardware fingerprint
+controller = LazyService('controller', lambda: import_module('main_controller').MainController())
+
+# Services kept for backward compatibility with API endpoints
+irrigation_service = LazyService(
+    'irrigation_service', lambda: import_module('irrigation_service').IrrigationService())
+sensor_service = LazyService(
+    'sensor_service', lambda: import_module('sensor_service').SensorService())
+ai_service = LazyService(
+    'ai_service', lambda: import_module('ai_decision_service').AIDecisionService(
+        irrigation_service.get(), sensor_service.get()))
+system_monitor = LazyService(
+    'system_monitor', lambda: import_module('system_monitor').SystemMonitor())
+
+# Background deletion of expired rows (policy in data/system_limits.json);
+# pulls in the numpy-backed sensor archive
+retention_engine = LazyService(
+    'retention_engine', lambda: import_module('data_retention').RetentionEngine())
+
+# Scheduled compressed backups of irrigation.db
+backup_service = BackupService()
+
+def sample_status():
+    """Everything the status endpoints serve, read from hardware in one pass"""
+    system_status = controller.get_system_status()
+    event_hub.update('sensors', system_status.get('sensors', {}))
+    event_hub.update('energy', system_status.get('energy', {}))
+    crops = {crop['id']: crop for crop in controller.crops_data.get('crops', [])}
+    soils = {soil['id']: soil for soil in controller.soil_types_data.get('soil_types', [])}
 
-# Initialize main controller with new architecture
-controller = MainController()
+    # Add zone information with crop/soil names
+    zones_with_details = []
+    for zone in system_status.get('zones', []):
+        crop = crops.get(zone.get('crop_id'))
+        soil = soils.get(zone.get('soil_id'))
+        zones_with_details.append({
+            **zone,
+            'crop_name': crop['name'] if crop else 'Unknown',
+            'soil_name': soil['name'] if soil else 'Unknown',
+            'active': False
+        })
 
-# Initialize services for backward compatibility with API endpoints
-irrigation_service = IrrigationService()
-sensor_service = SensorService()
-ai_service = AIDecisionService(irrigation_service, sensor_service)
-system_monitor = SystemMonitor()
+    return {
+        'status': {
+            "success": True,
+            "device": system_status.get('device_name', DEVICE_NAME),
+            "version": API_VERSION,
+            "sensors": system_status.get('sensors', {}),
+            "energy": system_status.get('energy', {}),
+            "irrigation": system_status.get('irrigation', {}),
+            "zones": zones_with_details,
+            "system": system_monitor.get_status(),
+            "timestamp": system_status.get('timestamp')
+        },
+        'sensors': {
+            "success": True,
+            "data": system_status.get('sensors', {})
+        },
+        'valve': {
+            "success": True,
+            "data": irrigation_service.get_status()
+        }
+    }
 
-# Import device identity module for device ID endpoints
-try:
+# Status endpoints serve a snapshot sampled in the background
+status_sampler = StatusSampler(sample_status)
+
+# Analytics endpoints read a periodically refreshed copy of the database
+analytics_snapshot = LazyService(
+    'analytics_snapshot', lambda: import_module('snapshot_store').SnapshotStore())
+
+# Long-lived streams would swamp the latency figures of ordinary requests
+LATENCY_EXCLUDED_ROUTES = ('/api/stream', '/api/metrics')
+
+def collect_runtime_metrics():
+    """Values read at scrape time for /api/metrics"""
+    # Building the collector reads the hardware; leave that to the warm-up
+    sample = metrics_collector.latest() if metrics_collector.loaded else {}
+    snapshot = status_sampler.get()
+    return [
+        ('cpu_percent', 'gauge', 'Host CPU usage', {}, sample.get('cpu_percent')),
+        ('cpu_temperature_celsius', 'gauge', 'SoC temperature', {}, sample.get('cpu_temp_c')),
+        ('memory_percent', 'gauge', 'Host memory in use', {}, sample.get('mem_percent')),
+        ('disk_percent', 'gauge', 'Root filesystem in use', {}, sample.get('disk_percent')),
+        ('db_write_queue_depth', 'gauge', 'Rows waiting for the buffered DB writer', {},
+         write_buffer.queue.qsize()),
+        ('db_rows_written_total', 'counter', 'Rows committed by the buffered DB writer', {},
+         write_buffer.rows_written),
+        ('db_write_batches_total', 'counter', 'Group commits by the buffered DB writer', {},
+         write_buffer.batches_written),
+        ('stream_clients', 'gauge', 'Open /api/stream connections', {}, event_hub.clients),
+        ('status_snapshot_age_seconds', 'gauge', 'Age of the served status sample', {},
+         round(time.time() - snapshot.taken_at, 3) if snapshot else None),
+    ]
+
+telemetry.add_collector(collect_runtime_metrics)
+
+def load_device_identity():
+    """Device identity module for device ID endpoints (fingerprints the hardware)"""
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'device'))
-    from device import identity as device_identity
-    print("✓ Device identity module loaded")
-except Exception as e:
-    print(f"⚠ Device identity module failed to load: {e}")
-    device_identity = None
+    from device import identity
+    logger.info("Device identity module loaded")
+    return identity
 
-# Import AI decision engine
-try:
-    from ai_decision_engine import generate_ai_irrigation_decisions, store_simulation_data, get_stored_data
-    print("✓ AI Decision Engine imported successfully")
-except ImportError as e:
-    print(f"⚠ AI Decision Engine import failed: {e}")
-    # Fallback functions
-    def generate_ai_irrigation_decisions(data):
+device_identity = LazyService('device_identity', load_device_identity)
+
+def load_ai_engine():
+    engine = import_module('ai_decision_engine')
+    logger.info("AI Decision Engine imported")
+    return engine
+
+ai_engine = LazyService('ai_engine', load_ai_engine)
+
+# Fall back to these while the AI decision engine can't be loaded
+def generate_ai_irrigation_decisions(data):
+    if not ai_engine.available():
         return [{"id": "fallback", "type": "ERROR", "action": "AI engine not available"}]
-    def store_simulation_data(data, decisions):
-        pass
-    def get_stored_data():
-        return []
+    return ai_engine.generate_ai_irrigation_decisions(data)
+
+def store_simulation_data(data, decisions):
+    if ai_engine.available():
+        ai_engine.store_simulation_data(data, decisions)
+
+def get_stored_data():
+    return ai_engine.get_stored_data() if ai_engine.available() else []
 
 # Add critical API endpoints directly to fix 404/405 errors
 @app.route('/api/simulation/send-data', methods=['POST'])
@@ -84,7 +218,7 @@ def receive_simulation_data():
         if not data:
             return jsonify({"success": False, "error": "No data provided"}), 400
         
-        print(f"📊 Agricultural data received: {data}")
+        logger.debug("Agricultural data received: %s", data)
         
         # Generate intelligent AI decisions based on data
         ai_decisions = generate_ai_irrigation_decisions(data)
@@ -180,24 +314,24 @@ try:
     add_device_activation_routes(app)
     add_secure_device_linking_routes(app)
     add_pi_simulation_routes(app)
-    print("✓ Device activation endpoints loaded")
-    print("✓ Secure device linking endpoints loaded")
-    print("✓ Pi simulation endpoints loaded")
+    logger.info("Device activation, secure linking and Pi simulation endpoints loaded")
 except Exception as e:
-    print(f"⚠ Device activation module failed to load: {e}")
-    print("✓ Using direct endpoint implementation as fallback")
+    logger.warning("Device activation module failed to load, using direct endpoints: %s", e)
 
 # Register terminal API blueprint if available
 if TERMINAL_AVAILABLE:
     app.register_blueprint(terminal_bp, url_prefix='/api')
-    print("✓ Terminal API registered at /api/terminal/*")
+    logger.info("Terminal API registered at /api/terminal/*")
 
 # Disable caching for all responses
 @app.after_request
 def add_header(response):
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
+    # Default for API responses; routes that set their own policy (static
+    # assets, status snapshots, favicon) keep it
+    if 'Cache-Control' not in response.headers:
+        response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+        response.headers['Pragma'] = 'no-cache'
+        response.headers['Expires'] = '0'
     return response
 
 @app.route('/favicon.ico')
@@ -212,20 +346,17 @@ def favicon():
             response.headers['Content-Type'] = 'image/x-icon'
             return response
         else:
-            print(f"WARNING: Favicon not found at: {favicon_path}")
-            print(f"Static folder: {app.static_folder}")
+            logger.warning("Favicon not found at %s", favicon_path)
             return '', 204  # No content but success
     except Exception as e:
-        print(f"ERROR serving favicon: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Serving favicon failed")
         return '', 204  # No content but success
 
 # Device ID Endpoints
 @app.route('/device-id')
 def get_device_id():
     """Get device ID and registration status"""
-    if device_identity is None:
+    if not device_identity.available():
         return jsonify({
             "success": False,
             "error": "Device identity module not available"
@@ -244,9 +375,7 @@ def get_device_id():
             "timestamp": datetime.utcnow().isoformat() + 'Z'
         })
     except Exception as e:
-        print(f"ERROR in /device-id: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("/device-id failed")
         return jsonify({
             "success": False,
             "error": str(e)
@@ -258,7 +387,7 @@ def api_keys_page():
     try:
         return send_from_directory(app.static_folder, 'api-keys.html')
     except Exception as e:
-        print(f"ERROR serving api-keys.html: {e}")
+        logger.error("Serving api-keys.html failed: %s", e)
         return f"<h1>API Keys Page</h1><p>Error loading page: {e}</p><p>Make sure api-keys.html exists in the frontend folder.</p>", 500
 
 @app.route('/PI_simulation.html')
@@ -267,7 +396,7 @@ def pi_simulation_page():
     try:
         return send_from_directory(app.static_folder, 'PI_simulation.html')
     except Exception as e:
-        print(f"ERROR serving PI_simulation.html: {e}")
+        logger.error("Serving PI_simulation.html failed: %s", e)
         return f"<h1>Pi Simulation Page</h1><p>Error loading page: {e}</p><p>Make sure PI_simulation.html exists in the frontend folder.</p>", 500
 
 @app.route('/device-register', methods=['POST'])
@@ -347,7 +476,7 @@ def cloud_status():
 @app.route('/device-unregister', methods=['POST'])
 def unregister_device():
     """Reset device registration"""
-    if device_identity is None:
+    if not device_identity.available():
         return jsonify({
             "success": False,
             "error": "Device identity module not available"
@@ -365,141 +494,326 @@ def unregister_device():
             "error": str(e)
         }), 500
 
+def send_frontend(path):
+    """Hashed, precompressed file from the static build; a plain send for
+    anything added to frontend/ since the build, or if the build failed"""
+    if static_assets.available():
+        response = static_assets.serve(path)
+        if response is not None:
+            return response
+    return send_from_directory(app.static_folder, path)
+
 @app.route('/')
 def index():
     try:
         setup_completed = controller.system_config.get('setup_completed', False)
-        print(f"\n{'='*60}")
-        print(f"REQUEST: / (root)")
-        print(f"Setup completed: {setup_completed}")
-        print(f"Static folder: {app.static_folder}")
         
         if not setup_completed:
             file_to_serve = 'setup.html'
         else:
             file_to_serve = 'space.html'
         
-        file_path = os.path.join(app.static_folder, file_to_serve)
-        print(f"Serving: {file_to_serve}")
-        print(f"Full path: {file_path}")
-        print(f"File exists: {os.path.exists(file_path)}")
-        print(f"{'='*60}\n")
-        
-        return send_from_directory(app.static_folder, file_to_serve)
+        return send_frontend(file_to_serve)
     except Exception as e:
-        print(f"ERROR in index(): {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("index() failed")
         return jsonify({"error": str(e)}), 500
 
 @app.route('/<path:path>')
 def serve_static(path):
     try:
-        print(f"\n{'='*60}")
-        print(f"REQUEST: /{path}")
-        print(f"Static folder: {app.static_folder}")
-        file_path = os.path.join(app.static_folder, path)
-        print(f"Full path: {file_path}")
-        print(f"File exists: {os.path.exists(file_path)}")
-        print(f"{'='*60}\n")
-        
-        return send_from_directory(app.static_folder, path)
+        return send_frontend(path)
+    except NotFound:
+        return jsonify({"error": "Not found", "path": path}), 404
     except Exception as e:
-        print(f"ERROR serving {path}: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Serving %s failed", path)
         return jsonify({"error": str(e), "path": path}), 404
 
+def snapshot_response(name):
+    """Serve one body of the current status snapshot (304 if the client has it)"""
+    snapshot = status_sampler.get()
+    if snapshot is None:
+        # Only in the first moments after startup
+        status_sampler.trigger()
+        response = jsonify({"success": False, "error": "Status not sampled yet", "retry_after": 1})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+    etag = f'"status-{snapshot.version}"'
+    headers = {
+        'ETag': etag,
+        'Cache-Control': 'no-cache',
+        'X-Snapshot-Version': str(snapshot.version),
+        'X-Snapshot-Age': f'{time.time() - snapshot.taken_at:.2f}'
+    }
+    if request.headers.get('If-None-Match') == etag:
+        return Response(status=304, headers=headers)
+    return Response(snapshot.payloads[name], mimetype='application/json', headers=headers)
+
 @app.route("/api/status")
 def status():
-    """Get complete system status with REAL data from new controllers"""
-    system_status = controller.get_system_status()
-    
-    # Add zone information with crop/soil names
-    zones_with_details = []
-    for zone in system_status.get('zones', []):
-        crop = controller.get_crop_by_id(zone.get('crop_id'))
-        soil = controller.get_soil_by_id(zone.get('soil_id'))
-        zones_with_details.append({
-            **zone,
-            'crop_name': crop['name'] if crop else 'Unknown',
-            'soil_name': soil['name'] if soil else 'Unknown',
-            'active': False
-        })
-    
-    # Get system monitoring data (CPU/RAM)
-    system_info = system_monitor.get_status()
-    
-    return jsonify({
-        "success": True,
-        "device": system_status.get('device_name', DEVICE_NAME),
-        "version": API_VERSION,
-        "sensors": system_status.get('sensors', {}),
-        "energy": system_status.get('energy', {}),
-        "irrigation": system_status.get('irrigation', {}),
-        "zones": zones_with_details,
-        "system": system_info,
-        "timestamp": system_status.get('timestamp')
-    })
+    """Complete system status, from the latest background sample"""
+    return snapshot_response('status')
 
 @app.route("/api/sensors")
 def sensors():
-    """Get real sensor data from sensor_reader"""
-    data = controller.sensor_reader.read_all_sensors()
+    """Latest sensor readings, from the background sample"""
+    return snapshot_response('sensors')
+
+# Default look-back window for /api/sensors/history?resolution=... without 'from'
+HISTORY_DEFAULT_SPAN = {
+    '1m': timedelta(hours=6),
+    '1h': timedelta(days=7),
+    '1d': timedelta(days=365)
+}
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+def parse_time_arg(name, default=None):
+    """Parse an ISO date/datetime (or epoch-ms) query parameter into epoch ms"""
+    value = request.args.get(name)
+    if not value:
+        return default
+    if value.isdigit():
+        return int(value)
+    return to_epoch_ms(datetime.fromisoformat(value.replace('Z', '+00:00')))
+
+def serialize_rows(rows, fields=('timestamp',)):
+    """Convert epoch-ms timestamp fields to ISO 8601 text for a JSON response"""
+    for row in rows:
+        for field in fields:
+            if field in row:
+                row[field] = ms_to_iso(row[field])
+    return rows
+
+STREAM_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+
+def parse_page_args(default_limit):
+    """Output format, capped page size and keyset cursor for the paged endpoints"""
+    fmt = request.args.get('format', 'json')
+    if fmt != 'json' and fmt not in STREAM_FORMATS:
+        raise ValueError(f"format must be json, {', '.join(STREAM_FORMATS)}")
+    cap = API_MAX_PAGE_SIZE if fmt == 'json' else API_MAX_STREAM_ROWS
+    limit = max(1, min(request.args.get('limit', default_limit, type=int), cap))
+    try:
+        cursor = {
+            'start': parse_time_arg('from'),
+            'end': parse_time_arg('to'),
+            'before_ts': parse_time_arg('before_ts'),
+            'before_id': request.args.get('before_id', type=int),
+            'after_id': request.args.get('after_id', type=int)
+        }
+    except ValueError as e:
+        raise ValueError(f"Invalid time range: {e}")
+    return fmt, limit, cursor
+
+def page_response(rows, limit, cursor):
+    """JSON page plus the cursor for the next one (null on the last page)"""
+    data = list(rows)
+    next_page = None
+    if len(data) == limit:
+        last = data[-1]
+        if cursor['after_id'] is not None:
+            next_page = {'after_id': last['id']}
+        else:
+            next_page = {'before_ts': last['timestamp'], 'before_id': last['id']}
     return jsonify({
         "success": True,
-        "data": data
+        "count": len(data),
+        "data": serialize_rows(data),
+        "next": next_page
     })
 
+def stream_response(rows, fmt, name):
+    """Stream row dicts as NDJSON or CSV, one chunk of rows at a time"""
+    def generate():
+        buffer = io.StringIO()
+        writer = None
+        for count, row in enumerate(rows, 1):
+            row['timestamp'] = ms_to_iso(row['timestamp'])
+            if fmt == 'csv':
+                if writer is None:
+                    writer = csv.DictWriter(buffer, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(row) + '\n')
+            if count % API_STREAM_CHUNK_ROWS == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    response = Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[fmt])
+    if fmt == 'csv':
+        response.headers['Content-Disposition'] = f'attachment; filename={name}.csv'
+    return response
+
 @app.route("/api/sensors/history")
 def sensor_history():
-    limit = request.args.get('limit', 100, type=int)
-    data = get_recent_sensor_data(limit)
+    resolution = request.args.get('resolution')
+    if not resolution:
+        # Raw readings, newest first; older days come from the archive files
+        try:
+            fmt, limit, cursor = parse_page_args(100)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        if fmt == 'json' and limit <= sensor_buffer.capacity and \
+                not any(value is not None for value in cursor.values()):
+            # Live dashboard poll: served from the in-memory ring buffer
+            rows = sensor_buffer.recent(limit)
+            if rows is not None:
+                return page_response(rows, limit, cursor)
+        # Imported here: the archive reader pulls in numpy
+        from sensor_archive import iter_sensor_readings
+        rows = iter_sensor_readings(limit, chunk_size=API_STREAM_CHUNK_ROWS, **cursor)
+        if fmt != 'json':
+            return stream_response(rows, fmt, 'sensor_readings')
+        return page_response(rows, limit, cursor)
+    
+    if resolution not in ROLLUP_RESOLUTIONS:
+        return jsonify({
+            "success": False,
+            "error": f"resolution must be one of {', '.join(ROLLUP_RESOLUTIONS)}"
+        }), 400
+    
+    try:
+        now = datetime.now(timezone.utc)
+        end = parse_time_arg('to', to_epoch_ms(now))
+        start = parse_time_arg('from', to_epoch_ms(now - HISTORY_DEFAULT_SPAN[resolution]))
+    except ValueError as e:
+        return jsonify({"success": False, "error": f"Invalid time range: {e}"}), 400
+    
+    data = serialize_rows(get_sensor_history(resolution, start, end))
     return jsonify({
         "success": True,
+        "resolution": resolution,
+        "from": ms_to_iso(start),
+        "to": ms_to_iso(end),
         "count": len(data),
         "data": data
     })
 
+@app.route("/api/stream")
+def stream():
+    """Server-Sent Events: a state snapshot, then deltas for sensors, energy,
+    valve, irrigation zones and alerts. Reconnects resume from Last-Event-ID."""
+    if not event_hub.acquire():
+        return jsonify({
+            "success": False,
+            "error": "Too many live connections; poll the REST endpoints instead"
+        }), 503
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    response = Response(event_hub.stream(last_event_id), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    # Frees the slot however the connection ends
+    response.call_on_close(event_hub.release)
+    return response
+
+@app.route("/api/stream/status")
+def stream_status():
+    return jsonify({
+        "success": True,
+        "data": event_hub.get_status()
+    })
+
 @app.route("/api/valve/on", methods=["POST"])
 def valve_on():
     duration = request.json.get('duration') if request.json else None
     result = irrigation_service.valve_on(trigger_type='manual', duration=duration)
+    status_sampler.trigger()
     return jsonify(result)
 
 @app.route("/api/valve/off", methods=["POST"])
 def valve_off():
     result = irrigation_service.valve_off()
+    status_sampler.trigger()
     return jsonify(result)
 
 @app.route("/api/valve/status")
 def valve_status():
-    status = irrigation_service.get_status()
+    return snapshot_response('valve')
+
+@app.route("/api/jobs")
+def irrigation_jobs():
+    limit = min(request.args.get('limit', 20, type=int), API_MAX_PAGE_SIZE)
     return jsonify({
         "success": True,
-        "data": status
+        "data": job_runner.list_jobs(limit=limit),
+        "runner": job_runner.get_status()
     })
 
+@app.route("/api/jobs/<int:job_id>", methods=["GET", "DELETE"])
+def irrigation_job(job_id):
+    job = job_runner.get_job(job_id)
+    if job is None:
+        return jsonify({"success": False, "error": f"Job {job_id} not found"}), 404
+    if request.method == "DELETE":
+        if job['state'] != 'running':
+            return jsonify({"success": False, "error": f"Job {job_id} is {job['state']}", "data": job}), 409
+        result = irrigation_service.valve_off(job_id=job_id, job_state='cancelled')
+        status_sampler.trigger()
+        if not result.get('success'):
+            return jsonify({"success": False, "error": result.get('message'),
+                            "data": job_runner.get_job(job_id)}), 409
+        job = job_runner.get_job(job_id)
+    return jsonify({"success": True, "data": job})
+
 @app.route("/api/emergency-stop", methods=["POST"])
 def emergency_stop():
     result = irrigation_service.emergency_stop()
+    status_sampler.trigger()
     return jsonify(result)
 
 @app.route("/api/logs")
 def logs():
-    limit = request.args.get('limit', 50, type=int)
-    data = get_recent_logs(limit)
+    try:
+        fmt, limit, cursor = parse_page_args(50)
+    except ValueError as e:
+        return jsonify({"success": False, "error": str(e)}), 400
+    sql, params = keyset_query('irrigation_logs', **cursor)
+    rows = iter_rows(sql, (*params, limit), API_STREAM_CHUNK_ROWS)
+    if fmt != 'json':
+        return stream_response(rows, fmt, 'irrigation_logs')
+    return page_response(rows, limit, cursor)
+
+@app.route("/api/search")
+def search():
+    """Full-text search over irrigation log notes and alert messages"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"success": False, "error": "q is required"}), 400
+    sources = [s for s in request.args.get('source', '').split(',') if s] or None
+    if sources and not set(sources) <= set(SEARCH_SOURCES):
+        return jsonify({
+            "success": False,
+            "error": f"source must be one of {', '.join(SEARCH_SOURCES)}"
+        }), 400
+    limit = max(1, min(request.args.get('limit', 20, type=int), API_MAX_PAGE_SIZE))
+    offset = max(0, request.args.get('offset', 0, type=int))
+    try:
+        start, end = parse_time_arg('from'), parse_time_arg('to')
+    except ValueError as e:
+        return jsonify({"success": False, "error": f"Invalid time range: {e}"}), 400
+
+    rows = search_text(query, start, end, sources, limit, offset)
     return jsonify({
         "success": True,
-        "count": len(data),
-        "data": data
+        "query": query,
+        "count": len(rows),
+        "data": serialize_rows(rows),
+        "next": {'offset': offset + limit} if len(rows) == limit else None
     })
 
 @app.route("/api/irrigation/tasks")
 def irrigation_tasks():
     """Get irrigation tasks - both scheduled (future) and historical (past 7 days)"""
     try:
-        with get_db() as conn:
+        with analytics_snapshot.get_db() as conn:
             cursor = conn.cursor()
             tasks = []
             
@@ -523,7 +837,7 @@ def irrigation_tasks():
                     check_date = today + timedelta(days=day_offset)
                     weekday = check_date.strftime('%a').lower()
                     
-                    if weekday in [d.lower() for d in days_list]:
+                    if weekday in [d.strip().lower()[:3] for d in days_list]:
                         # Parse start time
                         try:
                             time_parts = start_time.split(':')
@@ -554,28 +868,17 @@ def irrigation_tasks():
                             pass
             
             # Get historical tasks from logs (last 7 days)
-            cursor.execute('''
-                SELECT 
-                    timestamp,
-                    duration,
-                    water_used,
-                    trigger_type,
-                    status,
-                    zone_id
-                FROM irrigation_logs
-                WHERE DATE(timestamp) >= DATE('now', '-7 days')
-                ORDER BY timestamp DESC
-                LIMIT 10
-            ''')
-            
-            log_rows = cursor.fetchall()
+            now_utc = datetime.now(timezone.utc)
+            log_rows = get_irrigation_history(
+                to_epoch_ms(now_utc - timedelta(days=7)), to_epoch_ms(now_utc), 10,
+                db=analytics_snapshot.get_db)
             
             for row in log_rows:
-                start_datetime = datetime.fromisoformat(row[0])
-                duration_seconds = row[1] or 0
-                water_used = row[2] or 0
-                status = row[4] or 'completed'
-                zone_id = row[5] or 1
+                start_datetime = datetime.fromtimestamp(row['timestamp'] / 1000.0, timezone.utc)
+                duration_seconds = row['duration'] or 0
+                water_used = row['water_used'] or 0
+                status = row['status'] or 'completed'
+                zone_id = row['zone_id'] or 1
                 
                 progress = 100 if status == 'completed' else 0
                 duration_minutes = duration_seconds // 60
@@ -588,7 +891,7 @@ def irrigation_tasks():
                     'duration': duration_str,
                     'volume': volume_str,
                     'progress': progress,
-                    'trigger_type': row[3],
+                    'trigger_type': row['trigger_type'],
                     'status': status,
                     'zone': f"Zone {zone_id}"
                 })
@@ -599,11 +902,12 @@ def irrigation_tasks():
             return jsonify({
                 "success": True,
                 "tasks": tasks,
-                "count": len(tasks)
+                "count": len(tasks),
+                "snapshot": analytics_snapshot.get_status()
             })
             
     except Exception as e:
-        print(f"Error in irrigation_tasks: {e}")
+        logger.error("irrigation_tasks failed: %s", e)
         return jsonify({
             "success": False,
             "error": str(e),
@@ -626,17 +930,19 @@ def create_schedule():
     with get_db() as conn:
         cursor = conn.cursor()
         cursor.execute('''
-            INSERT INTO schedules (name, start_time, duration, days_of_week, soil_threshold)
-            VALUES (?, ?, ?, ?, ?)
+            INSERT INTO schedules (name, start_time, duration, days_of_week, soil_threshold, zone_id)
+            VALUES (?, ?, ?, ?, ?, ?)
         ''', (
             data.get('name'),
             data.get('start_time'),
             data.get('duration', 300),
             data.get('days_of_week', 'Monday,Tuesday,Wednesday,Thursday,Friday,Saturday,Sunday'),
-            data.get('soil_threshold', 30)
+            data.get('soil_threshold', 30),
+            data.get('zone_id', 1)
         ))
         conn.commit()
         schedule_id = cursor.lastrowid
+    analytics_snapshot.trigger()
     
     return jsonify({
         "success": True,
@@ -650,6 +956,7 @@ def delete_schedule(schedule_id):
         cursor = conn.cursor()
         cursor.execute('DELETE FROM schedules WHERE id = ?', (schedule_id,))
         conn.commit()
+    analytics_snapshot.trigger()
     
     return jsonify({
         "success": True,
@@ -667,6 +974,7 @@ def toggle_schedule(schedule_id):
             new_state = 0 if result[0] else 1
             cursor.execute('UPDATE schedules SET enabled = ? WHERE id = ?', (new_state, schedule_id))
             conn.commit()
+            analytics_snapshot.trigger()
             
             return jsonify({
                 "success": True,
@@ -680,7 +988,8 @@ def toggle_schedule(schedule_id):
 
 @app.route("/api/alerts")
 def get_alerts():
-    alerts = get_unresolved_alerts()
+    alerts = alert_manager.annotate(get_unresolved_alerts())
+    alerts = serialize_rows(alerts, ('timestamp', 'last_seen', 'resolved_at'))
     return jsonify({
         "success": True,
         "count": len(alerts),
@@ -689,10 +998,7 @@ def get_alerts():
 
 @app.route("/api/alerts/<int:alert_id>/resolve", methods=["POST"])
 def resolve_alert(alert_id):
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute('UPDATE alerts SET resolved = 1 WHERE id = ?', (alert_id,))
-        conn.commit()
+    alert_manager.resolve(alert_id)
     
     return jsonify({
         "success": True,
@@ -850,17 +1156,13 @@ def toggle_auto_mode():
 
 @app.route("/api/stats/summary")
 def stats_summary():
-    with get_db() as conn:
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM irrigation_logs WHERE DATE(timestamp) = DATE("now")')
-        today_irrigations = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT SUM(water_used) FROM irrigation_logs WHERE DATE(timestamp) = DATE("now")')
-        today_water = cursor.fetchone()[0] or 0
-        
-        cursor.execute('SELECT AVG(soil_moisture) FROM sensor_readings WHERE DATE(timestamp) = DATE("now")')
-        avg_moisture = cursor.fetchone()[0] or 0
+    now = to_epoch_ms(datetime.now(timezone.utc))
+    today_start = now - now % DAY_MS
+    
+    today_irrigations, today_water = get_irrigation_totals(today_start, today_start + DAY_MS - 1)
+    
+    # Daily rollup bucket - constant time however much history is stored
+    avg_moisture = get_sensor_rollup('1d', now, 'soil_moisture')['avg'] or 0
     
     return jsonify({
         "success": True,
@@ -907,44 +1209,34 @@ def delete_api_key(key_id):
 def analytics_summary():
     """Get analytics summary for dashboard"""
     try:
-        with get_db() as conn:
-            cursor = conn.cursor()
-            
-            # Fields needing irrigation (zones with moisture < threshold)
-            cursor.execute('''
-                SELECT COUNT(DISTINCT zone_id) 
-                FROM sensor_readings 
-                WHERE soil_moisture < 30 
-                AND DATE(timestamp) = DATE("now")
-            ''')
-            fields_needing = cursor.fetchone()[0] or 0
-            
-            # Uncertain fields (zones with missing/old data)
-            cursor.execute('''
-                SELECT COUNT(*) FROM (
-                    SELECT zone_id, MAX(timestamp) as last_reading
-                    FROM sensor_readings
-                    GROUP BY zone_id
-                    HAVING julianday('now') - julianday(last_reading) > 1
-                )
-            ''')
-            uncertain = cursor.fetchone()[0] or 0
-            
-            # Inactive zones
-            cursor.execute('''
-                SELECT COUNT(*) FROM (
-                    SELECT zone_id
-                    FROM sensor_readings
-                    GROUP BY zone_id
-                    HAVING MAX(timestamp) < datetime('now', '-7 days')
-                )
-            ''')
-            inactive = cursor.fetchone()[0] or 0
-            
-            # Area calculations
-            total_area = 244648  # Default value
-            irrigated_area = 144648
-            
+        now = to_epoch_ms(datetime.now(timezone.utc))
+        
+        # Fields needing irrigation (zones with moisture < threshold today)
+        fields_needing = count_zones_below_moisture(now - now % DAY_MS, now, 30,
+                                                    db=analytics_snapshot.get_db)
+        
+        # Uncertain fields (last reading over a day old) and inactive zones
+        # (over a week).
+        # One indexed MAX() lookup per configured zone instead of a GROUP BY
+        # over the whole table.
+        zone_ids = [zone['id'] for zone in controller.system_config.get('zones', [])] or [1]
+        uncertain_cutoff = now - DAY_MS
+        inactive_cutoff = now - 7 * DAY_MS
+        uncertain = 0
+        inactive = 0
+        for zone_id in zone_ids:
+            last_reading = get_zone_last_reading(zone_id, db=analytics_snapshot.get_db)
+            if last_reading is None:
+                continue
+            if last_reading < uncertain_cutoff:
+                uncertain += 1
+            if last_reading < inactive_cutoff:
+                inactive += 1
+        
+        # Area calculations
+        total_area = 244648  # Default value
+        irrigated_area = 144648
+        
         return jsonify({
             "success": True,
             "data": {
@@ -953,7 +1245,8 @@ def analytics_summary():
                 "inactive_zones": inactive,
                 "total_area": total_area,
                 "irrigated_area": irrigated_area
-            }
+            },
+            "snapshot": analytics_snapshot.get_status()
         })
     except Exception as e:
         return jsonify({
@@ -961,6 +1254,77 @@ def analytics_summary():
             "error": str(e)
         })
 
+@app.route("/api/storage/retention")
+def storage_retention():
+    """Retention policy, last run report and current per-table row counts"""
+    try:
+        return jsonify({
+            "success": True,
+            "retention": retention_engine.get_status(),
+            "storage": retention_engine.get_storage_info()
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route("/api/storage/retention/run", methods=["POST"])
+def run_storage_retention():
+    """Run the retention policy now (optionally with a one-off full VACUUM)"""
+    data = request.get_json(silent=True) or {}
+    
+    if data.get('full_vacuum'):
+        import threading
+        threading.Thread(target=retention_engine.run_once,
+                         kwargs={'full_vacuum': True}, daemon=True).start()
+    elif retention_engine.running:
+        retention_engine.trigger()
+    else:
+        return jsonify({
+            "success": True,
+            "report": retention_engine.run_once()
+        })
+    
+    return jsonify({
+        "success": True,
+        "message": "Retention run started"
+    }), 202
+
+@app.route("/api/storage/backups")
+def storage_backups():
+    """Backup policy, last backup report and the backups on disk"""
+    try:
+        return jsonify({
+            "success": True,
+            "backup": backup_service.get_status()
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route("/api/storage/backups", methods=["POST"])
+def run_storage_backup():
+    """Take a backup now; waits for it unless the scheduler is running"""
+    if backup_service.running:
+        backup_service.trigger()
+        return jsonify({
+            "success": True,
+            "message": "Backup started"
+        }), 202
+    try:
+        return jsonify({
+            "success": True,
+            "report": backup_service.run_once()
+        })
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @app.route("/api/system/update/check")
 def check_update():
     """Check for system updates from GitHub"""
@@ -1018,11 +1382,17 @@ def install_update():
             time.sleep(2)  # Give time for response to be sent
             result = update_app(download_url)
             if result["success"]:
-                print(f"✅ Update completed: {result['message']}")
+                logger.info("Update completed: %s", result['message'])
+                # Rebuild the hashed frontend from the updated files
+                if static_assets.loaded:
+                    try:
+                        static_assets.load()
+                    except Exception:
+                        logger.exception("Static asset rebuild after update failed")
                 # Optionally restart the server here
                 # os.execv(sys.executable, ['python'] + sys.argv)
             else:
-                print(f"❌ Update failed: {result.get('error', 'Unknown error')}")
+                logger.error("Update failed: %s", result.get('error', 'Unknown error'))
         
         thread = threading.Thread(target=do_update)
         thread.daemon = True
@@ -1043,6 +1413,7 @@ def install_update():
 def system():
     """Get real-time system stats (CPU & RAM) for hardware dashboard"""
     try:
+        from system_stats import get_system_stats
         stats = get_system_stats()
         return jsonify(stats)
     except Exception as e:
@@ -1074,91 +1445,46 @@ def system_monitor_route():
 def system_benchmarks():
     """Get comprehensive system benchmarks from Raspberry Pi hardware"""
     try:
-        import time
-        import platform
-        
-        # Get real-time system stats
+        # Latest background sample; nothing here blocks on psutil
+        from system_stats import get_system_stats
         stats = get_system_stats()
-        system_info = system_monitor.get_status()
-        
-        # Calculate uptime
-        try:
-            if platform.system() == "Linux":
-                with open('/proc/uptime', 'r') as f:
-                    uptime_seconds = float(f.readline().split()[0])
-                    days = int(uptime_seconds // 86400)
-                    hours = int((uptime_seconds % 86400) // 3600)
-                    minutes = int((uptime_seconds % 3600) // 60)
-                    uptime_str = f"{days}d {hours}h {minutes}m"
-            else:
-                # For non-Linux systems, use boot_time from psutil
-                import psutil
-                boot_time = psutil.boot_time()
-                uptime_seconds = time.time() - boot_time
-                days = int(uptime_seconds // 86400)
-                hours = int((uptime_seconds % 86400) // 3600)
-                minutes = int((uptime_seconds % 3600) // 60)
-                uptime_str = f"{days}d {hours}h {minutes}m"
-        except:
+        sample = metrics_collector.latest()
+        static = metrics_collector.static
+
+        uptime_seconds = metrics_collector.uptime_seconds()
+        if uptime_seconds is not None:
+            days = int(uptime_seconds // 86400)
+            hours = int((uptime_seconds % 86400) // 3600)
+            minutes = int((uptime_seconds % 3600) // 60)
+            uptime_str = f"{days}d {hours}h {minutes}m"
+        else:
             uptime_str = "Unknown"
         
-        # Get disk usage
-        try:
-            import psutil
-            disk = psutil.disk_usage('/')
-            disk_total_gb = round(disk.total / (1024**3), 2)
-            disk_used_gb = round(disk.used / (1024**3), 2)
-            disk_percent = disk.percent
-        except:
-            disk_total_gb = 0
-            disk_used_gb = 0
-            disk_percent = 0
-        
-        # Get CPU temperature (Raspberry Pi specific)
-        cpu_temp = 0
-        try:
-            if platform.system() == "Linux":
-                with open('/sys/class/thermal/thermal_zone0/temp', 'r') as f:
-                    cpu_temp = int(f.read().strip()) / 1000.0
-        except:
-            pass
-        
-        # Get network I/O
-        try:
-            import psutil
-            net_io = psutil.net_io_counters()
-            net_sent_mb = round(net_io.bytes_sent / (1024**2), 2)
-            net_recv_mb = round(net_io.bytes_recv / (1024**2), 2)
-        except:
-            net_sent_mb = 0
-            net_recv_mb = 0
-        
-        # Calculate average response time (simple ping to localhost)
-        response_time = 0
-        try:
-            start = time.time()
-            # Simulate API response time measurement
-            response_time = int((time.time() - start) * 1000) + 35  # Add base API overhead
-        except:
-            response_time = 50
+        # Measured latency of the requests served since startup
+        latency = telemetry.request_latency(exclude=LATENCY_EXCLUDED_ROUTES)
+        overall = latency['overall'] or {}
         
         return jsonify({
             "success": True,
             "cpu_usage": stats.get("cpu_percent", 0),
             "memory_usage": int(stats.get("mem_used", 0) * 1024),  # Convert GB to MB
             "memory_total": int(stats.get("mem_total", 1) * 1024),  # Convert GB to MB
-            "response_time": response_time,
+            "response_time": overall.get('avg_ms', 0),
+            "response_time_p95": overall.get('p95_ms', 0),
+            "response_time_p99": overall.get('p99_ms', 0),
+            "requests_served": overall.get('requests', 0),
+            "slowest_endpoints": latency['routes'][:5],
             "uptime": uptime_str,
-            "disk_total_gb": disk_total_gb,
-            "disk_used_gb": disk_used_gb,
-            "disk_percent": disk_percent,
-            "cpu_temp": cpu_temp,
+            "disk_total_gb": static['disk_total_gb'] or 0,
+            "disk_used_gb": sample['disk_used_gb'] or 0,
+            "disk_percent": sample['disk_percent'] or 0,
+            "cpu_temp": sample['cpu_temp_c'] or 0,
             "cpu_cores": stats.get("cpu_cores", 1),
             "cpu_freq": stats.get("cpu_freq", 0),
-            "net_sent_mb": net_sent_mb,
-            "net_recv_mb": net_recv_mb,
-            "platform": platform.system(),
-            "architecture": platform.machine(),
+            "net_sent_mb": sample['net_sent_mb'] or 0,
+            "net_recv_mb": sample['net_recv_mb'] or 0,
+            "platform": static['platform'],
+            "architecture": static['architecture'],
             "timestamp": datetime.now().isoformat()
         })
     except Exception as e:
@@ -1172,6 +1498,57 @@ def system_benchmarks():
             "uptime": "0d 0h 0m"
         }), 500
 
+# Several dashboard GETs in one round-trip, dispatched in-process
+batch_dispatcher = BatchDispatcher(app)
+
+@app.route("/api/batch", methods=["POST"])
+def batch_requests():
+    """Run a list of GET sub-requests and return all their responses"""
+    try:
+        items = batch_dispatcher.parse(request.get_json(silent=True))
+    except BatchError as e:
+        return jsonify({"success": False, "error": str(e)}), e.status
+    return Response(batch_dispatcher.run(items, request), mimetype='application/json')
+
+@app.route("/api/metrics")
+def prometheus_metrics():
+    """Request latency histograms and service counters in Prometheus text format"""
+    return Response(telemetry.render(), content_type='text/plain; version=0.0.4; charset=utf-8',
+                    headers={'Cache-Control': 'no-store'})
+
+@app.route("/api/system/latency")
+def system_latency():
+    """Per-route request latency since startup, slowest first"""
+    return jsonify({
+        "success": True,
+        **telemetry.request_latency(exclude=LATENCY_EXCLUDED_ROUTES)
+    })
+
+@app.route("/api/system/rate-limits")
+def system_rate_limits():
+    """Rate-limit policy in force and how many clients are being tracked"""
+    return jsonify({
+        "success": True,
+        "data": rate_limiter.get_status()
+    })
+
+@app.route("/api/system/history")
+def system_history():
+    """Buffered CPU/RAM/temperature/disk/network samples, oldest first"""
+    try:
+        since = parse_time_arg('since')
+    except ValueError as e:
+        return jsonify({"success": False, "error": f"Invalid since: {e}"}), 400
+    samples = metrics_collector.history(since, request.args.get('limit', type=int))
+    return jsonify({
+        "success": True,
+        "interval_seconds": metrics_collector.interval,
+        "capacity": metrics_collector.samples.maxlen,
+        "count": len(samples),
+        "static": metrics_collector.static,
+        "data": serialize_rows([dict(sample) for sample in samples])
+    })
+
 @app.route("/api/system/reboot", methods=["POST"])
 def reboot_system():
     """Reboot the system (Raspberry Pi)"""
@@ -1252,11 +1629,60 @@ def display_api_key_info():
         print(f"   Status: ❌ ERROR - {e}")
         return False
 
+def start_background_services():
+    """Samplers and schedulers, started once the lazy services are built"""
+    for service in (metrics_collector, retention_engine, backup_service,
+                    status_sampler, analytics_snapshot, job_runner):
+        if isinstance(service, LazyService) and not service.available():
+            continue
+        service.start()
+
+def stop_background_services():
+    """Called when the server starts draining: end streams, stop samplers"""
+    event_hub.close()
+    # Closes the valve of any job still running
+    job_runner.stop()
+    for service in (status_sampler, metrics_collector, analytics_snapshot,
+                    retention_engine, backup_service):
+        # Lazy services that were never built have nothing to stop
+        if isinstance(service, LazyService) and not service.loaded:
+            continue
+        service.stop()
+
+
+# Everything below is only needed once requests arrive: routes can be
+# served now while the services are built in the background
+startup_profiler.mark_ready()
+if not startup_profiler.enabled:
+    warm_up(LazyService.registry, then=start_background_services)
+
+
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description=f"{DEVICE_NAME} API server")
+    parser.add_argument('--dev', action='store_true', default=SERVER_MODE == 'dev',
+                        help='Flask debug server with reloader instead of waitress')
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--threads', type=int, default=SERVER_THREADS,
+                        help='worker threads (production mode)')
+    parser.add_argument('--profile-startup', action='store_true',
+                        help='report import/init times and exit (1 if over --startup-budget)')
+    parser.add_argument('--startup-budget', type=float, default=STARTUP_BUDGET_SECONDS,
+                        help='seconds allowed from process start to ready')
+    args = parser.parse_args()
+
+    if args.profile_startup:
+        startup_profiler.disable()
+        for service in LazyService.registry:
+            service.available()
+        sys.exit(0 if startup_profiler.report(args.startup_budget) else 1)
+    base_url = f"http://localhost:{args.port}"
+
     print("=" * 60)
     print(f"Starting {DEVICE_NAME} API Server v{API_VERSION}")
     print("=" * 60)
-    if device_identity:
+    if device_identity.available():
         print(f"✓ Device ID: {device_identity.get_device_id()}")
         print(f"✓ Registered: {device_identity.is_registered()}")
     print("-" * 60)
@@ -1266,14 +1692,18 @@ if __name__ == "__main__":
     
     print("-" * 60)
     print("📡 SERVER ENDPOINTS:")
-    print("Dashboard:        http://localhost:5000/")
-    print("Device Link:      http://localhost:5000/device-link.html")
-    print("Hardware:         http://localhost:5000/hardware.html")
-    print("API Keys:         http://localhost:5000/api-keys")
-    print("Pi Simulation:    http://localhost:5000/PI_simulation.html")
-    print("API Endpoints:    http://localhost:5000/api/")
-    print("Device ID:        http://localhost:5000/device-id")
+    print(f"Dashboard:        {base_url}/")
+    print(f"Device Link:      {base_url}/device-link.html")
+    print(f"Hardware:         {base_url}/hardware.html")
+    print(f"API Keys:         {base_url}/api-keys")
+    print(f"Pi Simulation:    {base_url}/PI_simulation.html")
+    print(f"API Endpoints:    {base_url}/api/")
+    print(f"Device ID:        {base_url}/device-id")
     print("=" * 60)
-    print("🚀 Server starting... Press Ctrl+C to stop")
+    print(f"🚀 Server starting ({'dev' if args.dev else 'production'} mode)... Press Ctrl+C to stop")
     print("=" * 60)
-    app.run(host="0.0.0.0", port=5000, debug=True)
+    if args.dev:
+        serve(app, dev=True, host=args.host, port=args.port)
+    else:
+        serve(app, on_drain=stop_background_services,
+              host=args.host, port=args.port, threads=args.threads)
@@ -77,7 +77,7 @@ def require_api_key(f):
     return decorated_function
 
 def get_all_api_keys():
-    with get_db() as conn:
+    with get_db(readonly=True) as conn:
         cursor = conn.cursor()
         cursor.execute('''
             SELECT id, name, created_at, last_used, enabled 
@@ -0,0 +1,280 @@
+"""
+Backup Service - online, compressed backups of irrigation.db with rotation
+Copies the live database with SQLite's online backup API a few hundred
+pages per step (WAL readers never block the sensor loop's writes), checks
+the copy, gzips it into BACKUP_DIR and keeps the newest N files. Runs on a
+schedule and on demand from the API; policy comes from the "backup"
+section of data/system_limits.json.
+
+Restore onto a stopped instance:
+    python backup_service.py restore irrigation-20240101-030000.db.gz
+"""
+import glob
+import gzip
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from datetime import datetime
+import database
+from config import BACKUP_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY = {
+    'enabled': True,
+    'interval_hours': 24,
+    'keep': 7,
+    'pages_per_step': 256,
+    'step_pause_ms': 5,
+    'max_restarts': 3,
+    'compress_level': 6
+}
+
+BACKUP_PREFIX = 'irrigation-'
+BACKUP_SUFFIX = '.db.gz'
+
+
+class _Restarted(Exception):
+    """Stepwise copy kept restarting under concurrent writes"""
+
+
+def _check(path):
+    """PRAGMA quick_check on a database file; raises if it is damaged"""
+    conn = sqlite3.connect(path)
+    try:
+        result = conn.execute('PRAGMA quick_check').fetchone()[0]
+    finally:
+        conn.close()
+    if result != 'ok':
+        raise sqlite3.DatabaseError(f"quick_check failed for {path}: {result}")
+
+
+class BackupService:
+    """Scheduled and on-demand backups of the live database"""
+
+    def __init__(self, directory=BACKUP_DIR, limits_file=None):
+        self.directory = directory
+        self.limits_file = limits_file or os.path.join(
+            os.path.dirname(__file__), 'data', 'system_limits.json')
+        self.policy = self.load_policy()
+        self.last_report = None
+        self.running = False
+        self.thread = None
+        self._wake = threading.Event()
+        self._run_lock = threading.Lock()
+
+    def load_policy(self):
+        policy = dict(DEFAULT_POLICY)
+        try:
+            with open(self.limits_file, 'r') as f:
+                policy.update(json.load(f).get('system_limits', {}).get('backup', {}))
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.warning("Backup: using default policy (%s)", e)
+        return policy
+
+    def _copy(self, target_path):
+        """Online backup into target_path, pages_per_step pages at a time.
+
+        A commit from another connection between steps restarts the copy.
+        After max_restarts of those it finishes in a single step instead:
+        in WAL mode that is one read transaction, which still never blocks
+        writers, so a busy sensor loop can't starve the backup.
+        Returns (pages, restarts).
+        """
+        pause = self.policy['step_pause_ms'] / 1000.0
+        max_restarts = self.policy['max_restarts']
+        state = {'remaining': None, 'restarts': 0}
+
+        def progress(status, remaining, total):
+            if state['remaining'] is not None and remaining > state['remaining']:
+                state['restarts'] += 1
+                if state['restarts'] > max_restarts:
+                    raise _Restarted()
+            state['remaining'] = remaining
+            # Give the sensor loop's I/O a turn between steps
+            if remaining and pause:
+                time.sleep(pause)
+
+        target = sqlite3.connect(target_path)
+        try:
+            with database.get_db(readonly=True) as source:
+                try:
+                    source.backup(target, pages=self.policy['pages_per_step'], progress=progress)
+                except _Restarted:
+                    source.backup(target)
+            # A standalone file: no -wal/-shm needed to open or restore it
+            target.execute('PRAGMA journal_mode=DELETE')
+            pages = target.execute('PRAGMA page_count').fetchone()[0]
+        finally:
+            target.close()
+        return pages, state['restarts']
+
+    def _compress(self, source_path, target_path):
+        part_path = target_path + '.part'
+        with open(source_path, 'rb') as src, \
+                gzip.open(part_path, 'wb', compresslevel=self.policy['compress_level']) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        os.replace(part_path, target_path)
+
+    def list_backups(self):
+        """Backups on disk, newest first"""
+        paths = glob.glob(os.path.join(self.directory, f'{BACKUP_PREFIX}*{BACKUP_SUFFIX}'))
+        return [
+            {
+                'name': os.path.basename(path),
+                'size_bytes': os.path.getsize(path),
+                'created': datetime.fromtimestamp(os.path.getmtime(path)).isoformat()
+            }
+            for path in sorted(paths, reverse=True)
+        ]
+
+    def rotate(self):
+        """Delete all but the newest ``keep`` backups; returns the names removed"""
+        keep = self.policy['keep']
+        removed = []
+        if keep <= 0:
+            return removed
+        for backup in self.list_backups()[keep:]:
+            os.remove(os.path.join(self.directory, backup['name']))
+            removed.append(backup['name'])
+        return removed
+
+    def run_once(self):
+        """Take one backup, rotate old ones and return a report"""
+        with self._run_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            started = time.time()
+            name = f"{BACKUP_PREFIX}{datetime.now().strftime('%Y%m%d-%H%M%S')}{BACKUP_SUFFIX}"
+            path = os.path.join(self.directory, name)
+            tmp_path = os.path.join(self.directory, name[:-len('.gz')] + '.tmp')
+            try:
+                pages, restarts = self._copy(tmp_path)
+                copied = time.time()
+                _check(tmp_path)
+                raw_bytes = os.path.getsize(tmp_path)
+                self._compress(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            duration = time.time() - started
+            compressed_bytes = os.path.getsize(path)
+            self.last_report = {
+                'timestamp': datetime.now().isoformat(),
+                'file': name,
+                'pages': pages,
+                'restarts': restarts,
+                'db_bytes': raw_bytes,
+                'compressed_bytes': compressed_bytes,
+                'compression_ratio': round(raw_bytes / compressed_bytes, 2) if compressed_bytes else None,
+                'copy_seconds': round(copied - started, 3),
+                'duration_seconds': round(duration, 3),
+                'throughput_mb_s': round(raw_bytes / 1048576 / duration, 2) if duration else None,
+                'rotated': self.rotate()
+            }
+            logger.info("Backup: %s (%s -> %s bytes in %.2fs, %s MB/s)", name, raw_bytes,
+                        compressed_bytes, duration, self.last_report['throughput_mb_s'])
+            return self.last_report
+
+    def restore(self, name, db_path=None, force=False):
+        """Replace the database file with a backup. Only on a stopped instance.
+
+        A running server keeps the -shm file open; unless ``force`` is set
+        (e.g. after a crash left one behind) that refuses the restore.
+        """
+        db_path = db_path or database.DB_PATH
+        source = name if os.path.isabs(name) else os.path.join(self.directory, name)
+        if not os.path.exists(source):
+            raise FileNotFoundError(f"No backup {source}")
+        if os.path.exists(db_path + '-shm') and not force:
+            raise RuntimeError(f"{db_path} looks in use (-shm present); stop the server first")
+
+        started = time.time()
+        tmp_path = db_path + '.restore'
+        with gzip.open(source, 'rb') as src, open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        try:
+            _check(tmp_path)
+        except sqlite3.DatabaseError:
+            os.remove(tmp_path)
+            raise
+        # A stale WAL would be replayed on top of the restored pages
+        for suffix in ('-wal', '-shm'):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+        os.replace(tmp_path, db_path)
+        return {
+            'restored': os.path.basename(source),
+            'db_path': db_path,
+            'db_bytes': os.path.getsize(db_path),
+            'duration_seconds': round(time.time() - started, 3)
+        }
+
+    def start(self):
+        """Take backups on a background schedule"""
+        if self.running or not self.policy.get('enabled', True):
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='backup', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    def trigger(self):
+        """Ask the background thread to back up now"""
+        self._wake.set()
+
+    def _run(self):
+        interval = self.policy['interval_hours'] * 3600
+        latest = self.list_backups()
+        if latest:
+            # Resume the schedule from the newest backup across restarts
+            age = time.time() - os.path.getmtime(os.path.join(self.directory, latest[0]['name']))
+            self._wake.wait(max(60, interval - age))
+        else:
+            self._wake.wait(60)
+        while self.running:
+            self._wake.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("Backup failed: %s", e)
+            self._wake.wait(interval)
+
+    def get_status(self):
+        return {
+            'enabled': self.policy.get('enabled', True),
+            'running': self.running,
+            'directory': self.directory,
+            'policy': self.policy,
+            'last_run': self.last_report,
+            'backups': self.list_backups()
+        }
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Back up or restore irrigation.db')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('backup', help='take a backup now (default)')
+    subparsers.add_parser('list', help='list backups')
+    restorer = subparsers.add_parser('restore', help='restore a backup onto a stopped instance')
+    restorer.add_argument('name')
+    restorer.add_argument('--force', action='store_true',
+                          help='restore even though a -shm file is present')
+    args = parser.parse_args()
+
+    service = BackupService()
+    if args.command == 'restore':
+        result = service.restore(args.name, force=args.force)
+    elif args.command == 'list':
+        result = service.list_backups()
+    else:
+        result = service.run_once()
+    print(json.dumps(result, indent=2))
@@ -0,0 +1,110 @@
+"""
+Batch Requests - several GET endpoints answered in one round-trip
+/api/batch takes a list of GET sub-requests and runs each through the
+normal Flask dispatch (auth, hooks, error handlers) in-process on a small
+thread pool, then returns one JSON document with every item's status and
+body. JSON bodies are spliced in as-is rather than parsed and re-encoded.
+
+Request:  {"requests": ["/api/status", {"id": "alerts", "path": "/api/alerts",
+                                         "headers": {"If-None-Match": "..."}}]}
+Response: {"success": true, "responses": [{"id": ..., "path": ..., "status": 200,
+                                           "etag": ..., "body": {...}}, ...]}
+"""
+import json
+from concurrent.futures import ThreadPoolExecutor
+from config import API_KEY_HEADER, BATCH_MAX_REQUESTS, BATCH_WORKERS
+
+# Sub-requests that can't be collected into a single body
+EXCLUDED_PREFIXES = ('/api/batch', '/api/stream')
+# Headers of the outer request passed on to every sub-request
+FORWARDED_HEADERS = (API_KEY_HEADER, 'Authorization', 'Cookie', 'Accept-Language')
+
+
+class BatchError(ValueError):
+    """The batch as a whole is malformed (HTTP status in ``status``)"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _item_json(item_id, path, status, body, etag=None):
+    """One response entry; ``body`` is already-encoded JSON text"""
+    meta = {'id': item_id, 'path': path, 'status': status}
+    if etag:
+        meta['etag'] = etag
+    return f'{json.dumps(meta)[:-1]}, "body": {body}}}'
+
+
+class BatchDispatcher:
+    """Runs parsed sub-requests against ``app`` on a shared thread pool"""
+
+    def __init__(self, app, workers=BATCH_WORKERS, max_requests=BATCH_MAX_REQUESTS):
+        self.app = app
+        self.max_requests = max_requests
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch')
+
+    def parse(self, payload):
+        """[(id, path, headers)] from the request body, or BatchError"""
+        items = payload.get('requests') if isinstance(payload, dict) else payload
+        if not isinstance(items, list) or not items:
+            raise BatchError('Body must be {"requests": [...]} with at least one item')
+        if len(items) > self.max_requests:
+            raise BatchError(f'At most {self.max_requests} requests per batch', 413)
+
+        parsed = []
+        for index, item in enumerate(items):
+            if isinstance(item, str):
+                item = {'path': item}
+            if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+                raise BatchError(f'Item {index} needs a "path"')
+            headers = item.get('headers') or {}
+            if not isinstance(headers, dict):
+                raise BatchError(f'Item {index}: "headers" must be an object')
+            parsed.append((str(item.get('id', index)), item['path'], headers))
+        return parsed
+
+    def _dispatch(self, path, headers, environ_base):
+        """(status, body JSON text, etag) for one GET sub-request"""
+        if not path.startswith('/api/') or path.startswith(EXCLUDED_PREFIXES):
+            return 400, json.dumps({'success': False, 'error': 'Path not allowed in a batch'}), None
+
+        with self.app.test_request_context(path, method='GET', headers=headers,
+                                           environ_base=environ_base):
+            try:
+                response = self.app.full_dispatch_request()
+            except Exception as e:
+                response = self.app.handle_exception(e)
+            try:
+                if response.is_streamed:
+                    return 400, json.dumps({'success': False,
+                                            'error': 'Streaming endpoint not supported in a batch'}), None
+                data = response.get_data()
+                if not data:
+                    body = 'null'
+                elif response.is_json:
+                    body = data.decode('utf-8')
+                else:
+                    body = json.dumps(data.decode('utf-8', errors='replace'))
+                return response.status_code, body, response.headers.get('ETag')
+            finally:
+                response.close()
+
+    def run(self, items, outer_request):
+        """Dispatch ``items`` concurrently; returns the combined JSON text"""
+        shared = {name: outer_request.headers[name]
+                  for name in FORWARDED_HEADERS if name in outer_request.headers}
+        environ_base = {'REMOTE_ADDR': outer_request.remote_addr}
+        futures = [
+            (item_id, path, self.pool.submit(self._dispatch, path, {**shared, **headers}, environ_base))
+            for item_id, path, headers in items
+        ]
+
+        entries = []
+        for item_id, path, future in futures:
+            try:
+                status, body, etag = future.result()
+            except Exception as e:
+                status, body, etag = 500, json.dumps({'success': False, 'error': str(e)}), None
+            entries.append(_item_json(item_id, path, status, body, etag))
+        return '{"success": true, "responses": [' + ', '.join(entries) + ']}'
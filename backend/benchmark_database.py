@@ -0,0 +1,136 @@
+"""
+Database benchmark - legacy connect-per-call vs pooled WAL connections
+Measures sensor insert throughput and dashboard read latency while the
+sensor writer is running. Uses throwaway databases, never irrigation.db.
+
+Usage: python benchmark_database.py [--inserts 2000] [--reads 500]
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import database
+
+WRITER_INTERVAL = 0.005  # seconds between background sensor writes
+
+
+@contextmanager
+def legacy_get_db():
+    """The original get_db(): a fresh rollback-journal connection per call"""
+    conn = sqlite3.connect(database.DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def insert_reading(get_db):
+    with get_db() as conn:
+        conn.execute('''
+            INSERT INTO sensor_readings (soil_moisture, temperature, humidity, flow_rate, pressure)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (35.0, 25.0, 60.0, 1.2, 2.5))
+        conn.commit()
+
+
+def read_recent(get_db):
+    with get_db() as conn:
+        conn.execute('SELECT * FROM sensor_readings ORDER BY timestamp DESC LIMIT 100').fetchall()
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def run_case(name, get_db, read_get_db, inserts, reads, legacy=False):
+    database.connection_manager.close_all()
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'bench.db')
+        database.init_database()
+        if legacy:
+            # init_database() switched the file to WAL; put it back
+            database.connection_manager.close_all()
+            conn = sqlite3.connect(database.DB_PATH)
+            conn.execute('PRAGMA journal_mode=DELETE')
+            conn.close()
+
+        start = time.perf_counter()
+        for _ in range(inserts):
+            insert_reading(get_db)
+        insert_rate = inserts / (time.perf_counter() - start)
+
+        # Reads measured while a paced background writer keeps committing,
+        # so both modes read a table of the same size
+        stop = threading.Event()
+
+        def writer():
+            while not stop.wait(WRITER_INTERVAL):
+                insert_reading(get_db)
+
+        thread = threading.Thread(target=writer, daemon=True)
+        thread.start()
+        latencies = []
+        errors = 0
+        for _ in range(reads):
+            t0 = time.perf_counter()
+            try:
+                read_recent(read_get_db)
+            except sqlite3.OperationalError:
+                errors += 1
+            latencies.append((time.perf_counter() - t0) * 1000)
+        stop.set()
+        thread.join()
+        database.connection_manager.close_all()
+
+    return {
+        'name': name,
+        'inserts_per_sec': insert_rate,
+        'read_p50_ms': statistics.median(latencies),
+        'read_p99_ms': percentile(latencies, 99),
+        'read_errors': errors
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark database connection handling')
+    parser.add_argument('--inserts', type=int, default=2000)
+    parser.add_argument('--reads', type=int, default=500)
+    args = parser.parse_args()
+
+    original_path = database.DB_PATH
+    try:
+        results = [
+            run_case('legacy (connect per call)', legacy_get_db, legacy_get_db,
+                     args.inserts, args.reads, legacy=True),
+            run_case('pooled WAL', database.get_db,
+                     lambda: database.get_db(readonly=True),
+                     args.inserts, args.reads),
+        ]
+    finally:
+        database.DB_PATH = original_path
+
+    print("=" * 70)
+    print("DATABASE BENCHMARK")
+    print("=" * 70)
+    print(f"{'mode':<28}{'inserts/s':>12}{'read p50 ms':>14}{'read p99 ms':>14}")
+    for r in results:
+        print(f"{r['name']:<28}{r['inserts_per_sec']:>12.0f}"
+              f"{r['read_p50_ms']:>14.2f}{r['read_p99_ms']:>14.2f}")
+        if r['read_errors']:
+            print(f"   {r['read_errors']} reads failed with 'database is locked'")
+    print("=" * 70)
+
+
+if __name__ == '__main__':
+    main()
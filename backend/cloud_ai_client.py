@@ -8,9 +8,9 @@ import requests
 import logging
 from datetime import datetime
 from typing import Optional, Dict, Any
+from telemetry import telemetry
 from config import WEATHER_API_KEY, LOCATION_LAT, LOCATION_LON
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class CloudAIClient:
@@ -26,7 +26,7 @@ class CloudAIClient:
         self.enabled = False
         self.fallback_to_local = True
         
-        logger.info(f"Cloud AI Client initialized - URL: {self.cloud_api_url}")
+        logger.info("Cloud AI Client initialized - URL: %s", self.cloud_api_url)
     
     def get_irrigation_recommendation(self, sensor_data: Dict, system_status: Dict, 
                                      crop_type: str = "tomato", location: str = "algeria") -> Optional[Dict]:
@@ -42,20 +42,21 @@ class CloudAIClient:
         try:
             payload = self._prepare_payload(sensor_data, system_status, crop_type, location)
             
-            logger.info(f"Requesting AI recommendation from cloud: {self.cloud_api_url}")
+            logger.info("Requesting AI recommendation from cloud: %s", self.cloud_api_url)
             
-            response = requests.post(
-                f"{self.cloud_api_url}/api/ai/recommend",
-                json=payload,
-                timeout=self.timeout
-            )
+            with telemetry.track('cloud', service='cloud_ai'):
+                response = requests.post(
+                    f"{self.cloud_api_url}/api/ai/recommend",
+                    json=payload,
+                    timeout=self.timeout
+                )
             
             if response.status_code == 200:
                 recommendation = response.json()
-                logger.info(f"Cloud AI recommendation received: {recommendation.get('action')}")
+                logger.info("Cloud AI recommendation received: %s", recommendation.get('action'))
                 return recommendation
             else:
-                logger.warning(f"Cloud AI returned error: {response.status_code}")
+                logger.warning("Cloud AI returned error: %s", response.status_code)
                 return None
                 
         except requests.exceptions.Timeout:
@@ -65,7 +66,7 @@ class CloudAIClient:
             logger.warning("Cloud AI unavailable - falling back to local rules")
             return None
         except Exception as e:
-            logger.error(f"Cloud AI error: {e} - falling back to local rules")
+            logger.error("Cloud AI error: %s - falling back to local rules", e)
             return None
     
     def _prepare_payload(self, sensor_data: Dict, system_status: Dict, 
@@ -89,7 +90,7 @@ class CloudAIClient:
         if api_url:
             self.cloud_api_url = api_url
         self.enabled = True
-        logger.info(f"Cloud AI enabled: {self.cloud_api_url}")
+        logger.info("Cloud AI enabled: %s", self.cloud_api_url)
     
     def disable_cloud_ai(self):
         """Disable cloud AI - use local rules only"""
@@ -99,7 +100,8 @@ class CloudAIClient:
     def test_connection(self) -> bool:
         """Test connection to cloud AI service"""
         try:
-            response = requests.get(f"{self.cloud_api_url}/health", timeout=3)
+            with telemetry.track('cloud', service='cloud_ai'):
+                response = requests.get(f"{self.cloud_api_url}/health", timeout=3)
             return response.status_code == 200
         except:
             return False
@@ -140,19 +142,20 @@ class WeatherAPIClient:
                 'units': 'metric'
             }
             
-            response = requests.get(url, params=params, timeout=5)
+            with telemetry.track('cloud', service='weather'):
+                response = requests.get(url, params=params, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
                 forecast = self._parse_forecast(data)
-                logger.info(f"Weather forecast retrieved: {forecast.get('summary')}")
+                logger.info("Weather forecast retrieved: %s", forecast.get('summary'))
                 return forecast
             else:
-                logger.warning(f"Weather API error: {response.status_code}")
+                logger.warning("Weather API error: %s", response.status_code)
                 return None
                 
         except Exception as e:
-            logger.error(f"Weather API error: {e}")
+            logger.error("Weather API error: %s", e)
             return None
     
     def _parse_forecast(self, data: Dict) -> Dict:
@@ -181,7 +184,7 @@ class WeatherAPIClient:
         forecast = self.get_weather_forecast()
         
         if forecast and forecast.get('will_rain'):
-            logger.info(f"Rain expected ({forecast['rain_probability']*100:.0f}%) - may skip irrigation")
+            logger.info("Rain expected (%.0f%%) - may skip irrigation", forecast['rain_probability']*100)
             return True
         
         return False
@@ -312,6 +315,7 @@ class HybridAIDecisionMaker:
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     print("Testing Cloud AI Client...")
     
     test_sensor_data = {
@@ -4,12 +4,16 @@ Connects existing backend to cloud.ielivate.com
 Transforms data formats and handles authentication
 """
 
+import logging
 import requests
 import json
 from datetime import datetime
 from typing import Dict, Any, Optional
+from telemetry import telemetry
 from device_identity import get_device_api_key, get_device_identity, is_device_registered, update_device_identity
 
+logger = logging.getLogger(__name__)
+
 class CloudIntegration:
     """Bridge between backend and cloud.ielivate.com"""
     
@@ -70,12 +74,13 @@ class CloudIntegration:
         }
         
         try:
-            response = requests.post(
-                endpoint,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=self.timeout
-            )
+            with telemetry.track('cloud', service='vps'):
+                response = requests.post(
+                    endpoint,
+                    json=payload,
+                    headers={"Content-Type": "application/json"},
+                    timeout=self.timeout
+                )
             
             if response.status_code == 200:
                 result = response.json()
@@ -88,9 +93,8 @@ class CloudIntegration:
                         registered=True,
                         device_name=device_name
                     )
-                    print(f"✓ Device registered successfully!")
-                    print(f"  Device ID: {self.device_id}")
-                    print(f"  API Key: {api_key[:20]}...")
+                    logger.info("Device registered successfully!")
+                    logger.info("Device ID: %s", self.device_id)
                     return {
                         "success": True,
                         "apiKey": api_key,
@@ -193,21 +197,22 @@ class CloudIntegration:
         
         for attempt in range(self.retry_attempts):
             try:
-                response = requests.post(
-                    endpoint,
-                    headers=self._get_headers(),
-                    json=cloud_data,
-                    timeout=self.timeout
-                )
+                with telemetry.track('cloud', service='vps'):
+                    response = requests.post(
+                        endpoint,
+                        headers=self._get_headers(),
+                        json=cloud_data,
+                        timeout=self.timeout
+                    )
                 
                 if response.status_code == 200:
                     result = response.json()
-                    print(f"✓ Data sent to cloud - ID: {result.get('dataId', 'N/A')}")
+                    logger.debug("Data sent to cloud - ID: %s", result.get('dataId', 'N/A'))
                     
                     # Check for pending commands
                     commands = result.get('commands', [])
                     if commands:
-                        print(f"📥 Received {len(commands)} command(s) from cloud")
+                        logger.info("Received %s command(s) from cloud", len(commands))
                     
                     return result
                     
@@ -220,7 +225,7 @@ class CloudIntegration:
                 else:
                     error_msg = f"HTTP {response.status_code}: {response.text[:200]}"
                     if attempt < self.retry_attempts - 1:
-                        print(f"⚠️  {error_msg} - Retrying...")
+                        logger.warning("%s - Retrying...", error_msg)
                         import time
                         time.sleep(self.retry_delay)
                     else:
@@ -228,7 +233,7 @@ class CloudIntegration:
                     
             except requests.exceptions.Timeout:
                 if attempt < self.retry_attempts - 1:
-                    print(f"⚠️  Request timeout - Retrying...")
+                    logger.warning("Request timeout - Retrying...")
                     import time
                     time.sleep(self.retry_delay)
                 else:
@@ -236,7 +241,7 @@ class CloudIntegration:
                     
             except requests.exceptions.ConnectionError:
                 if attempt < self.retry_attempts - 1:
-                    print(f"⚠️  Connection error - Retrying...")
+                    logger.warning("Connection error - Retrying...")
                     import time
                     time.sleep(self.retry_delay)
                 else:
@@ -263,11 +268,12 @@ class CloudIntegration:
         endpoint = f"{self.cloud_url}/api/devices/commands"
         
         try:
-            response = requests.get(
-                endpoint,
-                headers=self._get_headers(),
-                timeout=self.timeout
-            )
+            with telemetry.track('cloud', service='vps'):
+                response = requests.get(
+                    endpoint,
+                    headers=self._get_headers(),
+                    timeout=self.timeout
+                )
             
             if response.status_code == 200:
                 return response.json()
@@ -306,12 +312,13 @@ class CloudIntegration:
             payload["error"] = error
         
         try:
-            response = requests.put(
-                endpoint,
-                headers=self._get_headers(),
-                json=payload,
-                timeout=self.timeout
-            )
+            with telemetry.track('cloud', service='vps'):
+                response = requests.put(
+                    endpoint,
+                    headers=self._get_headers(),
+                    json=payload,
+                    timeout=self.timeout
+                )
             
             if response.status_code == 200:
                 return response.json()
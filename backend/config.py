@@ -5,16 +5,127 @@ API_VERSION = "1.0.0"
 
 SENSOR_READ_INTERVAL = 60
 
+# Database write pipeline: 'buffered' group-commits sensor/status/log rows,
+# 'full' commits and fsyncs each row before returning
+DB_DURABILITY = os.environ.get('DB_DURABILITY', 'buffered')
+DB_WRITE_BATCH_SIZE = 50
+DB_WRITE_FLUSH_MS = 1000
+DB_WRITE_QUEUE_SIZE = 5000
+
+# HTTP serving: 'production' runs waitress with a fixed thread pool,
+# 'dev' the Flask debug server with reloader (also: api_server.py --dev)
+SERVER_MODE = os.environ.get('SERVER_MODE', 'production')
+SERVER_HOST = os.environ.get('SERVER_HOST', '0.0.0.0')
+SERVER_PORT = int(os.environ.get('SERVER_PORT', 5000))
+# Worker threads; each open /api/stream holds one, so keep this well above
+# EVENT_MAX_CLIENTS
+SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 16))
+# Open connections and pending accept()s before new clients wait in the kernel
+SERVER_CONNECTION_LIMIT = 100
+SERVER_BACKLOG = 64
+# Requests waiting for a free thread beyond this get 503 + Retry-After
+SERVER_QUEUE_LIMIT = 64
+# Idle keep-alive connections are closed after this many seconds
+SERVER_KEEPALIVE_SECONDS = 30
+# On SIGTERM, in-flight requests get this long to finish
+SERVER_DRAIN_SECONDS = 10
+# Process start to ready-to-serve limit checked by api_server.py
+# --profile-startup (CI); sized for a Pi Zero 2
+STARTUP_BUDGET_SECONDS = float(os.environ.get('STARTUP_BUDGET_SECONDS', 5.0))
+
+# Logging (logging_setup.py): JSON lines under LOG_DIR, rotated by size;
+# stdout (journald) only gets LOG_CONSOLE_LEVEL and up. Per-module levels
+# can be overridden with LOG_MODULE_LEVELS="sensor_service=DEBUG,..."
+LOG_DIR = os.environ.get('LOG_DIR', os.path.join(os.path.dirname(__file__), 'data', 'logs'))
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+LOG_CONSOLE_LEVEL = os.environ.get('LOG_CONSOLE_LEVEL', 'WARNING').upper()
+LOG_MODULE_LEVELS = {
+    'werkzeug': 'WARNING',   # one line per request in dev mode
+    'urllib3': 'WARNING',
+    **{name.strip(): level.strip().upper()
+       for name, _, level in (item.partition('=') for item in os.environ.get('LOG_MODULE_LEVELS', '').split(','))
+       if name.strip() and level.strip()}
+}
+LOG_FILE_MAX_BYTES = 1024 * 1024
+LOG_FILE_BACKUPS = 3
+# Newest records kept in memory for /api/terminal/logs
+LOG_TAIL_SIZE = 1000
+
+# Build output of static_assets.py: asset manifest, rewritten HTML pages
+# and gzip/brotli variants of the frontend
+STATIC_BUILD_DIR = os.environ.get('STATIC_BUILD_DIR', os.path.join(os.path.dirname(__file__), 'data', 'static_build'))
+
+# Hardware status (sensors, energy, valve, CPU/RAM) is sampled in the
+# background at this rate; /api/status and friends serve the latest sample
+STATUS_SAMPLE_INTERVAL_SECONDS = 2
+
+# Host metrics (CPU, RAM, temperature, disk, network) are sampled in the
+# background; the newest METRICS_HISTORY_SIZE samples (1h) are kept in memory
+METRICS_SAMPLE_INTERVAL_SECONDS = 5
+METRICS_HISTORY_SIZE = 720
+
+# Newest sensor readings kept in memory for the live dashboard; writes
+# from other processes show up after at most SENSOR_BUFFER_POLL_SECONDS
+SENSOR_BUFFER_SIZE = 1000
+SENSOR_BUFFER_POLL_SECONDS = 2
+
+# Analytics read from a periodic copy of irrigation.db on tmpfs instead of
+# the live file the sensor loop writes to
+SNAPSHOT_DIR = os.environ.get('SNAPSHOT_DIR', '/dev/shm' if os.path.isdir('/dev/shm') else None)
+SNAPSHOT_INTERVAL_SECONDS = 60
+SNAPSHOT_PAGES_PER_STEP = 256
+# Stepwise copies restarted by concurrent commits before copying in one step
+SNAPSHOT_MAX_RESTARTS = 3
+
+# Compressed online backups of irrigation.db (schedule/rotation policy in
+# data/system_limits.json)
+BACKUP_DIR = os.environ.get('BACKUP_DIR', os.path.join(os.path.dirname(__file__), 'data', 'backups'))
+
+# Alert pipeline: an alert resolves only after its condition has stayed clear
+# for ALERT_CLEAR_SECONDS; one that recurs within ALERT_COOLDOWN_SECONDS of
+# resolving reopens the same row; occurrence counters of an ongoing alert
+# are written at most every ALERT_SYNC_SECONDS
+ALERT_CLEAR_SECONDS = 120
+ALERT_COOLDOWN_SECONDS = 1800
+ALERT_SYNC_SECONDS = 300
+
+# /api/stream (Server-Sent Events): events kept for Last-Event-ID resume,
+# idle heartbeat, concurrent connections (each holds a server thread) and
+# the reconnect delay suggested to browsers
+EVENT_REPLAY_SIZE = 500
+EVENT_HEARTBEAT_SECONDS = 15
+EVENT_MAX_CLIENTS = 8
+EVENT_RETRY_MS = 3000
+
+# /api/batch: sub-requests per batch and threads shared by all batches
+BATCH_MAX_REQUESTS = 16
+BATCH_WORKERS = 4
+
+# History/log endpoints: rows per JSON page, rows per streamed (NDJSON/CSV)
+# response, and rows fetched from SQLite per streamed chunk
+API_MAX_PAGE_SIZE = 1000
+API_MAX_STREAM_ROWS = 100000
+API_STREAM_CHUNK_ROWS = 500
+
 VALVE_GPIO_PIN = 17
 RELAY_GPIO_PIN = 27
 FLOW_SENSOR_PIN = 22
 LEAK_SENSOR_PIN = 23
 
 SOIL_MOISTURE_THRESHOLD = 30
+# Low-moisture alerts clear only once moisture is this far above the threshold
+SOIL_MOISTURE_HYSTERESIS = 5
 LEAK_DETECTION_ENABLED = True
 AUTO_IRRIGATION_ENABLED = True
 
 MAX_IRRIGATION_DURATION = 1800
+# Estimated flow while the valve is open (no flow meter fitted yet)
+WATER_FLOW_LITRES_PER_SECOND = 0.05
+# Timed irrigation jobs (irrigation_jobs.py) close the valve from a timer
+# wheel: deadlines are rounded up to the tick; one wheel turn covers
+# JOB_WHEEL_SLOTS ticks, longer timers just go round more than once
+JOB_TICK_SECONDS = 1.0
+JOB_WHEEL_SLOTS = 512
 
 API_KEY_HEADER = "X-API-Key"
 DEFAULT_API_KEY = "bayyti_demo_key_12345"
@@ -0,0 +1,44 @@
+"""
+Shared test helpers - a hand-driven clock and a throwaway database.
+pytest puts this directory on sys.path, so test modules import these
+directly: ``from conftest import FakeClock, temp_database``.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+
+import database
+
+
+class FakeClock:
+    """Callable clock that only moves when told to. ``per_second`` is the
+    clock's units per second (1000 for epoch-ms clocks); integer clocks
+    stay integers."""
+
+    def __init__(self, now=1000.0, per_second=1):
+        self.now = now
+        self.per_second = per_second
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        step = seconds * self.per_second
+        self.now += step if isinstance(self.now, float) else int(step)
+
+
+@contextmanager
+def temp_database(name='test.db'):
+    """Point database.DB_PATH at a fresh, initialised database in a temp
+    directory (yielded, for any other files a test needs) and put the
+    original back afterwards"""
+    original_path = database.DB_PATH
+    database.connection_manager.close_all()
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, name)
+        try:
+            database.init_database()
+            yield tmp
+        finally:
+            database.connection_manager.close_all()
+            database.DB_PATH = original_path
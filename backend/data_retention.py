@@ -0,0 +1,252 @@
+"""
+Data Retention Engine - keeps irrigation.db bounded on the SD card
+Raw rows older than the configured windows are deleted in small batches
+(closed days of sensor readings are first moved to the compressed archive
+in sensor_archive.py, and live on in the rollup tables), 1-minute rollups are
+downsampled away once hourly/daily buckets cover them, and freed pages are
+returned with incremental vacuum. Policy comes from data/system_limits.json.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from database import get_db, sensor_buffer, to_epoch_ms
+from sensor_archive import archive_closed_days, prune_archive, get_archive_info
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY = {
+    'enabled': True,
+    'run_interval_minutes': 60,
+    'sensor_readings_days': 30,
+    'system_status_days': 30,
+    'irrigation_logs_days': 365,
+    'resolved_alerts_days': 90,
+    'rollup_1m_days': 7,
+    'rollup_1h_days': 365,
+    'rollup_1d_days': 0,
+    'archive_enabled': True,
+    'archive_after_days': 7,
+    'archive_days': 0,
+    'delete_batch_size': 500,
+    'batch_pause_ms': 50,
+    'vacuum_pages_per_step': 256
+}
+
+# table -> (policy key, expiry predicate on the cutoff). A window of 0 days
+# keeps rows forever. Alerts age from when they were resolved, not opened;
+# rows resolved before migration 4 have no resolved_at and use timestamp.
+RAW_TABLES = {
+    'sensor_readings': ('sensor_readings_days', 'timestamp < ?'),
+    'system_status': ('system_status_days', 'timestamp < ?'),
+    'irrigation_logs': ('irrigation_logs_days', 'timestamp < ?'),
+    'alerts': ('resolved_alerts_days', 'resolved = 1 AND COALESCE(resolved_at, timestamp) < ?')
+}
+
+ROLLUP_POLICY = {
+    '1m': 'rollup_1m_days',
+    '1h': 'rollup_1h_days',
+    '1d': 'rollup_1d_days'
+}
+
+COUNTED_TABLES = ['sensor_readings', 'system_status', 'irrigation_logs', 'alerts', 'sensor_rollups']
+
+
+class RetentionEngine:
+    """Deletes expired rows and reclaims space without long write locks"""
+
+    def __init__(self, limits_file=None):
+        self.limits_file = limits_file or os.path.join(
+            os.path.dirname(__file__), 'data', 'system_limits.json')
+        self.policy = self.load_policy()
+        self.last_report = None
+        self.running = False
+        self.thread = None
+        self._wake = threading.Event()
+        self._run_lock = threading.Lock()
+
+    def load_policy(self):
+        policy = dict(DEFAULT_POLICY)
+        try:
+            with open(self.limits_file, 'r') as f:
+                policy.update(json.load(f).get('system_limits', {}).get('retention', {}))
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.warning("Retention: using default policy (%s)", e)
+        return policy
+
+    def _pause(self):
+        time.sleep(self.policy['batch_pause_ms'] / 1000.0)
+
+    def _delete_in_batches(self, table, where, params):
+        """DELETE matching rows one small transaction at a time"""
+        batch = self.policy['delete_batch_size']
+        deleted = 0
+        while True:
+            with get_db() as conn:
+                cursor = conn.execute(f'''
+                    DELETE FROM {table} WHERE rowid IN (
+                        SELECT rowid FROM {table} WHERE {where} LIMIT ?
+                    )
+                ''', (*params, batch))
+                conn.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount and table == 'sensor_readings':
+                # Don't let the live dashboard keep serving deleted rows
+                sensor_buffer.invalidate()
+            if cursor.rowcount < batch:
+                return deleted
+            self._pause()
+
+    def _delete_rollups(self, resolution, cutoff):
+        batch = self.policy['delete_batch_size']
+        deleted = 0
+        while True:
+            with get_db() as conn:
+                cursor = conn.execute('''
+                    DELETE FROM sensor_rollups
+                    WHERE (resolution, bucket, metric) IN (
+                        SELECT resolution, bucket, metric FROM sensor_rollups
+                        WHERE resolution = ? AND bucket < ? LIMIT ?
+                    )
+                ''', (resolution, cutoff, batch))
+                conn.commit()
+            deleted += cursor.rowcount
+            if cursor.rowcount < batch:
+                return deleted
+            self._pause()
+
+    def _incremental_vacuum(self):
+        """Release free pages a few at a time; returns pages released"""
+        released = 0
+        with get_db(readonly=True) as conn:
+            if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                return 0
+        while True:
+            with get_db() as conn:
+                free_before = conn.execute('PRAGMA freelist_count').fetchone()[0]
+                if not free_before:
+                    break
+                conn.execute(f"PRAGMA incremental_vacuum({self.policy['vacuum_pages_per_step']})").fetchall()
+                conn.commit()
+                free_after = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            released += free_before - free_after
+            if free_after >= free_before:
+                break
+            self._pause()
+        with get_db() as conn:
+            conn.execute('PRAGMA wal_checkpoint(PASSIVE)').fetchall()
+        return released
+
+    def get_storage_info(self):
+        with get_db(readonly=True) as conn:
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+            freelist = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            auto_vacuum = conn.execute('PRAGMA auto_vacuum').fetchone()[0]
+            row_counts = {
+                table: conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                for table in COUNTED_TABLES
+            }
+        return {
+            'db_size_bytes': page_size * page_count,
+            'free_bytes': page_size * freelist,
+            'auto_vacuum': {0: 'none', 1: 'full', 2: 'incremental'}.get(auto_vacuum, auto_vacuum),
+            'row_counts': row_counts,
+            'archive': get_archive_info()
+        }
+
+    def run_once(self, full_vacuum=False):
+        """Apply the retention policy once and return a report"""
+        with self._run_lock:
+            started = time.time()
+            before = self.get_storage_info()
+            now = datetime.utcnow()
+            deleted = {}
+
+            archived = {}
+            if self.policy.get('archive_enabled', True):
+                archived = archive_closed_days(self.policy['archive_after_days'])
+                prune_archive(self.policy.get('archive_days', 0))
+
+            for table, (key, where) in RAW_TABLES.items():
+                days = self.policy.get(key, 0)
+                if days:
+                    cutoff = to_epoch_ms(now - timedelta(days=days))
+                    deleted[table] = self._delete_in_batches(table, where, (cutoff,))
+
+            for resolution, key in ROLLUP_POLICY.items():
+                days = self.policy.get(key, 0)
+                if days:
+                    cutoff = to_epoch_ms(now - timedelta(days=days))
+                    deleted[f'sensor_rollups_{resolution}'] = self._delete_rollups(resolution, cutoff)
+
+            if full_vacuum:
+                # One-off: converts older files to auto_vacuum=INCREMENTAL.
+                # Holds the write lock for the whole rewrite.
+                with get_db() as conn:
+                    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                    conn.execute('VACUUM')
+                released_pages = None
+            else:
+                released_pages = self._incremental_vacuum()
+
+            after = self.get_storage_info()
+            self.last_report = {
+                'timestamp': datetime.now().isoformat(),
+                'duration_seconds': round(time.time() - started, 2),
+                'rows_archived': archived,
+                'rows_deleted': deleted,
+                'pages_released': released_pages,
+                'reclaimed_bytes': max(0, before['db_size_bytes'] - after['db_size_bytes']),
+                'before': before,
+                'after': after
+            }
+            logger.info("Retention: archived %s readings, deleted %s rows, reclaimed %s bytes",
+                        sum(archived.values()), sum(deleted.values()),
+                        self.last_report['reclaimed_bytes'])
+            return self.last_report
+
+    def start(self):
+        """Run the policy on a background schedule"""
+        if self.running or not self.policy.get('enabled', True):
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='retention', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    def trigger(self):
+        """Ask the background thread to run now"""
+        self._wake.set()
+
+    def _run(self):
+        interval = self.policy['run_interval_minutes'] * 60
+        # First pass shortly after startup, then on the configured interval
+        self._wake.wait(60)
+        while self.running:
+            self._wake.clear()
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error("Retention run failed: %s", e)
+            self._wake.wait(interval)
+
+    def get_status(self):
+        return {
+            'enabled': self.policy.get('enabled', True),
+            'running': self.running,
+            'policy': self.policy,
+            'last_run': self.last_report
+        }
+
+
+if __name__ == '__main__':
+    from database import init_database
+    init_database()
+    engine = RetentionEngine()
+    print(json.dumps(engine.run_once(), indent=2))
@@ -1,18 +1,157 @@
 import sqlite3
 import os
-from datetime import datetime
+import re
+import csv
+import json
+import logging
+import time
+import queue
+import atexit
+import threading
+import weakref
+from datetime import datetime, timezone
 from contextlib import contextmanager
+from array import array
+from telemetry import telemetry
+from config import (DB_DURABILITY, DB_WRITE_BATCH_SIZE, DB_WRITE_FLUSH_MS, DB_WRITE_QUEUE_SIZE,
+                    SENSOR_BUFFER_SIZE, SENSOR_BUFFER_POLL_SECONDS)
 
-DB_PATH = os.path.join(os.path.dirname(__file__), 'irrigation.db')
+logger = logging.getLogger(__name__)
+
+DB_PATH = os.environ.get('DB_PATH', os.path.join(os.path.dirname(__file__), 'irrigation.db'))
+
+# Pragmas applied to every pooled connection. WAL lets dashboard readers run
+# while the sensor loop writes; NORMAL sync is durable across app crashes and
+# only risks the last transaction on power loss.
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'cache_size': -4000,        # KiB (negative) -> ~4 MB page cache per connection
+    'mmap_size': 33554432,      # 32 MB memory-mapped I/O
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,       # ms to wait on a locked database
+    'journal_size_limit': 4194304,  # truncate the WAL back to 4 MB after checkpoints
+}
+
+class ConnectionManager:
+    """Per-thread persistent SQLite connections in WAL mode.
+
+    Each thread keeps one read-write and one read-only connection open for its
+    lifetime, so callers no longer pay connect/close on every query. Read-only
+    handles set ``query_only`` and never take the write lock.
+    """
+
+    def __init__(self, pragmas=None):
+        self.pragmas = dict(SQLITE_PRAGMAS if pragmas is None else pragmas)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}  # connection -> weakref to the owning thread
+        self._wal_paths = set()
+
+    def _prune(self):
+        """Close connections whose owning thread has exited (caller holds _lock)"""
+        for conn, owner in list(self._connections.items()):
+            thread = owner()
+            if thread is None or not thread.is_alive():
+                del self._connections[conn]
+                conn.close()
+
+    def _open(self, path, readonly):
+        conn = sqlite3.connect(path, timeout=self.pragmas.get('busy_timeout', 5000) / 1000.0,
+                               check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        with self._lock:
+            if path not in self._wal_paths:
+                # Both are persistent in the file, so set them once per path.
+                # auto_vacuum only sticks on a brand-new file (before WAL
+                # writes the header); it lets the retention engine return
+                # free pages with PRAGMA incremental_vacuum.
+                cursor.execute('PRAGMA auto_vacuum=INCREMENTAL')
+                cursor.execute('PRAGMA journal_mode=WAL')
+                self._wal_paths.add(path)
+
+        for name, value in self.pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        if readonly:
+            cursor.execute('PRAGMA query_only=ON')
+        cursor.close()
+
+        with self._lock:
+            self._prune()
+            self._connections[conn] = weakref.ref(threading.current_thread())
+        return conn
+
+    def connection(self, readonly=False):
+        """Return this thread's connection for DB_PATH, opening it on first use"""
+        path = DB_PATH
+        key = (path, readonly)
+        cache = getattr(self._local, 'connections', None)
+        if cache is None:
+            cache = self._local.connections = {}
+
+        conn = cache.get(key)
+        if conn is None:
+            conn = cache[key] = self._open(path, readonly)
+        return conn
+
+    def enter(self, conn):
+        """Track nesting of get_db() on one connection; returns the prior depth"""
+        depths = getattr(self._local, 'depths', None)
+        if depths is None:
+            depths = self._local.depths = {}
+        depth = depths.get(id(conn), 0)
+        depths[id(conn)] = depth + 1
+        return depth
+
+    def leave(self, conn):
+        depths = getattr(self._local, 'depths', {})
+        depth = depths.pop(id(conn), 1) - 1
+        if depth:
+            depths[id(conn)] = depth
+
+    def close_thread(self):
+        """Close the calling thread's connections"""
+        cache = getattr(self._local, 'connections', None) or {}
+        with self._lock:
+            for conn in cache.values():
+                self._connections.pop(conn, None)
+                conn.close()
+        cache.clear()
+
+    def close_all(self):
+        """Close every connection opened by the manager (shutdown, restore)"""
+        with self._lock:
+            connections = list(self._connections)
+            self._connections = {}
+            self._wal_paths.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+connection_manager = ConnectionManager()
 
 @contextmanager
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
+def get_db(readonly=False):
+    """Borrow the calling thread's pooled connection.
+
+    Callers still commit explicitly; anything left uncommitted is rolled back
+    on exit so a forgotten commit never holds the write lock.
+    """
+    conn = connection_manager.connection(readonly)
+    telemetry.inc('db_queries_total', mode='read' if readonly else 'write')
+    depth = connection_manager.enter(conn)
     try:
         yield conn
     finally:
-        conn.close()
+        # Nested get_db() calls share the connection; only the outermost
+        # block may discard an open transaction.
+        connection_manager.leave(conn)
+        if depth == 0 and conn.in_transaction:
+            conn.rollback()
 
 def init_database():
     with get_db() as conn:
@@ -88,38 +227,778 @@ def init_database():
             )
         ''')
         
-        conn.commit()
-        print("Database initialized successfully")
-
-def save_sensor_reading(soil_moisture, temperature, humidity, flow_rate, pressure):
-    with get_db() as conn:
-        cursor = conn.cursor()
+        # min/max/sum/count per metric per time bucket, maintained as readings
+        # are written so summaries and long-range charts never scan raw rows
         cursor.execute('''
-            INSERT INTO sensor_readings (soil_moisture, temperature, humidity, flow_rate, pressure)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (soil_moisture, temperature, humidity, flow_rate, pressure))
+            CREATE TABLE IF NOT EXISTS sensor_rollups (
+                resolution TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                sum REAL NOT NULL,
+                min REAL,
+                max REAL,
+                PRIMARY KEY (resolution, bucket, metric)
+            ) WITHOUT ROWID
+        ''')
+        
         conn.commit()
+        
+        run_migrations(conn)
+        
+        if cursor.execute('SELECT 1 FROM sensor_rollups LIMIT 1').fetchone() is None:
+            rebuild_sensor_rollups(conn)
+        
+        sensor_buffer.load()
+        
+        logger.info("Database initialized successfully")
 
-def save_system_status(battery_level, solar_status, leak_detected, valve_status):
-    with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO system_status (battery_level, solar_status, leak_detected, valve_status)
-            VALUES (?, ?, ?, ?)
-        ''', (battery_level, solar_status, leak_detected, valve_status))
-        conn.commit()
+def _add_column(conn, table, column, definition):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists"""
+    columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+    if column not in columns:
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+
+def _migrate_zone_columns(conn):
+    _add_column(conn, 'sensor_readings', 'zone_id', 'INTEGER NOT NULL DEFAULT 1')
+    _add_column(conn, 'irrigation_logs', 'zone_id', 'INTEGER NOT NULL DEFAULT 1')
+    _add_column(conn, 'irrigation_logs', 'status', "TEXT DEFAULT 'completed'")
+    _add_column(conn, 'irrigation_logs', 'schedule_id', 'INTEGER')
+    _add_column(conn, 'schedules', 'zone_id', 'INTEGER NOT NULL DEFAULT 1')
+    # /api/irrigation/tasks and the simulator read irrigation_schedules; keep
+    # a single source of truth with /api/schedules by exposing it as a view
+    conn.execute('''
+        CREATE VIEW IF NOT EXISTS irrigation_schedules AS
+        SELECT id, name, start_time, duration, days_of_week, zone_id, enabled,
+               soil_threshold, created_at
+        FROM schedules
+    ''')
+
+def _migrate_time_indexes(conn):
+    for statement in [
+        # covering for "zones below threshold in a time range"
+        'CREATE INDEX IF NOT EXISTS idx_sensor_readings_ts ON sensor_readings (timestamp, zone_id, soil_moisture)',
+        'CREATE INDEX IF NOT EXISTS idx_sensor_readings_zone_ts ON sensor_readings (zone_id, timestamp)',
+        # covering for daily irrigation totals
+        'CREATE INDEX IF NOT EXISTS idx_irrigation_logs_ts ON irrigation_logs (timestamp, water_used)',
+        'CREATE INDEX IF NOT EXISTS idx_irrigation_logs_zone_ts ON irrigation_logs (zone_id, timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_system_status_ts ON system_status (timestamp)',
+        'CREATE INDEX IF NOT EXISTS idx_alerts_resolved_ts ON alerts (resolved, timestamp)'
+    ]:
+        conn.execute(statement)
+
+# SQL for "now" in epoch milliseconds; column default for time-series rows
+EPOCH_MS_NOW = "(CAST(ROUND((julianday('now') - 2440587.5) * 86400000) AS INTEGER))"
+
+# Converts the old text timestamps ('YYYY-MM-DD HH:MM:SS' from
+# CURRENT_TIMESTAMP, or ISO strings written by the simulator) to epoch ms
+_TEXT_TO_EPOCH_MS = "CAST(ROUND((julianday({column}) - 2440587.5) * 86400000) AS INTEGER)"
+
+# Time-series tables after migration 3: column definitions after the
+# id/timestamp pair, which every one of them shares
+_EPOCH_MS_TABLES = {
+    'sensor_readings': """
+        soil_moisture REAL,
+        temperature REAL,
+        humidity REAL,
+        flow_rate REAL,
+        pressure REAL,
+        zone_id INTEGER NOT NULL DEFAULT 1""",
+    'system_status': """
+        battery_level REAL,
+        solar_status TEXT,
+        leak_detected BOOLEAN,
+        valve_status TEXT""",
+    'irrigation_logs': """
+        action TEXT,
+        duration INTEGER,
+        water_used REAL,
+        trigger_type TEXT,
+        notes TEXT,
+        zone_id INTEGER NOT NULL DEFAULT 1,
+        status TEXT DEFAULT 'completed',
+        schedule_id INTEGER""",
+    'alerts': """
+        alert_type TEXT,
+        severity TEXT,
+        message TEXT,
+        resolved BOOLEAN DEFAULT 0"""
+}
+
+def _migrate_epoch_ms(conn):
+    """Rebuild the time-series tables with INTEGER epoch-ms timestamps.
+
+    Integer keys are half the size of the text ones in every index, compare
+    without collation and need no parsing on the hot paths. The *_compat
+    views keep the old text column for ad-hoc SQL and external scripts.
+    """
+    for table, columns in _EPOCH_MS_TABLES.items():
+        names = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')
+                 if row[1] not in ('id', 'timestamp')]
+        conn.execute(f'DROP TABLE IF EXISTS {table}_new')
+        conn.execute(f'''
+            CREATE TABLE {table}_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp INTEGER NOT NULL DEFAULT {EPOCH_MS_NOW},{columns}
+            )
+        ''')
+        conn.execute(f'''
+            INSERT INTO {table}_new (id, timestamp, {', '.join(names)})
+            SELECT id, COALESCE({_TEXT_TO_EPOCH_MS.format(column='timestamp')}, 0), {', '.join(names)}
+            FROM {table}
+        ''')
+        conn.execute(f'DROP TABLE {table}')
+        conn.execute(f'ALTER TABLE {table}_new RENAME TO {table}')
+        conn.execute(f'''
+            CREATE VIEW IF NOT EXISTS {table}_compat AS
+            SELECT id, datetime(timestamp / 1000, 'unixepoch') AS timestamp, {', '.join(names)}
+            FROM {table}
+        ''')
+
+    conn.execute('''
+        CREATE TABLE sensor_rollups_new (
+            resolution TEXT NOT NULL,
+            bucket INTEGER NOT NULL,
+            metric TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            sum REAL NOT NULL,
+            min REAL,
+            max REAL,
+            PRIMARY KEY (resolution, bucket, metric)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute(f'''
+        INSERT INTO sensor_rollups_new
+        SELECT resolution, {_TEXT_TO_EPOCH_MS.format(column='bucket')}, metric, count, sum, min, max
+        FROM sensor_rollups
+    ''')
+    conn.execute('DROP TABLE sensor_rollups')
+    conn.execute('ALTER TABLE sensor_rollups_new RENAME TO sensor_rollups')
+
+    _migrate_time_indexes(conn)
+
+def _migrate_alert_state(conn):
+    """Columns for alert_manager: one row per alert episode, not per event"""
+    _add_column(conn, 'alerts', 'fingerprint', 'TEXT')
+    _add_column(conn, 'alerts', 'zone_id', 'INTEGER')
+    _add_column(conn, 'alerts', 'state', "TEXT NOT NULL DEFAULT 'open'")
+    _add_column(conn, 'alerts', 'occurrences', 'INTEGER NOT NULL DEFAULT 1')
+    _add_column(conn, 'alerts', 'last_seen', 'INTEGER')
+    _add_column(conn, 'alerts', 'resolved_at', 'INTEGER')
+    conn.execute('''
+        UPDATE alerts SET
+            fingerprint = alert_type || '::' || message,
+            state = CASE WHEN resolved THEN 'resolved' ELSE 'open' END,
+            last_seen = timestamp
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_alerts_fingerprint ON alerts (fingerprint, resolved)')
+
+# table -> indexed text column; each gets an external-content FTS5 index
+# named <table>_fts whose rowid is the row's id
+SEARCH_SOURCES = {
+    'irrigation_logs': 'notes',
+    'alerts': 'message'
+}
+
+def _migrate_search_index(conn):
+    """FTS5 indexes over log notes and alert messages, kept current by triggers"""
+    for table, column in SEARCH_SOURCES.items():
+        fts = f'{table}_fts'
+        conn.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                {column}, content='{table}', content_rowid='id', tokenize='porter unicode61'
+            )
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+                INSERT INTO {fts} (rowid, {column}) VALUES (new.id, new.{column});
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+            END
+        ''')
+        # alert_manager rewrites message on every sync; only re-index real changes
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {fts}_update AFTER UPDATE OF {column} ON {table}
+            WHEN old.{column} IS NOT new.{column} BEGIN
+                INSERT INTO {fts} ({fts}, rowid, {column}) VALUES ('delete', old.id, old.{column});
+                INSERT INTO {fts} (rowid, {column}) VALUES (new.id, new.{column});
+            END
+        ''')
+        conn.execute(f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')")
+
+def _migrate_irrigation_jobs(conn):
+    """Timed valve openings run by irrigation_jobs; 'running' rows left over
+    after a crash or power cut are reconciled at startup"""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS irrigation_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at INTEGER NOT NULL,
+            deadline INTEGER NOT NULL,
+            duration INTEGER NOT NULL,
+            trigger_type TEXT,
+            zone_id INTEGER NOT NULL DEFAULT 1,
+            state TEXT NOT NULL DEFAULT 'running',
+            finished_at INTEGER,
+            water_used REAL
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_irrigation_jobs_state ON irrigation_jobs (state, created_at)')
+
+def _migrate_alert_fingerprints(conn):
+    """Re-key alerts with alert_manager.fingerprint() (numbers masked).
+
+    Migration 4 used alert_type::message verbatim, so legacy open alerts
+    never matched new reports: they neither deduplicated nor resolved.
+    Open rows that now share a fingerprint are folded into the oldest one.
+    """
+    # Imported here: alert_manager itself imports this module
+    from alert_manager import fingerprint
+    rows = conn.execute('''
+        SELECT id, alert_type, message, zone_id, resolved, occurrences, last_seen
+        FROM alerts ORDER BY id
+    ''').fetchall()
+    keys = {row['id']: fingerprint(row['alert_type'], row['message'] or '', row['zone_id'])
+            for row in rows}
+    conn.executemany('UPDATE alerts SET fingerprint = ? WHERE id = ?',
+                     [(key, alert_id) for alert_id, key in keys.items()])
+
+    open_rows = {}
+    for row in rows:
+        if not row['resolved']:
+            open_rows.setdefault(keys[row['id']], []).append(row)
+    for duplicates in open_rows.values():
+        if len(duplicates) < 2:
+            continue
+        keep, newest = duplicates[0], duplicates[-1]
+        conn.execute('''
+            UPDATE alerts SET state = 'ongoing', occurrences = ?, last_seen = ?, message = ?
+            WHERE id = ?
+        ''', (sum(row['occurrences'] or 1 for row in duplicates),
+              max(row['last_seen'] or 0 for row in duplicates), newest['message'], keep['id']))
+        conn.executemany('DELETE FROM alerts WHERE id = ?',
+                         [(row['id'],) for row in duplicates[1:]])
+
+# (version, description, migrate(conn)). Applied in order inside a transaction;
+# PRAGMA user_version records the last one applied. Never edit or reorder a
+# released migration - append a new one.
+SCHEMA_MIGRATIONS = [
+    (1, 'zone-aware columns and irrigation_schedules', _migrate_zone_columns),
+    (2, 'time-range indexes', _migrate_time_indexes),
+    (3, 'epoch-millisecond timestamps', _migrate_epoch_ms),
+    (4, 'alert fingerprints and state', _migrate_alert_state),
+    (5, 'full-text search over log notes and alert messages', _migrate_search_index),
+    (6, 'irrigation job table', _migrate_irrigation_jobs),
+    (7, 'alert fingerprints with numbers masked', _migrate_alert_fingerprints)
+]
+
+def get_schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+def run_migrations(conn):
+    """Bring the schema up to the latest SCHEMA_MIGRATIONS version"""
+    current = get_schema_version(conn)
+    for version, description, migrate in SCHEMA_MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute('BEGIN')
+            migrate(conn)
+            conn.execute(f'PRAGMA user_version = {version}')
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        logger.info("Database migrated to v%s: %s", version, description)
+
+# Insert statements for the tables that accept buffered (group-commit) writes.
+# Timestamps are captured when a record is submitted, not when it is flushed.
+_INSERT_SQL = {
+    'sensor_readings': '''
+        INSERT INTO sensor_readings (timestamp, soil_moisture, temperature, humidity, flow_rate, pressure, zone_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''',
+    'system_status': '''
+        INSERT INTO system_status (timestamp, battery_level, solar_status, leak_detected, valve_status)
+        VALUES (?, ?, ?, ?, ?)
+    ''',
+    'irrigation_logs': '''
+        INSERT INTO irrigation_logs (timestamp, action, duration, water_used, trigger_type, notes, zone_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    '''
+}
+
+# synchronous pragma used for writes in each durability mode
+DURABILITY_MODES = {
+    'buffered': 'NORMAL',   # queued rows, group-committed by the writer thread
+    'full': 'FULL'          # every write commits and fsyncs before returning
+}
+
+# Time-series timestamps are stored as INTEGER milliseconds since the Unix
+# epoch (UTC). Convert to text only at the edges: ms_to_iso() for API
+# responses, to_epoch_ms() for incoming datetimes.
+def to_epoch_ms(dt):
+    """Epoch milliseconds for a datetime; naive values are taken as UTC"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(round(dt.timestamp() * 1000))
+
+def ms_to_iso(ms):
+    """ISO 8601 UTC text ('2024-05-01T12:00:00.000Z') for an epoch-ms timestamp"""
+    if ms is None:
+        return None
+    dt = datetime.fromtimestamp(ms / 1000.0, timezone.utc)
+    return dt.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+def now_ms():
+    return time.time_ns() // 1000000
+
+NAN = float('nan')
+
+SENSOR_METRICS = ('soil_moisture', 'temperature', 'humidity', 'flow_rate', 'pressure')
+
+# Rollup resolution -> bucket width in milliseconds (days are UTC days)
+ROLLUP_RESOLUTIONS = {
+    '1m': 60 * 1000,
+    '1h': 60 * 60 * 1000,
+    '1d': 24 * 60 * 60 * 1000
+}
+
+_ROLLUP_UPSERT_SQL = '''
+    INSERT INTO sensor_rollups (resolution, bucket, metric, count, sum, min, max)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT (resolution, bucket, metric) DO UPDATE SET
+        count = count + excluded.count,
+        sum = sum + excluded.sum,
+        min = MIN(min, excluded.min),
+        max = MAX(max, excluded.max)
+'''
+
+def rollup_bucket(timestamp, resolution):
+    """Start (epoch ms) of the ``resolution`` bucket containing ``timestamp``"""
+    width = ROLLUP_RESOLUTIONS[resolution]
+    return timestamp - timestamp % width
+
+def _update_sensor_rollups(conn, rows):
+    """Fold sensor_readings rows (timestamp first, then SENSOR_METRICS) into the rollups"""
+    buckets = {}
+    for row in rows:
+        timestamp = row[0]
+        for resolution in ROLLUP_RESOLUTIONS:
+            bucket = rollup_bucket(timestamp, resolution)
+            for metric, value in zip(SENSOR_METRICS, row[1:]):
+                if value is None:
+                    continue
+                agg = buckets.get((resolution, bucket, metric))
+                if agg is None:
+                    buckets[(resolution, bucket, metric)] = [1, value, value, value]
+                else:
+                    agg[0] += 1
+                    agg[1] += value
+                    agg[2] = min(agg[2], value)
+                    agg[3] = max(agg[3], value)
+
+    conn.executemany(_ROLLUP_UPSERT_SQL, [
+        (resolution, bucket, metric, count, total, low, high)
+        for (resolution, bucket, metric), (count, total, low, high) in buckets.items()
+    ])
+
+def rebuild_sensor_rollups(conn):
+    """Recompute all rollups from raw sensor_readings (first start, repairs)"""
+    conn.execute('DELETE FROM sensor_rollups')
+    for resolution, width in ROLLUP_RESOLUTIONS.items():
+        for metric in SENSOR_METRICS:
+            conn.execute(f'''
+                INSERT INTO sensor_rollups (resolution, bucket, metric, count, sum, min, max)
+                SELECT ?, (timestamp / {width}) * {width}, ?,
+                       COUNT({metric}), SUM({metric}), MIN({metric}), MAX({metric})
+                FROM sensor_readings
+                WHERE {metric} IS NOT NULL
+                GROUP BY timestamp / {width}
+            ''', (resolution, metric))
+    conn.commit()
+
+class SensorRingBuffer:
+    """The newest sensor readings, held in fixed-capacity arrays.
+
+    One array per column (ids, timestamps, zones, each metric) used as a
+    ring in (timestamp, id) order, so the live dashboard's "last N
+    readings" never touches SQLite. Rows are appended after their
+    transaction commits. A row older than the newest one buffered, or
+    invalidate() after an in-process delete, makes the buffer reload itself
+    from the database on the next read. Writes from anywhere else (another
+    process, raw SQL) are noticed through PRAGMA data_version, polled at
+    most every SENSOR_BUFFER_POLL_SECONDS.
+    """
+
+    COLUMNS = ('id', 'timestamp') + SENSOR_METRICS + ('zone_id',)
+
+    def __init__(self, capacity=SENSOR_BUFFER_SIZE):
+        self.capacity = capacity
+        self._ids = array('q', [0]) * capacity
+        self._timestamps = array('q', [0]) * capacity
+        self._zones = array('q', [0]) * capacity
+        self._metrics = {metric: array('d', [0.0]) * capacity for metric in SENSOR_METRICS}
+        self._next = 0
+        self._size = 0
+        self.last_id = None  # highest id in the table when last in sync
+        self._stale = False
+        self._lock = threading.Lock()
+        # Own connection for data_version: the value is per connection, so
+        # it has to be read on the same one every time
+        self._version_conn = None
+        self._version_path = None
+        self._version = None
+        self._next_poll = 0.0
+
+    def _append(self, row_id, row):
+        """row is (timestamp, *SENSOR_METRICS, zone_id); caller holds _lock"""
+        i = self._next
+        self._ids[i] = row_id
+        self._timestamps[i] = row[0]
+        for metric, value in zip(SENSOR_METRICS, row[1:]):
+            self._metrics[metric][i] = NAN if value is None else value
+        self._zones[i] = row[-1]
+        self._next = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def extend(self, rows, last_id):
+        """Add freshly committed rows; their ids end at ``last_id``"""
+        with self._lock:
+            if self.last_id is None:
+                return  # not loaded yet; load() will pick these rows up
+            first_id = last_id - len(rows) + 1
+            if first_id > self.last_id + 1:
+                self._stale = True  # ids in between were written elsewhere
+            for offset, row in enumerate(rows):
+                if first_id + offset <= self.last_id:
+                    continue
+                if self._size and row[0] < self._timestamps[self._next - 1]:
+                    self._stale = True  # back-filled row; re-sort via load()
+                self._append(first_id + offset, row)
+            self.last_id = max(self.last_id, last_id)
+
+    def load(self):
+        """Fill the buffer with the newest rows in SQLite"""
+        with get_db(readonly=True) as conn:
+            rows = conn.execute(f'''
+                SELECT {', '.join(self.COLUMNS)} FROM sensor_readings
+                ORDER BY timestamp DESC, id DESC LIMIT ?
+            ''', (self.capacity,)).fetchall()
+            last_id = conn.execute('SELECT MAX(id) FROM sensor_readings').fetchone()[0] or 0
+        with self._lock:
+            self._next = self._size = 0
+            for row in reversed(rows):
+                self._append(row[0], tuple(row)[1:])
+            self.last_id = last_id
+            self._stale = False
+
+    def invalidate(self):
+        """Reload on the next read (rows were deleted or rewritten in place)"""
+        with self._lock:
+            self._stale = True
+
+    def _data_version(self):
+        """PRAGMA data_version of the buffer's own connection; caller holds _lock"""
+        if self._version_path != DB_PATH:
+            if self._version_conn is not None:
+                self._version_conn.close()
+            self._version_conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+            self._version_path = DB_PATH
+            self._version = None
+        return self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def _changed_elsewhere(self):
+        """True if rows may have been added behind extend()'s back"""
+        with self._lock:
+            if self._stale or self.last_id is None:
+                return True
+            now = time.monotonic()
+            if now < self._next_poll:
+                return False
+            self._next_poll = now + SENSOR_BUFFER_POLL_SECONDS
+            try:
+                version = self._data_version()
+            except sqlite3.Error:
+                return True
+            # Also bumped by this process's other pooled connections, so a
+            # change only means "compare ids", not "reload"
+            if version == self._version:
+                return False
+            self._version = version
+            known = self.last_id
+        with get_db(readonly=True) as conn:
+            newest = conn.execute('SELECT MAX(id) FROM sensor_readings').fetchone()[0] or 0
+        return newest != known
+
+    def recent(self, limit):
+        """Newest ``limit`` rows as dicts, or None if the buffer can't answer"""
+        if self._changed_elsewhere():
+            self.load()
 
-def log_irrigation_event(action, duration=0, water_used=0, trigger_type='manual', notes=''):
+        with self._lock:
+            if limit > self._size:
+                return None
+            rows = []
+            for n in range(1, limit + 1):
+                i = (self._next - n) % self.capacity
+                row = {'id': self._ids[i], 'timestamp': self._timestamps[i]}
+                for metric, values in self._metrics.items():
+                    value = values[i]
+                    row[metric] = None if value != value else value
+                row['zone_id'] = self._zones[i]
+                rows.append(row)
+            return rows
+
+sensor_buffer = SensorRingBuffer()
+
+def _write_rows(rows_by_table, synchronous='NORMAL'):
+    """Insert rows for several tables in a single transaction"""
+    sensor_rows = None
+    # The pooled connection is shared with every other get_db() on this
+    # thread, so a non-default synchronous only lasts for this batch
+    default = str(connection_manager.pragmas['synchronous'])
     with get_db() as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-            INSERT INTO irrigation_logs (action, duration, water_used, trigger_type, notes)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (action, duration, water_used, trigger_type, notes))
-        conn.commit()
+        if synchronous != default:
+            conn.execute(f'PRAGMA synchronous={synchronous}')
+        try:
+            for table, rows in rows_by_table.items():
+                if rows:
+                    conn.executemany(_INSERT_SQL[table], rows)
+                    if table == 'sensor_readings':
+                        # AUTOINCREMENT ids of one executemany are consecutive
+                        sensor_rows = (rows, conn.execute('SELECT last_insert_rowid()').fetchone()[0])
+                        _update_sensor_rollups(conn, rows)
+            conn.commit()
+        finally:
+            if synchronous != default:
+                conn.execute(f'PRAGMA synchronous={default}')
+    if sensor_rows:
+        sensor_buffer.extend(*sensor_rows)
+
+class BufferedWriter:
+    """Group-commit writer for sensor, status and irrigation log rows.
+
+    Records are accepted on a bounded queue and written by a background
+    thread with executemany() in one transaction every ``batch_size`` rows or
+    every ``flush_interval_ms``, whichever comes first. One fsync then covers
+    the whole batch instead of one per row.
+    """
+
+    def __init__(self, batch_size=DB_WRITE_BATCH_SIZE, flush_interval_ms=DB_WRITE_FLUSH_MS,
+                 max_queue=DB_WRITE_QUEUE_SIZE, durability=DB_DURABILITY):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.thread = None
+        self.running = False
+        self._start_lock = threading.Lock()
+        self.rows_written = 0
+        self.batches_written = 0
+        self.set_durability(durability)
+
+    def set_durability(self, mode):
+        if mode not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {mode}")
+        self.durability = mode
+
+    def start(self):
+        with self._start_lock:
+            if self.running:
+                return
+            self.running = True
+            self.thread = threading.Thread(target=self._run, name='db-writer', daemon=True)
+            self.thread.start()
+
+    def submit(self, table, row):
+        """Queue a row for ``table``; written synchronously in 'full' mode"""
+        if self.durability == 'full':
+            _write_rows({table: [row]}, DURABILITY_MODES['full'])
+            return
+
+        self.start()
+        try:
+            self.queue.put((table, row), timeout=1.0)
+        except queue.Full:
+            # Writer can't keep up (e.g. DB locked for long); don't lose the row
+            logger.warning("DB writer queue full - writing row synchronously")
+            _write_rows({table: [row]}, DURABILITY_MODES[self.durability])
+
+    def flush(self, timeout=5.0):
+        """Block until everything queued so far has been committed"""
+        if not self.running:
+            return True
+        done = threading.Event()
+        self.queue.put((None, done))
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Flush pending rows and stop the writer thread (call on shutdown)"""
+        if not self.running:
+            return
+        self.flush(timeout)
+        self.running = False
+        self.queue.put((None, None))
+        self.thread.join(timeout)
+
+    def _run(self):
+        pending = {}
+        pending_count = 0
+        waiters = []
+        deadline = None
+
+        while True:
+            timeout = None if deadline is None else max(0, deadline - time.monotonic())
+            try:
+                table, row = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                table, row = None, None
+            else:
+                if table is not None:
+                    pending.setdefault(table, []).append(row)
+                    pending_count += 1
+                    if deadline is None:
+                        deadline = time.monotonic() + self.flush_interval
+                elif row is not None:
+                    waiters.append(row)
+
+            stopping = table is None and row is None and not self.running
+            due = deadline is not None and time.monotonic() >= deadline
+            if pending_count and (pending_count >= self.batch_size or due or waiters or stopping):
+                try:
+                    _write_rows(pending, DURABILITY_MODES[self.durability])
+                    self.rows_written += pending_count
+                    self.batches_written += 1
+                    pending, pending_count, deadline = {}, 0, None
+                except sqlite3.OperationalError as e:
+                    # Usually "database is locked"; keep the rows and retry
+                    logger.warning("DB writer: batch deferred (%s)", e)
+                    deadline = time.monotonic() + self.flush_interval
+                except Exception as e:
+                    logger.error("DB writer: dropped batch of %s rows: %s", pending_count, e)
+                    pending, pending_count, deadline = {}, 0, None
+            elif not pending_count:
+                deadline = None
+
+            if not pending_count:
+                for waiter in waiters:
+                    waiter.set()
+                waiters = []
+            if stopping:
+                connection_manager.close_thread()
+                break
+
+    def get_stats(self):
+        return {
+            'durability': self.durability,
+            'queued': self.queue.qsize(),
+            'rows_written': self.rows_written,
+            'batches_written': self.batches_written
+        }
+
+write_buffer = BufferedWriter()
+atexit.register(write_buffer.close)
+
+def flush_writes(timeout=5.0):
+    """Commit all buffered rows now (shutdown, or before reading them back)"""
+    return write_buffer.flush(timeout)
+
+def _write(table, row, buffered):
+    if buffered:
+        write_buffer.submit(table, row)
+    else:
+        _write_rows({table: [row]}, DURABILITY_MODES[write_buffer.durability])
+
+def save_sensor_reading(soil_moisture, temperature, humidity, flow_rate, pressure,
+                        zone_id=1, buffered=False):
+    _write('sensor_readings',
+           (now_ms(), soil_moisture, temperature, humidity, flow_rate, pressure, zone_id),
+           buffered)
+
+def save_system_status(battery_level, solar_status, leak_detected, valve_status, buffered=False):
+    _write('system_status',
+           (now_ms(), battery_level, solar_status, leak_detected, valve_status),
+           buffered)
+
+def log_irrigation_event(action, duration=0, water_used=0, trigger_type='manual', notes='',
+                         zone_id=1, buffered=False):
+    _write('irrigation_logs',
+           (now_ms(), action, duration, water_used, trigger_type, notes, zone_id),
+           buffered)
+
+def parse_timestamp(value):
+    """Epoch ms from epoch ms (int or digit string), ISO text or a datetime; None is now"""
+    if value is None or value == '':
+        return now_ms()
+    if isinstance(value, datetime):
+        return to_epoch_ms(value)
+    if isinstance(value, (int, float)):
+        return int(value)
+    if value.isdigit():
+        return int(value)
+    return to_epoch_ms(datetime.fromisoformat(value.replace('Z', '+00:00')))
+
+def _number(value, cast=float, default=None):
+    """CSV/NDJSON field -> number; blank fields become ``default``"""
+    if value is None or value == '':
+        return default
+    return cast(value)
+
+def _sensor_row(reading):
+    return (parse_timestamp(reading.get('timestamp')),
+            *(_number(reading.get(metric)) for metric in SENSOR_METRICS),
+            _number(reading.get('zone_id'), int, 1))
+
+def _irrigation_row(event):
+    return (parse_timestamp(event.get('timestamp')), event.get('action'),
+            _number(event.get('duration'), int, 0), _number(event.get('water_used'), float, 0),
+            event.get('trigger_type') or 'manual', event.get('notes') or '',
+            _number(event.get('zone_id'), int, 1))
+
+BULK_ROW_BUILDERS = {
+    'sensor_readings': _sensor_row,
+    'irrigation_logs': _irrigation_row
+}
+
+def _write_bulk(table, records, chunk_size, synchronous):
+    """executemany() ``records`` into ``table``, one transaction per chunk"""
+    build = BULK_ROW_BUILDERS[table]
+    total = 0
+    chunk = []
+    for record in records:
+        chunk.append(build(record))
+        if len(chunk) >= chunk_size:
+            _write_rows({table: chunk}, synchronous)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        _write_rows({table: chunk}, synchronous)
+        total += len(chunk)
+    return total
+
+def save_sensor_readings_bulk(readings, chunk_size=5000, synchronous=None):
+    """Insert many readings (dicts keyed like the table's columns); returns the count.
+
+    ``readings`` may be any iterable, including a generator over a file, and
+    is consumed ``chunk_size`` rows per transaction. Rollups are kept up to
+    date as with save_sensor_reading().
+    """
+    return _write_bulk('sensor_readings', readings, chunk_size,
+                       synchronous or DURABILITY_MODES[write_buffer.durability])
+
+def log_irrigation_events_bulk(events, chunk_size=5000, synchronous=None):
+    """Insert many irrigation log events (dicts); returns the count"""
+    return _write_bulk('irrigation_logs', events, chunk_size,
+                       synchronous or DURABILITY_MODES[write_buffer.durability])
 
 def get_recent_sensor_data(limit=100):
-    with get_db() as conn:
+    if limit <= sensor_buffer.capacity:
+        rows = sensor_buffer.recent(limit)
+        if rows is not None:
+            return rows
+    with get_db(readonly=True) as conn:
         cursor = conn.cursor()
         cursor.execute('''
             SELECT * FROM sensor_readings 
@@ -128,8 +1007,56 @@ def get_recent_sensor_data(limit=100):
         ''', (limit,))
         return [dict(row) for row in cursor.fetchall()]
 
+def get_sensor_history(resolution, start, end):
+    """Rollup buckets in [start, end] (epoch ms), oldest first.
+
+    Each bucket carries the average of every metric under its own name (so
+    chart code can treat it like a raw reading) plus ``<metric>_min``,
+    ``<metric>_max`` and the number of readings folded into it.
+    """
+    if resolution not in ROLLUP_RESOLUTIONS:
+        raise ValueError(f"Unknown resolution: {resolution}")
+
+    with get_db(readonly=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT bucket, metric, count, sum, min, max
+            FROM sensor_rollups
+            WHERE resolution = ? AND bucket BETWEEN ? AND ?
+            ORDER BY bucket
+        ''', (resolution, rollup_bucket(start, resolution), end))
+
+        history = []
+        current = None
+        for bucket, metric, count, total, low, high in cursor:
+            if current is None or current['timestamp'] != bucket:
+                current = {'timestamp': bucket, 'count': 0}
+                history.append(current)
+            current[metric] = round(total / count, 2) if count else None
+            current[f'{metric}_min'] = low
+            current[f'{metric}_max'] = high
+            current['count'] = max(current['count'], count)
+        return history
+
+def get_sensor_rollup(resolution, timestamp, metric):
+    """min/max/avg/count of one metric for the bucket containing ``timestamp``"""
+    with get_db(readonly=True) as conn:
+        row = conn.execute('''
+            SELECT count, sum, min, max FROM sensor_rollups
+            WHERE resolution = ? AND bucket = ? AND metric = ?
+        ''', (resolution, rollup_bucket(timestamp, resolution), metric)).fetchone()
+
+    if row is None or not row['count']:
+        return {'count': 0, 'avg': None, 'min': None, 'max': None}
+    return {
+        'count': row['count'],
+        'avg': row['sum'] / row['count'],
+        'min': row['min'],
+        'max': row['max']
+    }
+
 def get_recent_logs(limit=50):
-    with get_db() as conn:
+    with get_db(readonly=True) as conn:
         cursor = conn.cursor()
         cursor.execute('''
             SELECT * FROM irrigation_logs 
@@ -138,8 +1065,113 @@ def get_recent_logs(limit=50):
         ''', (limit,))
         return [dict(row) for row in cursor.fetchall()]
 
+def keyset_query(table, start=None, end=None, before_ts=None, before_id=None, after_id=None):
+    """SELECT for one page of a time-series table, ready for a trailing LIMIT ?
+
+    ``after_id`` pages forward through newer rows in id order (tailing and
+    sync). Otherwise rows come newest first and the cursor is the last row
+    seen, (``before_ts``, ``before_id``); ``before_id`` breaks timestamp ties.
+    Both are seeks on an index, so page N costs the same as page 1.
+    """
+    clauses, params = [], []
+    if start is not None:
+        clauses.append('timestamp >= ?')
+        params.append(start)
+    if end is not None:
+        clauses.append('timestamp <= ?')
+        params.append(end)
+
+    if after_id is not None:
+        clauses.append('id > ?')
+        params.append(after_id)
+        order = 'id'
+    else:
+        if before_ts is not None and before_id is not None:
+            # The leading range keeps this a seek on the timestamp index
+            clauses.append('timestamp <= ? AND (timestamp < ? OR id < ?)')
+            params.extend([before_ts, before_ts, before_id])
+        elif before_ts is not None:
+            clauses.append('timestamp < ?')
+            params.append(before_ts)
+        order = 'timestamp DESC, id DESC'
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    return f'SELECT * FROM {table} {where} ORDER BY {order} LIMIT ?', params
+
+def iter_rows(sql, params=(), chunk_size=500):
+    """Yield row dicts from a read-only cursor, fetching ``chunk_size`` at a time.
+
+    Memory stays flat however many rows the query returns, so this is what
+    streaming responses read from.
+    """
+    with get_db(readonly=True) as conn:
+        cursor = conn.execute(sql, params)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                for row in rows:
+                    yield dict(row)
+        finally:
+            cursor.close()
+
+_SEARCH_SELECT = {
+    'irrigation_logs': '''
+        SELECT 'irrigation_logs' AS source, l.id, l.timestamp, l.action AS title, l.zone_id,
+               snippet(irrigation_logs_fts, 0, '[', ']', '...', 16) AS snippet,
+               bm25(irrigation_logs_fts) AS score
+        FROM irrigation_logs_fts JOIN irrigation_logs l ON l.id = irrigation_logs_fts.rowid
+        WHERE irrigation_logs_fts MATCH ? AND l.timestamp BETWEEN ? AND ?
+    ''',
+    'alerts': '''
+        SELECT 'alerts' AS source, a.id, a.timestamp, a.alert_type AS title, a.zone_id,
+               snippet(alerts_fts, 0, '[', ']', '...', 16) AS snippet,
+               bm25(alerts_fts) AS score
+        FROM alerts_fts JOIN alerts a ON a.id = alerts_fts.rowid
+        WHERE alerts_fts MATCH ? AND a.timestamp BETWEEN ? AND ?
+    '''
+}
+
+_SEARCH_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+def build_match_query(text):
+    """Free text -> FTS5 MATCH expression (None if there is nothing to match).
+
+    Every word must appear; words are quoted so user input can never be
+    parsed as FTS5 syntax, and the last one matches as a prefix so
+    "valv" finds "valve".
+    """
+    terms = _SEARCH_TERM_RE.findall(text or '')
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+def search_text(text, start=None, end=None, sources=None, limit=20, offset=0, db=get_db):
+    """Ranked full-text matches across irrigation log notes and alert messages.
+
+    Best matches first (bm25), newest first among equal scores. Paging is by
+    offset: ranked results have no stable key to seek on, and the index
+    only returns the rows that match, so deep pages stay cheap.
+    """
+    match = build_match_query(text)
+    if match is None:
+        return []
+    start = 0 if start is None else start
+    end = now_ms() if end is None else end
+    selects, params = [], []
+    for source in sources or SEARCH_SOURCES:
+        selects.append(_SEARCH_SELECT[source])
+        params.extend([match, start, end])
+    sql = ' UNION ALL '.join(selects) + ' ORDER BY score, timestamp DESC, id DESC LIMIT ? OFFSET ?'
+    with db(readonly=True) as conn:
+        rows = conn.execute(sql, (*params, limit, offset)).fetchall()
+    return [dict(row) for row in rows]
+
 def get_active_schedules():
-    with get_db() as conn:
+    with get_db(readonly=True) as conn:
         cursor = conn.cursor()
         cursor.execute('''
             SELECT * FROM schedules 
@@ -148,6 +1180,42 @@ def get_active_schedules():
         ''')
         return [dict(row) for row in cursor.fetchall()]
 
+def create_irrigation_job(created_at, deadline, duration, trigger_type, zone_id=1):
+    """Persist a running job before its valve opens; returns the job id"""
+    with get_db() as conn:
+        cursor = conn.execute('''
+            INSERT INTO irrigation_jobs (created_at, deadline, duration, trigger_type, zone_id)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (created_at, deadline, duration, trigger_type, zone_id))
+        conn.commit()
+        return cursor.lastrowid
+
+def finish_irrigation_job(job_id, state, finished_at, water_used):
+    with get_db() as conn:
+        conn.execute('''
+            UPDATE irrigation_jobs SET state = ?, finished_at = ?, water_used = ?
+            WHERE id = ? AND state = 'running'
+        ''', (state, finished_at, water_used, job_id))
+        conn.commit()
+
+def get_irrigation_job(job_id):
+    with get_db(readonly=True) as conn:
+        row = conn.execute('SELECT * FROM irrigation_jobs WHERE id = ?', (job_id,)).fetchone()
+        return dict(row) if row else None
+
+def get_irrigation_jobs(state=None, limit=20):
+    """Newest jobs first, optionally only those in ``state``"""
+    with get_db(readonly=True) as conn:
+        if state:
+            rows = conn.execute('''
+                SELECT * FROM irrigation_jobs WHERE state = ? ORDER BY created_at DESC LIMIT ?
+            ''', (state, limit)).fetchall()
+        else:
+            rows = conn.execute('''
+                SELECT * FROM irrigation_jobs ORDER BY id DESC LIMIT ?
+            ''', (limit,)).fetchall()
+        return [dict(row) for row in rows]
+
 def create_alert(alert_type, severity, message):
     with get_db() as conn:
         cursor = conn.cursor()
@@ -158,7 +1226,7 @@ def create_alert(alert_type, severity, message):
         conn.commit()
 
 def get_unresolved_alerts():
-    with get_db() as conn:
+    with get_db(readonly=True) as conn:
         cursor = conn.cursor()
         cursor.execute('''
             SELECT * FROM alerts 
@@ -167,5 +1235,124 @@ def get_unresolved_alerts():
         ''')
         return [dict(row) for row in cursor.fetchall()]
 
-if __name__ == '__main__':
+# Time-range queries used by the dashboard endpoints. They filter with plain
+# BETWEEN predicates on the indexed timestamp column (never DATE()/julianday()
+# wrappers), and test_query_plans.py checks each one still uses an index.
+SQL_IRRIGATION_TOTALS = '''
+    SELECT COUNT(*), SUM(water_used) FROM irrigation_logs
+    WHERE timestamp BETWEEN ? AND ?
+'''
+
+SQL_IRRIGATION_HISTORY = '''
+    SELECT timestamp, duration, water_used, trigger_type, status, zone_id
+    FROM irrigation_logs
+    WHERE timestamp BETWEEN ? AND ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+'''
+
+SQL_ZONES_BELOW_MOISTURE = '''
+    SELECT COUNT(DISTINCT zone_id) FROM sensor_readings
+    WHERE timestamp BETWEEN ? AND ? AND soil_moisture < ?
+'''
+
+SQL_ZONE_LAST_READING = '''
+    SELECT MAX(timestamp) FROM sensor_readings WHERE zone_id = ?
+'''
+
+# The helpers below take ``db``, a get_db-style context manager, so analytics
+# callers can point them at the snapshot (snapshot_store.get_db) instead.
+def get_irrigation_totals(start, end, db=get_db):
+    """(number of log rows, litres used) between two epoch-ms timestamps"""
+    with db(readonly=True) as conn:
+        count, water = conn.execute(SQL_IRRIGATION_TOTALS, (start, end)).fetchone()
+    return count, water or 0
+
+def get_irrigation_history(start, end, limit=10, db=get_db):
+    with db(readonly=True) as conn:
+        cursor = conn.execute(SQL_IRRIGATION_HISTORY, (start, end, limit))
+        return [dict(row) for row in cursor.fetchall()]
+
+def count_zones_below_moisture(start, end, threshold, db=get_db):
+    with db(readonly=True) as conn:
+        return conn.execute(SQL_ZONES_BELOW_MOISTURE, (start, end, threshold)).fetchone()[0] or 0
+
+def get_zone_last_reading(zone_id, db=get_db):
+    """Epoch-ms timestamp of the newest reading for a zone, or None"""
+    with db(readonly=True) as conn:
+        return conn.execute(SQL_ZONE_LAST_READING, (zone_id,)).fetchone()[0]
+
+def _read_records(path, fmt):
+    """Yield one dict per CSV row / NDJSON line without loading the file"""
+    with open(path, newline='') as f:
+        if fmt == 'csv':
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def import_file(path, fmt, table='sensor_readings', chunk_size=20000, rebuild_indexes=True):
+    """Bulk-load a CSV/NDJSON file; returns (rows, seconds).
+
+    Meant for offline backfills: commits run with synchronous=OFF and the
+    table's secondary indexes are dropped during the load and rebuilt once
+    at the end, which is much cheaper than updating them row by row.
+    """
+    started = time.perf_counter()
+    indexes = []
+    if rebuild_indexes:
+        with get_db() as conn:
+            indexes = conn.execute('''
+                SELECT name, sql FROM sqlite_master
+                WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL
+            ''', (table,)).fetchall()
+            for name, _ in indexes:
+                conn.execute(f'DROP INDEX {name}')
+            conn.commit()
+    try:
+        rows = _write_bulk(table, _read_records(path, fmt), chunk_size, 'OFF')
+    finally:
+        with get_db() as conn:
+            for _, sql in indexes:
+                conn.execute(sql)
+            conn.execute('PRAGMA optimize')
+            conn.commit()
+            # synchronous=OFF commits are not yet on disk. The checkpoint
+            # only fsyncs at FULL, and this pooled connection was left at
+            # OFF by _write_rows(); put it back to the default afterwards
+            try:
+                conn.execute('PRAGMA synchronous=FULL')
+                conn.execute('PRAGMA wal_checkpoint(FULL)').fetchall()
+            finally:
+                conn.execute(f"PRAGMA synchronous={SQLITE_PRAGMAS['synchronous']}")
+    return rows, time.perf_counter() - started
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog='python -m database',
+                                     description='Initialize or bulk-load irrigation.db')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.add_parser('init', help='create/migrate the schema (default)')
+    importer = subparsers.add_parser('import', help='bulk-load a CSV or NDJSON file')
+    source = importer.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', metavar='FILE')
+    source.add_argument('--ndjson', metavar='FILE')
+    importer.add_argument('--table', choices=sorted(BULK_ROW_BUILDERS), default='sensor_readings')
+    importer.add_argument('--chunk-size', type=int, default=20000)
+    importer.add_argument('--keep-indexes', action='store_true',
+                          help='maintain indexes during the load instead of rebuilding them')
+    args = parser.parse_args(argv)
+
     init_database()
+    if args.command != 'import':
+        return
+
+    path, fmt = (args.csv, 'csv') if args.csv else (args.ndjson, 'ndjson')
+    rows, seconds = import_file(path, fmt, args.table, args.chunk_size,
+                                rebuild_indexes=not args.keep_indexes)
+    rate = rows / seconds if seconds else rows
+    print(f"Imported {rows} rows into {args.table} in {seconds:.1f}s ({rate:,.0f} rows/sec)")
+
+if __name__ == '__main__':
+    main()
@@ -10,8 +10,11 @@ import platform
 import os
 import subprocess
 import json
+import logging
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 def get_enhanced_hardware_fingerprint():
     """
     Generate enhanced hardware fingerprint using multiple sources.
@@ -23,15 +26,15 @@ def get_enhanced_hardware_fingerprint():
     identifiers = []
     system = platform.system()
     
-    print(f"🔍 Generating hardware fingerprint for {system} system...")
+    logger.debug("Generating hardware fingerprint for %s system...", system)
     
     # 1. MAC Address (Primary network interface)
     try:
         mac = uuid.getnode()
         identifiers.append(f"MAC:{mac}")
-        print(f"   ✓ MAC Address: {mac}")
+        logger.debug("MAC Address: %s", mac)
     except Exception as e:
-        print(f"   ⚠ MAC Address failed: {e}")
+        logger.warning("MAC Address failed: %s", e)
     
     # 2. System Information
     try:
@@ -46,11 +49,11 @@ def get_enhanced_hardware_fingerprint():
             f"PROCESSOR:{processor}",
             f"NODE:{node}"
         ])
-        print(f"   ✓ System: {system_info}, Machine: {machine}")
-        print(f"   ✓ Processor: {processor}")
-        print(f"   ✓ Node: {node}")
+        logger.debug("System: %s, Machine: %s", system_info, machine)
+        logger.debug("Processor: %s", processor)
+        logger.debug("Node: %s", node)
     except Exception as e:
-        print(f"   ⚠ System info failed: {e}")
+        logger.warning("System info failed: %s", e)
     
     # 3. Raspberry Pi Specific Hardware
     if system == 'Linux':
@@ -63,10 +66,10 @@ def get_enhanced_hardware_fingerprint():
                         serial = line.split(':')[1].strip()
                         if serial and serial != '0000000000000000':
                             identifiers.append(f"PI_SERIAL:{serial}")
-                            print(f"   ✓ Raspberry Pi Serial: {serial}")
+                            logger.debug("Raspberry Pi Serial: %s", serial)
                             break
         except Exception as e:
-            print(f"   ⚠ Pi Serial failed: {e}")
+            logger.warning("Pi Serial failed: %s", e)
         
         # Hardware Revision (Raspberry Pi)
         try:
@@ -75,37 +78,37 @@ def get_enhanced_hardware_fingerprint():
                     if line.startswith('Revision'):
                         revision = line.split(':')[1].strip()
                         identifiers.append(f"PI_REVISION:{revision}")
-                        print(f"   ✓ Pi Revision: {revision}")
+                        logger.debug("Pi Revision: %s", revision)
                         break
         except Exception as e:
-            print(f"   ⚠ Pi Revision failed: {e}")
+            logger.warning("Pi Revision failed: %s", e)
         
         # Device Tree Model (Raspberry Pi)
         try:
             with open('/proc/device-tree/model', 'r') as f:
                 model = f.read().strip().replace('\x00', '')
                 identifiers.append(f"PI_MODEL:{model}")
-                print(f"   ✓ Pi Model: {model}")
+                logger.debug("Pi Model: %s", model)
         except Exception as e:
-            print(f"   ⚠ Pi Model failed: {e}")
+            logger.warning("Pi Model failed: %s", e)
         
         # Linux Machine ID
         try:
             with open('/etc/machine-id', 'r') as f:
                 machine_id = f.read().strip()
                 identifiers.append(f"MACHINE_ID:{machine_id}")
-                print(f"   ✓ Linux Machine ID: {machine_id[:16]}...")
+                logger.debug("Linux Machine ID: %s...", machine_id[:16])
         except Exception as e:
-            print(f"   ⚠ Machine ID failed: {e}")
+            logger.warning("Machine ID failed: %s", e)
         
         # DMI System UUID (if available)
         try:
             with open('/sys/class/dmi/id/product_uuid', 'r') as f:
                 dmi_uuid = f.read().strip()
                 identifiers.append(f"DMI_UUID:{dmi_uuid}")
-                print(f"   ✓ DMI UUID: {dmi_uuid}")
+                logger.debug("DMI UUID: %s", dmi_uuid)
         except Exception as e:
-            print(f"   ⚠ DMI UUID failed: {e}")
+            logger.warning("DMI UUID failed: %s", e)
     
     # 4. Windows Specific Hardware
     elif system == 'Windows':
@@ -116,7 +119,7 @@ def get_enhanced_hardware_fingerprint():
                                 r"SOFTWARE\Microsoft\Windows NT\CurrentVersion")
             product_id, _ = winreg.QueryValueEx(key, "ProductId")
             identifiers.append(f"WIN_PRODUCT:{product_id}")
-            print(f"   ✓ Windows Product ID: {product_id}")
+            logger.debug("Windows Product ID: %s", product_id)
             winreg.CloseKey(key)
             
             # Machine GUID
@@ -125,22 +128,22 @@ def get_enhanced_hardware_fingerprint():
                                     r"SOFTWARE\Microsoft\Cryptography")
                 machine_guid, _ = winreg.QueryValueEx(key, "MachineGuid")
                 identifiers.append(f"WIN_GUID:{machine_guid}")
-                print(f"   ✓ Windows Machine GUID: {machine_guid}")
+                logger.debug("Windows Machine GUID: %s", machine_guid)
                 winreg.CloseKey(key)
             except:
                 pass
                 
         except Exception as e:
-            print(f"   ⚠ Windows hardware failed: {e}")
+            logger.warning("Windows hardware failed: %s", e)
     
     # 5. Additional Hardware Detection
     try:
         # CPU count and architecture
         cpu_count = os.cpu_count()
         identifiers.append(f"CPU_COUNT:{cpu_count}")
-        print(f"   ✓ CPU Count: {cpu_count}")
+        logger.debug("CPU Count: %s", cpu_count)
     except Exception as e:
-        print(f"   ⚠ CPU count failed: {e}")
+        logger.warning("CPU count failed: %s", e)
     
     # 6. Network Interface Details (for additional uniqueness)
     try:
@@ -154,7 +157,7 @@ def get_enhanced_hardware_fingerprint():
                     if 'link/ether' in line:
                         mac_addr = line.split('link/ether')[1].split()[0]
                         identifiers.append(f"NET_MAC:{mac_addr}")
-                        print(f"   ✓ Network MAC: {mac_addr}")
+                        logger.debug("Network MAC: %s", mac_addr)
         elif system == 'Windows':
             # Windows network adapter query
             result = subprocess.run(['wmic', 'path', 'win32_networkadapter', 'get', 'macaddress'], 
@@ -164,9 +167,9 @@ def get_enhanced_hardware_fingerprint():
                     line = line.strip()
                     if ':' in line and len(line) == 17:  # MAC format XX:XX:XX:XX:XX:XX
                         identifiers.append(f"WIN_NET_MAC:{line}")
-                        print(f"   ✓ Windows Network MAC: {line}")
+                        logger.debug("Windows Network MAC: %s", line)
     except Exception as e:
-        print(f"   ⚠ Network interface detection failed: {e}")
+        logger.warning("Network interface detection failed: %s", e)
     
     # 7. Storage Device Serial Numbers
     try:
@@ -180,18 +183,18 @@ def get_enhanced_hardware_fingerprint():
                         parts = line.strip().split()
                         if len(parts) >= 2 and parts[1] != '':
                             identifiers.append(f"STORAGE_SERIAL:{parts[1]}")
-                            print(f"   ✓ Storage Serial: {parts[1]}")
+                            logger.debug("Storage Serial: %s", parts[1])
     except Exception as e:
-        print(f"   ⚠ Storage detection failed: {e}")
+        logger.warning("Storage detection failed: %s", e)
     
     # Ensure we have enough identifiers
     if len(identifiers) < 3:
-        print(f"   ⚠ Warning: Only {len(identifiers)} identifiers found")
+        logger.warning("Only %s identifiers found", len(identifiers))
         # Add fallback identifiers
         identifiers.append(f"FALLBACK_TIME:{int(datetime.utcnow().timestamp())}")
         identifiers.append(f"FALLBACK_PID:{os.getpid()}")
     
-    print(f"   📊 Total identifiers collected: {len(identifiers)}")
+    logger.debug("Total identifiers collected: %s", len(identifiers))
     
     # Combine all identifiers with separator
     combined = '|'.join(sorted(identifiers))  # Sort for consistency
@@ -199,7 +202,7 @@ def get_enhanced_hardware_fingerprint():
     # Generate SHA256 hash
     device_id = hashlib.sha256(combined.encode('utf-8')).hexdigest()
     
-    print(f"   🔑 Generated Device ID: {device_id[:32]}...")
+    logger.info("Generated Device ID: %s...", device_id[:32])
     
     return device_id
 
@@ -217,7 +220,7 @@ def generate_irr_format_device_id():
     unique_id = hash_digest[:6].upper()
     
     irr_id = f"IRR-ALG-{unique_id}"
-    print(f"   🏷️  IRR Format ID: {irr_id}")
+    logger.info("IRR Format ID: %s", irr_id)
     
     return irr_id
 
@@ -293,6 +296,7 @@ def save_hardware_report(filename="hardware_report.json"):
     return report
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.DEBUG, format='   %(message)s')
     print("=" * 70)
     print("ENHANCED HARDWARE FINGERPRINTING TEST")
     print("=" * 70)
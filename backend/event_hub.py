@@ -0,0 +1,155 @@
+"""
+Event Hub - in-process pub/sub behind the /api/stream Server-Sent Events feed
+Publishers (sensor loop, valve service, zone controller, alert manager)
+call update() with the current values of a topic; only keys that changed
+are turned into an event. Each event is encoded as an SSE frame once and
+kept in a shared ring of the last EVENT_REPLAY_SIZE frames, so a
+connection costs one cursor into that ring rather than a queue of its own,
+and a client that reconnects with Last-Event-ID gets exactly what it missed.
+"""
+import json
+import threading
+import time
+from collections import deque
+from itertools import islice
+from config import EVENT_REPLAY_SIZE, EVENT_HEARTBEAT_SECONDS, EVENT_MAX_CLIENTS, EVENT_RETRY_MS
+
+
+def _frame(event_id, topic, data):
+    return f"id: {event_id}\nevent: {topic}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class EventHub:
+    """Current state per topic plus a replay ring of delta events"""
+
+    def __init__(self, replay_size=EVENT_REPLAY_SIZE, max_clients=EVENT_MAX_CLIENTS):
+        # Ids are "<boot>-<seq>"; a Last-Event-ID from before a restart can't
+        # be resumed and gets a fresh snapshot instead
+        self.boot = format(int(time.time()), 'x')
+        self.seq = 0
+        self.state = {}
+        self.frames = deque(maxlen=replay_size)
+        self.max_clients = max_clients
+        self.clients = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def update(self, topic, values):
+        """Merge ``values`` into the topic's state and publish what changed.
+
+        A value of None removes the key. Returns the delta (empty if nothing
+        changed, in which case no event is sent).
+        """
+        with self._cond:
+            current = self.state.setdefault(topic, {})
+            delta = {}
+            for key, value in values.items():
+                if value is None:
+                    if key in current:
+                        del current[key]
+                        delta[key] = None
+                elif current.get(key) != value:
+                    current[key] = value
+                    delta[key] = value
+            if delta:
+                self._append(topic, delta)
+            return delta
+
+    def publish(self, topic, data):
+        """Send a one-off event that isn't part of any topic's state"""
+        with self._cond:
+            self._append(topic, data)
+
+    def _append(self, topic, data):
+        self.seq += 1
+        self.frames.append((self.seq, _frame(f'{self.boot}-{self.seq}', topic, data)))
+        self._cond.notify_all()
+
+    def _snapshot_frame(self):
+        """Full state of every topic (caller holds _cond)"""
+        return _frame(f'{self.boot}-{self.seq}', 'snapshot', self.state)
+
+    def _resume_seq(self, last_event_id):
+        """Sequence number to resume after, or None if a snapshot is needed"""
+        if not last_event_id:
+            return None
+        boot, _, seq = last_event_id.partition('-')
+        if boot != self.boot or not seq.isdigit():
+            return None
+        seq = int(seq)
+        oldest = self.frames[0][0] if self.frames else self.seq + 1
+        if seq > self.seq or seq < oldest - 1:
+            return None
+        return seq
+
+    def _frames_after(self, seq):
+        """Frames newer than seq, or None if they have left the ring (caller holds _cond)"""
+        if not self.frames or seq >= self.seq:
+            return []
+        oldest = self.frames[0][0]
+        if seq < oldest - 1:
+            return None
+        return [frame for _, frame in islice(self.frames, seq - oldest + 1, None)]
+
+    def close(self):
+        """End every open stream (server shutdown); clients reconnect elsewhere"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+    def acquire(self):
+        """Reserve a client slot; False if EVENT_MAX_CLIENTS are connected"""
+        with self._cond:
+            if self.closed or self.clients >= self.max_clients:
+                return False
+            self.clients += 1
+            return True
+
+    def release(self):
+        with self._cond:
+            self.clients -= 1
+
+    def stream(self, last_event_id=None, heartbeat=EVENT_HEARTBEAT_SECONDS):
+        """Generator of SSE text for one client (who must hold a slot).
+
+        Starts with a snapshot (or the missed events when resuming), then
+        sends deltas as they are published and a comment line as heartbeat.
+        """
+        yield f"retry: {EVENT_RETRY_MS}\n\n"
+        with self._cond:
+            seq = self._resume_seq(last_event_id)
+            if seq is None:
+                pending = [self._snapshot_frame()]
+            else:
+                pending = self._frames_after(seq)
+            seq = self.seq
+        for frame in pending:
+            yield frame
+
+        while not self.closed:
+            with self._cond:
+                self._cond.wait_for(lambda: self.seq > seq or self.closed, timeout=heartbeat)
+                if self.closed:
+                    return
+                pending = self._frames_after(seq)
+                if pending is None:
+                    # Too slow to keep up with the ring: start over
+                    pending = [self._snapshot_frame()]
+                seq = self.seq
+            if not pending:
+                yield ": ping\n\n"
+            for frame in pending:
+                yield frame
+
+    def get_status(self):
+        with self._cond:
+            return {
+                'clients': self.clients,
+                'max_clients': self.max_clients,
+                'last_event_id': f'{self.boot}-{self.seq}',
+                'buffered_events': len(self.frames),
+                'topics': sorted(self.state)
+            }
+
+
+event_hub = EventHub()
@@ -1,5 +1,10 @@
+import logging
 import time
 from datetime import datetime
+from event_hub import event_hub
+from telemetry import telemetry
+
+logger = logging.getLogger(__name__)
 
 try:
     import RPi.GPIO as GPIO
@@ -25,7 +30,7 @@ class IrrigationController:
         if self.gpio_available:
             self.setup_gpio()
         
-        print(f"Irrigation Controller initialized (GPIO: {self.gpio_available})")
+        logger.info("Irrigation Controller initialized (GPIO: %s)", self.gpio_available)
     
     def setup_gpio(self):
         try:
@@ -33,9 +38,9 @@ class IrrigationController:
             for pin in self.valve_pins.values():
                 GPIO.setup(pin, GPIO.OUT)
                 GPIO.output(pin, GPIO.LOW)
-            print("GPIO initialized for irrigation valves")
+            logger.info("GPIO initialized for irrigation valves")
         except Exception as e:
-            print(f"GPIO setup failed: {e}")
+            logger.warning("GPIO setup failed: %s", e)
             self.gpio_available = False
     
     def start_irrigation(self, zone_id, duration, trigger='manual'):
@@ -48,14 +53,16 @@ class IrrigationController:
         try:
             if self.gpio_available and zone_id in self.valve_pins:
                 GPIO.output(self.valve_pins[zone_id], GPIO.HIGH)
+            telemetry.inc('valve_actuations_total', valve=f'zone_{zone_id}', action='open')
             
             self.active_zones[zone_id] = {
                 'start_time': datetime.now(),
                 'duration': duration,
                 'trigger': trigger
             }
+            self.publish_state()
             
-            print(f"Zone {zone_id} irrigation started ({trigger}) - {duration}s")
+            logger.info("Zone %s irrigation started (%s) - %ss", zone_id, trigger, duration)
             
             return {
                 'success': True,
@@ -64,7 +71,7 @@ class IrrigationController:
                 'duration': duration
             }
         except Exception as e:
-            print(f"Error starting irrigation: {e}")
+            logger.error("Starting irrigation failed: %s", e)
             return {
                 'success': False,
                 'message': str(e)
@@ -80,13 +87,15 @@ class IrrigationController:
         try:
             if self.gpio_available and zone_id in self.valve_pins:
                 GPIO.output(self.valve_pins[zone_id], GPIO.LOW)
+            telemetry.inc('valve_actuations_total', valve=f'zone_{zone_id}', action='close')
             
             zone_info = self.active_zones[zone_id]
             elapsed = (datetime.now() - zone_info['start_time']).total_seconds()
             
             del self.active_zones[zone_id]
+            self.publish_state()
             
-            print(f"Zone {zone_id} irrigation stopped - {elapsed:.0f}s elapsed")
+            logger.info("Zone %s irrigation stopped - %.0fs elapsed", zone_id, elapsed)
             
             return {
                 'success': True,
@@ -95,7 +104,7 @@ class IrrigationController:
                 'elapsed_time': elapsed
             }
         except Exception as e:
-            print(f"Error stopping irrigation: {e}")
+            logger.error("Stopping irrigation failed: %s", e)
             return {
                 'success': False,
                 'message': str(e)
@@ -108,6 +117,20 @@ class IrrigationController:
             results.append(result)
         return results
     
+    def publish_state(self):
+        """Push zone starts/stops to /api/stream subscribers"""
+        event_hub.update('irrigation', {
+            'active_zones': {
+                str(zone_id): {
+                    'start_time': info['start_time'].isoformat(),
+                    'duration': info['duration'],
+                    'trigger': info['trigger']
+                }
+                for zone_id, info in self.active_zones.items()
+            },
+            'total_active': len(self.active_zones)
+        })
+    
     def get_status(self):
         active_zones_info = {}
         for zone_id, info in self.active_zones.items():
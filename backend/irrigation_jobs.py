@@ -0,0 +1,257 @@
+"""
+Irrigation Jobs - timed valve openings without a blocked request thread
+Opening the valve for N seconds creates a job: a row in irrigation_jobs
+(so a restart knows what was running) and a deadline on a timer wheel. One
+wheel thread closes valves as their deadlines come due, so POST
+/api/valve/on returns at once with the job id; /api/jobs/<id> reports
+progress and cancels.
+
+At startup jobs still marked 'running' are reconciled: setup_gpio() has
+already driven the valve closed, so they are recorded as 'interrupted'
+with the water they used up to the restart (or their deadline).
+"""
+import logging
+import math
+import threading
+import time
+from database import (create_irrigation_job, finish_irrigation_job, get_irrigation_job,
+                      get_irrigation_jobs, log_irrigation_event, now_ms, ms_to_iso)
+from config import JOB_TICK_SECONDS, JOB_WHEEL_SLOTS, WATER_FLOW_LITRES_PER_SECOND
+
+logger = logging.getLogger(__name__)
+
+# Terminal job states
+FINISHED_STATES = ('completed', 'cancelled', 'emergency_stopped', 'interrupted', 'failed')
+
+
+class TimerWheel:
+    """Hashed timing wheel: O(1) schedule/cancel, one thread for all timers.
+
+    Deadlines are rounded up to the next tick, so a timer fires at most one
+    tick late and never early. ``clock`` and ``autostart=False`` let tests
+    drive it by hand with run_due().
+    """
+
+    def __init__(self, tick_seconds=JOB_TICK_SECONDS, slots=JOB_WHEEL_SLOTS,
+                 clock=time.monotonic, autostart=True):
+        self.tick_seconds = tick_seconds
+        self.slots = [dict() for _ in range(slots)]
+        self.clock = clock
+        self.autostart = autostart
+        self.started = clock()
+        self.current = 0          # ticks processed so far
+        self.thread = None
+        self.running = False
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._next_handle = 0
+
+    def schedule(self, delay, callback):
+        """Call ``callback()`` after ``delay`` seconds; returns a handle for cancel()"""
+        with self._lock:
+            elapsed = self.clock() - self.started
+            target = max(self.current + 1, math.ceil((elapsed + delay) / self.tick_seconds))
+            ticks = target - self.current
+            self._next_handle += 1
+            handle = (target % len(self.slots), self._next_handle)
+            self.slots[handle[0]][handle[1]] = [(ticks - 1) // len(self.slots), callback]
+        if self.autostart:
+            self.start()
+        return handle
+
+    def cancel(self, handle):
+        """True if the timer was still pending"""
+        with self._lock:
+            return self.slots[handle[0]].pop(handle[1], None) is not None
+
+    def pending(self):
+        with self._lock:
+            return sum(len(slot) for slot in self.slots)
+
+    def _advance(self):
+        """Process every tick that has elapsed; returns the callbacks now due"""
+        due = []
+        with self._lock:
+            now_tick = int((self.clock() - self.started) / self.tick_seconds)
+            while self.current < now_tick:
+                self.current += 1
+                slot = self.slots[self.current % len(self.slots)]
+                for key, entry in list(slot.items()):
+                    if entry[0] > 0:
+                        entry[0] -= 1
+                    else:
+                        due.append(slot.pop(key)[1])
+        return due
+
+    def run_due(self):
+        """Run the callbacks of every timer that has come due; returns how many"""
+        due = self._advance()
+        for callback in due:
+            try:
+                callback()
+            except Exception:
+                logger.exception("Timer callback failed")
+        return len(due)
+
+    def _run(self):
+        while self.running:
+            self.run_due()
+            next_tick = self.started + (self.current + 1) * self.tick_seconds
+            self._wake.wait(max(0.0, next_tick - self.clock()))
+
+    def start(self):
+        with self._lock:
+            if self.running:
+                return
+            self.running = True
+            self._wake.clear()
+            self.thread = threading.Thread(target=self._run, name='timer-wheel', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+        if self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout=5)
+        self.thread = None
+
+
+class JobRunner:
+    """Tracks the running irrigation job of each attached service"""
+
+    def __init__(self, wheel=None):
+        self.wheel = wheel or TimerWheel()
+        self.service = None
+        self.active = {}   # job id -> job row (with the timer handle)
+        self.reconciled = []
+        self._lock = threading.Lock()
+
+    def attach(self, service):
+        """Called by IrrigationService once its valve is known to be closed"""
+        self.service = service
+        self.reconcile()
+
+    def reconcile(self):
+        """Close out jobs that were running when the process last stopped"""
+        now = now_ms()
+        try:
+            stale = get_irrigation_jobs(state='running', limit=1000)
+        except Exception as e:
+            logger.error("Could not read irrigation jobs: %s", e)
+            return []
+        for job in stale:
+            if job['id'] in self.active:
+                continue
+            ended = min(now, job['deadline'])
+            ran = max(0, (ended - job['created_at']) // 1000)
+            water_used = ran * WATER_FLOW_LITRES_PER_SECOND
+            finish_irrigation_job(job['id'], 'interrupted', ended, water_used)
+            log_irrigation_event(
+                action='valve_closed',
+                duration=ran,
+                water_used=water_used,
+                trigger_type='restart',
+                zone_id=job['zone_id'],
+                notes=f"Job {job['id']} interrupted by restart after {ran}s of {job['duration']}s"
+            )
+            logger.warning("Irrigation job %s was interrupted by a restart (%ss of %ss); valve is closed",
+                           job['id'], ran, job['duration'])
+            self.reconciled.append(job['id'])
+        return [job['id'] for job in stale]
+
+    def start_job(self, duration, trigger_type, zone_id=1):
+        """Persist a job and arm its deadline; the caller opens the valve"""
+        created = now_ms()
+        job_id = create_irrigation_job(created, created + duration * 1000, duration,
+                                       trigger_type, zone_id)
+        job = {
+            'id': job_id, 'created_at': created, 'deadline': created + duration * 1000,
+            'duration': duration, 'trigger_type': trigger_type, 'zone_id': zone_id,
+            'state': 'running', 'finished_at': None, 'water_used': None
+        }
+        with self._lock:
+            self.active[job_id] = job
+            job['timer'] = self.wheel.schedule(duration, lambda: self._expire(job_id))
+        return job_id
+
+    def _expire(self, job_id):
+        if self.service is None:
+            return
+        result = self.service.valve_off(auto_stop=True, job_id=job_id)
+        if not result.get('success'):
+            # Valve was already closed some other way; don't leave the row running
+            self.finish_job(job_id, 'completed', 0)
+
+    def finish_job(self, job_id, state, water_used):
+        """Disarm and record the end of a job (no-op if it already finished)"""
+        with self._lock:
+            job = self.active.pop(job_id, None)
+        if job is None:
+            return None
+        self.wheel.cancel(job['timer'])
+        job.update(state=state, finished_at=now_ms(), water_used=round(water_used, 2))
+        try:
+            finish_irrigation_job(job_id, state, job['finished_at'], job['water_used'])
+        except Exception as e:
+            logger.error("Could not record end of irrigation job %s: %s", job_id, e)
+        return job
+
+    def get_job(self, job_id):
+        """Job row with progress fields, or None"""
+        with self._lock:
+            job = self.active.get(job_id)
+            job = dict(job) if job else None
+        if job is None:
+            job = get_irrigation_job(job_id)
+        return self.describe(job) if job else None
+
+    def list_jobs(self, limit=20):
+        return [self.describe(job) for job in get_irrigation_jobs(limit=limit)]
+
+    def describe(self, job):
+        now = now_ms()
+        end = job['finished_at'] if job['finished_at'] is not None else min(now, job['deadline'])
+        elapsed = max(0, (end - job['created_at']) / 1000)
+        running = job['state'] == 'running'
+        return {
+            'id': job['id'],
+            'state': job['state'],
+            'trigger_type': job['trigger_type'],
+            'zone_id': job['zone_id'],
+            'duration': job['duration'],
+            'started_at': ms_to_iso(job['created_at']),
+            'deadline': ms_to_iso(job['deadline']),
+            'finished_at': ms_to_iso(job['finished_at']),
+            'elapsed': round(elapsed, 1),
+            'remaining': round(max(0, (job['deadline'] - now) / 1000), 1) if running else 0,
+            'progress': round(min(100.0, elapsed / job['duration'] * 100), 1) if job['duration'] else 100.0,
+            'water_used': (round(elapsed * WATER_FLOW_LITRES_PER_SECOND, 2) if running
+                           else job['water_used'])
+        }
+
+    def start(self):
+        self.wheel.start()
+
+    def stop(self):
+        """Close the valve for anything still running, then stop the wheel.
+        Jobs end as 'interrupted' so the log matches what happened."""
+        with self._lock:
+            running = list(self.active)
+        for job_id in running:
+            if self.service is not None:
+                self.service.valve_off(job_id=job_id, job_state='interrupted')
+        self.wheel.stop()
+
+    def get_status(self):
+        with self._lock:
+            active = [self.describe(job) for job in self.active.values()]
+        return {
+            'running': self.wheel.running,
+            'tick_seconds': self.wheel.tick_seconds,
+            'pending_timers': self.wheel.pending(),
+            'active_jobs': active,
+            'reconciled_at_startup': list(self.reconciled)
+        }
+
+
+job_runner = JobRunner()
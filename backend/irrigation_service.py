@@ -1,10 +1,19 @@
+import logging
+import threading
 import time
 from datetime import datetime
-from database import log_irrigation_event, save_system_status, create_alert
+from database import log_irrigation_event, save_system_status
+from alert_manager import alert_manager
+from event_hub import event_hub
+from telemetry import telemetry
+from irrigation_jobs import job_runner
 from config import (ENABLE_GPIO, VALVE_GPIO_PIN, RELAY_GPIO_PIN, 
-                    LEAK_DETECTION_ENABLED, MAX_IRRIGATION_DURATION)
+                    LEAK_DETECTION_ENABLED, MAX_IRRIGATION_DURATION,
+                    WATER_FLOW_LITRES_PER_SECOND)
 from safety_rules import SafetyRulesEngine
 
+logger = logging.getLogger(__name__)
+
 try:
     if ENABLE_GPIO:
         import RPi.GPIO as GPIO
@@ -13,7 +22,7 @@ try:
         GPIO_AVAILABLE = False
 except ImportError:
     GPIO_AVAILABLE = False
-    print("GPIO library not available. Running in simulation mode.")
+    logger.info("GPIO library not available. Running in simulation mode.")
 
 class IrrigationService:
     def __init__(self):
@@ -23,12 +32,19 @@ class IrrigationService:
         self.irrigation_start_time = None
         self.total_water_used = 0
         self.battery_level = 12.5
+        self.job_id = None
+        # Held only while the valve is switched and its job recorded, never
+        # for the length of an irrigation
+        self._valve_lock = threading.RLock()
         
         self.safety_engine = SafetyRulesEngine()
-        print("SAFETY: Local safety rules engine active - Pi has final authority")
+        logger.info("SAFETY: Local safety rules engine active - Pi has final authority")
         
         if self.gpio_available:
             self.setup_gpio()
+        
+        # The valve is closed now; settle jobs a previous run left open
+        job_runner.attach(self)
     
     def setup_gpio(self):
         try:
@@ -37,9 +53,9 @@ class IrrigationService:
             GPIO.setup(RELAY_GPIO_PIN, GPIO.OUT)
             GPIO.output(VALVE_GPIO_PIN, GPIO.LOW)
             GPIO.output(RELAY_GPIO_PIN, GPIO.LOW)
-            print("GPIO for irrigation initialized")
+            logger.info("GPIO for irrigation initialized")
         except Exception as e:
-            print(f"GPIO setup failed: {e}")
+            logger.warning("GPIO setup failed: %s", e)
             self.gpio_available = False
     
     def check_leak(self):
@@ -50,7 +66,7 @@ class IrrigationService:
             try:
                 pass
             except Exception as e:
-                print(f"Error checking leak: {e}")
+                logger.error("Leak check failed: %s", e)
                 return False
         
         return self.leak_detected
@@ -64,7 +80,7 @@ class IrrigationService:
         )
         
         if not allowed:
-            print(f"SAFETY BLOCK: {reason}")
+            logger.warning("SAFETY BLOCK: %s", reason)
             return {
                 'success': False,
                 'message': f'Safety check failed: {reason}',
@@ -75,102 +91,138 @@ class IrrigationService:
             duration = safe_duration
         else:
             duration = min(duration, safe_duration)
+        duration = int(min(duration, MAX_IRRIGATION_DURATION)) if duration else 0
         
-        if self.valve_state:
-            return {
-                'success': False,
-                'message': 'Valve already open'
-            }
-        
-        try:
-            if self.gpio_available:
-                GPIO.output(VALVE_GPIO_PIN, GPIO.HIGH)
-                GPIO.output(RELAY_GPIO_PIN, GPIO.HIGH)
-            
-            self.valve_state = True
-            self.irrigation_start_time = datetime.now()
-            
-            self.safety_engine.record_irrigation_start()
-            
-            ai_info = ''
-            if ai_recommendation:
-                ai_info = f" | AI: {ai_recommendation.get('source', 'unknown')}"
-            
-            log_irrigation_event(
-                action='valve_opened',
-                trigger_type=trigger_type,
-                notes=f'Duration: {duration}s | Safety validated{ai_info}'
-            )
-            
-            print(f"SAFETY APPROVED: Valve OPENED ({trigger_type}) for {duration}s")
+        with self._valve_lock:
+            if self.valve_state:
+                return {
+                    'success': False,
+                    'message': 'Valve already open',
+                    'job_id': self.job_id
+                }
             
-            if duration:
-                time.sleep(min(duration, MAX_IRRIGATION_DURATION))
-                return self.valve_off(auto_stop=True)
-            
-            return {
-                'success': True,
-                'message': 'Valve opened successfully',
-                'valve_state': 'ON'
-            }
-        except Exception as e:
-            print(f"Error opening valve: {e}")
-            return {
-                'success': False,
-                'message': f'Error: {str(e)}'
-            }
+            try:
+                # Recorded before the valve opens so a crash can't leave an
+                # open valve with no job behind it
+                if duration:
+                    self.job_id = job_runner.start_job(duration, trigger_type)
+                
+                if self.gpio_available:
+                    GPIO.output(VALVE_GPIO_PIN, GPIO.HIGH)
+                    GPIO.output(RELAY_GPIO_PIN, GPIO.HIGH)
+                telemetry.inc('valve_actuations_total', valve='main', action='open')
+                
+                self.valve_state = True
+                self.irrigation_start_time = datetime.now()
+                self.publish_state()
+                
+                self.safety_engine.record_irrigation_start()
+                
+                ai_info = ''
+                if ai_recommendation:
+                    ai_info = f" | AI: {ai_recommendation.get('source', 'unknown')}"
+                
+                log_irrigation_event(
+                    action='valve_opened',
+                    trigger_type=trigger_type,
+                    notes=f'Duration: {duration}s | Safety validated{ai_info}'
+                )
+                
+                logger.info("SAFETY APPROVED: Valve OPENED (%s) for %ss", trigger_type, duration)
+                
+                return {
+                    'success': True,
+                    'message': 'Valve opened successfully',
+                    'valve_state': 'ON',
+                    'duration': duration,
+                    'job_id': self.job_id
+                }
+            except Exception as e:
+                logger.error("Opening valve failed: %s", e)
+                if self.valve_state:
+                    self.valve_off(job_state='failed')
+                elif self.job_id is not None:
+                    job_runner.finish_job(self.job_id, 'failed', 0)
+                    self.job_id = None
+                return {
+                    'success': False,
+                    'message': f'Error: {str(e)}'
+                }
     
-    def valve_off(self, auto_stop=False):
-        if not self.valve_state:
-            return {
-                'success': False,
-                'message': 'Valve already closed'
-            }
-        
-        try:
-            if self.gpio_available:
-                GPIO.output(VALVE_GPIO_PIN, GPIO.LOW)
-                GPIO.output(RELAY_GPIO_PIN, GPIO.LOW)
-            
-            self.valve_state = False
-            
-            duration = 0
-            if self.irrigation_start_time:
-                duration = int((datetime.now() - self.irrigation_start_time).total_seconds())
-            
-            water_used = duration * 0.05
-            self.total_water_used += water_used
-            
-            self.safety_engine.record_irrigation_complete(water_used)
+    def valve_off(self, auto_stop=False, job_id=None, job_state=None):
+        """Close the valve and end its job. With ``job_id`` only if that job
+        is still the one running (a late timer must not close a newer one)."""
+        with self._valve_lock:
+            if not self.valve_state:
+                return {
+                    'success': False,
+                    'message': 'Valve already closed'
+                }
+            if job_id is not None and job_id != self.job_id:
+                return {
+                    'success': False,
+                    'message': f'Job {job_id} is no longer running'
+                }
             
-            log_irrigation_event(
-                action='valve_closed',
-                duration=duration,
-                water_used=water_used,
-                trigger_type='auto' if auto_stop else 'manual',
-                notes=f'Total water: {water_used:.2f}L | Daily: {self.safety_engine.daily_water_usage:.2f}L'
-            )
-            
-            print(f"Valve CLOSED (duration: {duration}s, water: {water_used:.2f}L)")
-            
-            return {
-                'success': True,
-                'message': 'Valve closed successfully',
-                'valve_state': 'OFF',
-                'duration': duration,
-                'water_used': water_used
-            }
-        except Exception as e:
-            print(f"Error closing valve: {e}")
-            return {
-                'success': False,
-                'message': f'Error: {str(e)}'
-            }
+            try:
+                if self.gpio_available:
+                    GPIO.output(VALVE_GPIO_PIN, GPIO.LOW)
+                    GPIO.output(RELAY_GPIO_PIN, GPIO.LOW)
+                telemetry.inc('valve_actuations_total', valve='main', action='close')
+                
+                self.valve_state = False
+                
+                duration = 0
+                if self.irrigation_start_time:
+                    duration = int((datetime.now() - self.irrigation_start_time).total_seconds())
+                
+                water_used = duration * WATER_FLOW_LITRES_PER_SECOND
+                self.total_water_used += water_used
+                
+                finished_job = self.job_id
+                if finished_job is not None:
+                    job_runner.finish_job(finished_job, job_state or ('completed' if auto_stop else 'cancelled'),
+                                          water_used)
+                    self.job_id = None
+                
+                self.safety_engine.record_irrigation_complete(water_used)
+                self.publish_state()
+                
+                log_irrigation_event(
+                    action='valve_closed',
+                    duration=duration,
+                    water_used=water_used,
+                    trigger_type='auto' if auto_stop else 'manual',
+                    notes=f'Total water: {water_used:.2f}L | Daily: {self.safety_engine.daily_water_usage:.2f}L'
+                )
+                
+                logger.info("Valve CLOSED (duration: %ss, water: %.2fL)", duration, water_used)
+                
+                return {
+                    'success': True,
+                    'message': 'Valve closed successfully',
+                    'valve_state': 'OFF',
+                    'duration': duration,
+                    'water_used': water_used,
+                    'job_id': finished_job
+                }
+            except Exception as e:
+                logger.error("Closing valve failed: %s", e)
+                return {
+                    'success': False,
+                    'message': f'Error: {str(e)}'
+                }
     
     def emergency_stop(self):
-        print("EMERGENCY STOP ACTIVATED!")
-        create_alert('emergency_stop', 'critical', 'Emergency stop triggered')
-        return self.valve_off()
+        # Cut the outputs first, without waiting for the valve lock or the
+        # database; the bookkeeping below can follow
+        if self.gpio_available:
+            GPIO.output(VALVE_GPIO_PIN, GPIO.LOW)
+            GPIO.output(RELAY_GPIO_PIN, GPIO.LOW)
+        logger.warning("EMERGENCY STOP ACTIVATED!")
+        result = self.valve_off(job_state='emergency_stopped')
+        alert_manager.raise_alert('emergency_stop', 'critical', 'Emergency stop triggered')
+        return result
     
     def _get_system_status(self):
         """Get current system status for safety checks"""
@@ -181,6 +233,16 @@ class IrrigationService:
             'valve_state': 'ON' if self.valve_state else 'OFF'
         }
     
+    def publish_state(self):
+        """Push valve changes to /api/stream subscribers"""
+        event_hub.update('valve', {
+            'valve_state': 'ON' if self.valve_state else 'OFF',
+            'irrigation_active': self.valve_state,
+            'leak_detected': self.leak_detected,
+            'total_water_used': round(self.total_water_used, 2),
+            'start_time': self.irrigation_start_time.isoformat() if self.irrigation_start_time else None
+        })
+    
     def get_status(self):
         status = {
             'valve_state': 'ON' if self.valve_state else 'OFF',
@@ -188,6 +250,7 @@ class IrrigationService:
             'total_water_used': round(self.total_water_used, 2),
             'irrigation_active': self.valve_state,
             'start_time': self.irrigation_start_time.isoformat() if self.irrigation_start_time else None,
+            'job_id': self.job_id,
             'safety_status': self.safety_engine.get_safety_status(),
             'pi_authority': True
         }
@@ -205,3 +268,5 @@ if __name__ == '__main__':
     print(service.valve_on(trigger_type='test', duration=5))
     time.sleep(1)
     print(service.get_status())
+    time.sleep(5)
+    print(job_runner.get_status())
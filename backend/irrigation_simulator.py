@@ -6,8 +6,7 @@ Simulates valve operations, water flow, and sensor readings
 
 import time
 import random
-from datetime import datetime
-from database import get_db
+from database import get_db, now_ms
 
 class IrrigationSimulator:
     """Simulates irrigation hardware for testing without physical devices"""
@@ -37,7 +36,7 @@ class IrrigationSimulator:
                     (timestamp, zone_id, duration, water_used, trigger_type, status)
                     VALUES (?, ?, ?, ?, ?, ?)
                 ''', (
-                    datetime.now().isoformat(),
+                    now_ms(),
                     zone_id,
                     0,  # Duration will be updated when closed
                     0,  # Water used will be calculated when closed
@@ -0,0 +1,208 @@
+"""
+HTTP load test - req/s and latency percentiles for the dashboard endpoints
+Keep-alive clients hit the status/sensor/valve endpoints and the dashboard
+page for a fixed time. With --spawn the script starts api_server.py itself
+on a throwaway database, pins it to --cpus cores (a Pi 3/4 budget is 1-4)
+and stops it with SIGTERM afterwards, reporting how long the drain took.
+
+Usage: python load_test.py --spawn production [--cpus 1] [--concurrency 16] [--duration 20]
+       python load_test.py --spawn both          (production vs dev server)
+       python load_test.py --url http://raspberrypi.local:5000
+"""
+import argparse
+import http.client
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+DEFAULT_PATHS = ['/api/status', '/api/sensors', '/api/valve/status', '/']
+STARTUP_TIMEOUT = 90
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def wait_until_up(host, port, timeout=STARTUP_TIMEOUT):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection(host, port, timeout=2)
+            conn.request('GET', '/api/status')
+            conn.getresponse().read()
+            conn.close()
+            return True
+        except (OSError, http.client.HTTPException):
+            time.sleep(0.5)
+    return False
+
+
+def spawn_server(mode, port, cpus, tmp):
+    """Start api_server.py on its own database, pinned to the first ``cpus`` cores"""
+    env = dict(os.environ, DB_PATH=os.path.join(tmp, 'loadtest.db'),
+               BACKUP_DIR=os.path.join(tmp, 'backups'), PYTHONUNBUFFERED='1')
+    command = [sys.executable, 'api_server.py', '--port', str(port)]
+    if mode == 'dev':
+        command.append('--dev')
+    server_cpus = sorted(os.sched_getaffinity(0))[:cpus] if hasattr(os, 'sched_getaffinity') else None
+
+    def pin():
+        if server_cpus:
+            os.sched_setaffinity(0, server_cpus)
+
+    log = open(os.path.join(tmp, f'server-{mode}.log'), 'w')
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env,
+                               stdout=log, stderr=subprocess.STDOUT, preexec_fn=pin,
+                               start_new_session=True)
+    return process, log, server_cpus
+
+
+def stop_server(process):
+    """SIGTERM the server (and the dev reloader's child); seconds until it exited"""
+    started = time.perf_counter()
+    os.killpg(process.pid, signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+        return None
+    return time.perf_counter() - started
+
+
+def run_load(host, port, paths, concurrency, duration):
+    """``concurrency`` keep-alive clients requesting ``paths`` round-robin"""
+    latencies = [[] for _ in range(concurrency)]
+    statuses = [{} for _ in range(concurrency)]
+    errors = [0] * concurrency
+    reconnects = [0] * concurrency
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        position = index
+        while time.perf_counter() < deadline:
+            path = paths[position % len(paths)]
+            position += 1
+            t0 = time.perf_counter()
+            try:
+                conn.request('GET', path, headers={'Accept-Encoding': 'gzip'})
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                conn.close()
+                reconnects[index] += 1
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                continue
+            latencies[index].append((time.perf_counter() - t0) * 1000)
+            statuses[index][response.status] = statuses[index].get(response.status, 0) + 1
+            if response.will_close:
+                reconnects[index] += 1
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+        conn.close()
+
+    threads = [threading.Thread(target=client, args=(i,), daemon=True) for i in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    samples = [ms for per_client in latencies for ms in per_client]
+    status_counts = {}
+    for per_client in statuses:
+        for status, count in per_client.items():
+            status_counts[status] = status_counts.get(status, 0) + count
+    return {
+        'requests': len(samples),
+        'req_per_sec': len(samples) / elapsed,
+        'p50_ms': statistics.median(samples) if samples else None,
+        'p99_ms': percentile(samples, 99) if samples else None,
+        'max_ms': max(samples) if samples else None,
+        'statuses': status_counts,
+        'errors': sum(errors),
+        'reconnects': sum(reconnects)
+    }
+
+
+def print_result(name, result):
+    if not result['requests']:
+        print(f"{name:<12} no successful requests ({result['errors']} errors)")
+        return
+    print(f"{name:<12}{result['req_per_sec']:>10.0f}{result['p50_ms']:>10.1f}"
+          f"{result['p99_ms']:>10.1f}{result['max_ms']:>10.1f}{result['errors']:>8}"
+          f"{result['reconnects']:>11}   {result['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the API server')
+    parser.add_argument('--url', default='http://127.0.0.1:5000',
+                        help='server to test (port is reused by --spawn)')
+    parser.add_argument('--spawn', choices=['production', 'dev', 'both'],
+                        help='start api_server.py on a throwaway database first')
+    parser.add_argument('--cpus', type=int, default=1, help='cores the spawned server may use')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20, help='seconds per run')
+    parser.add_argument('--warmup', type=float, default=3, help='seconds of unmeasured load first')
+    parser.add_argument('--paths', default=','.join(DEFAULT_PATHS))
+    args = parser.parse_args()
+
+    target = urlsplit(args.url)
+    host, port = target.hostname, target.port or 80
+    paths = [p.strip() for p in args.paths.split(',') if p.strip()]
+    modes = ['production', 'dev'] if args.spawn == 'both' else [args.spawn]
+
+    print("=" * 86)
+    print(f"LOAD TEST  {args.concurrency} keep-alive clients, {args.duration:.0f}s, paths: {', '.join(paths)}")
+    print("=" * 86)
+    print(f"{'server':<12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}{'errors':>8}"
+          f"{'reconnects':>11}   statuses")
+
+    for mode in modes:
+        if mode is None:
+            if args.warmup:
+                run_load(host, port, paths, args.concurrency, args.warmup)
+            print_result('remote', run_load(host, port, paths, args.concurrency, args.duration))
+            continue
+
+        with tempfile.TemporaryDirectory() as tmp:
+            process, log, server_cpus = spawn_server(mode, port, args.cpus, tmp)
+            try:
+                if not wait_until_up(host, port):
+                    log.flush()
+                    with open(log.name) as f:
+                        print(f.read()[-2000:])
+                    sys.exit(f"{mode} server did not come up on port {port}")
+                if server_cpus and hasattr(os, 'sched_setaffinity'):
+                    # Keep the load generator off the server's cores when possible
+                    rest = sorted(set(os.sched_getaffinity(0)) - set(server_cpus))
+                    if rest:
+                        os.sched_setaffinity(0, rest)
+                if args.warmup:
+                    run_load(host, port, paths, args.concurrency, args.warmup)
+                result = run_load(host, port, paths, args.concurrency, args.duration)
+            finally:
+                drain = stop_server(process)
+                log.close()
+            print_result(mode, result)
+            cpus = f"cpus {server_cpus}" if server_cpus else "cpus unpinned"
+            drained = f"{drain:.2f}s" if drain is not None else "did not exit, killed"
+            print(f"{'':<12}{cpus}; SIGTERM to exit: {drained}")
+    print("=" * 86)
+
+
+if __name__ == '__main__':
+    main()
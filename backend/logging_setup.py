@@ -0,0 +1,156 @@
+"""
+Logging Setup - one asynchronous, structured logging pipeline for the server
+Modules log through logging.getLogger(__name__). setup_logging() hangs a
+single QueueHandler on the root logger, so a log call only formats the
+message and puts the record on a queue; a QueueListener thread does the
+I/O:
+
+- JSON lines to LOG_DIR/onecore.log, rotated at LOG_FILE_MAX_BYTES
+- plain text to stdout (journald) from LOG_CONSOLE_LEVEL up
+- an in-memory ring of the last LOG_TAIL_SIZE records for /api/terminal/logs
+
+Levels are set per module with LOG_MODULE_LEVELS.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from config import (LOG_DIR, LOG_LEVEL, LOG_CONSOLE_LEVEL, LOG_MODULE_LEVELS,
+                    LOG_FILE_MAX_BYTES, LOG_FILE_BACKUPS, LOG_TAIL_SIZE)
+
+LOG_FILE_NAME = 'onecore.log'
+CONSOLE_FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+# Attributes every LogRecord has; anything else came in through extra={...}
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def _record_fields(record):
+    """The structured form of a record: fixed keys plus any extra={...} fields"""
+    fields = {
+        'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+        'level': record.levelname,
+        'logger': record.name,
+        'msg': record.getMessage(),
+        'thread': record.threadName
+    }
+    if record.exc_text:
+        fields['exc'] = record.exc_text
+    for key, value in vars(record).items():
+        if key not in _RECORD_ATTRS and key not in fields:
+            fields[key] = value
+    return fields
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        return json.dumps(_record_fields(record), default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """Resolves the message and traceback on the caller's thread but keeps
+    them apart, so the JSON output carries the traceback as its own field"""
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LogTail(logging.Handler):
+    """Ring buffer of the newest records, each numbered for incremental reads"""
+
+    def __init__(self, size=LOG_TAIL_SIZE):
+        super().__init__()
+        self.records = deque(maxlen=size)
+        self.seq = 0
+        self._tail_lock = threading.Lock()
+
+    def emit(self, record):
+        fields = _record_fields(record)
+        with self._tail_lock:
+            self.seq += 1
+            fields['seq'] = self.seq
+            self.records.append(fields)
+
+    def tail(self, lines=100, level=None, after=None):
+        """Newest ``lines`` records, oldest first, optionally from ``level`` up
+        and/or only those after sequence number ``after``"""
+        minimum = logging.getLevelName(level.upper()) if level else 0
+        if not isinstance(minimum, int):
+            raise ValueError(f"Unknown log level: {level}")
+        with self._tail_lock:
+            records = list(self.records)
+        if after is not None:
+            records = [r for r in records if r['seq'] > after]
+        if minimum:
+            records = [r for r in records if logging.getLevelName(r['level']) >= minimum]
+        return records[-lines:] if lines else records
+
+
+log_tail = LogTail()
+_listener = None
+
+
+def setup_logging(log_dir=LOG_DIR, level=LOG_LEVEL, console_level=LOG_CONSOLE_LEVEL,
+                  module_levels=LOG_MODULE_LEVELS):
+    """Route all logging through the background listener (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    handlers = [log_tail]
+    console = logging.StreamHandler(sys.stdout)
+    console.setLevel(console_level)
+    console.setFormatter(logging.Formatter(CONSOLE_FORMAT))
+    handlers.append(console)
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+        log_file = logging.handlers.RotatingFileHandler(
+            os.path.join(log_dir, LOG_FILE_NAME), maxBytes=LOG_FILE_MAX_BYTES,
+            backupCount=LOG_FILE_BACKUPS, encoding='utf-8', delay=True)
+        log_file.setFormatter(JsonFormatter())
+        handlers.append(log_file)
+    except OSError as e:
+        print(f"File logging disabled ({log_dir}): {e}")
+
+    root = logging.getLogger()
+    # Replace basicConfig()/default handlers: everything goes through the queue
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_QueueHandler(queue.SimpleQueue()))
+    root.setLevel(level)
+    for name, module_level in module_levels.items():
+        logging.getLogger(name).setLevel(module_level)
+
+    _listener = logging.handlers.QueueListener(root.handlers[0].queue, *handlers,
+                                               respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def read_log_file(path, lines=100, block_size=8192):
+    """Last ``lines`` lines of a text file, read backwards from the end"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        data = b''
+        while position > 0 and data.count(b'\n') <= lines:
+            step = min(block_size, position)
+            position -= step
+            f.seek(position)
+            data = f.read(step) + data
+    return b'\n'.join(data.splitlines()[-lines:]).decode('utf-8', errors='replace')
@@ -1,3 +1,4 @@
+import logging
 import json
 import os
 from datetime import datetime
@@ -8,6 +9,8 @@ from ai_engine.decision_engine import DecisionEngine
 from database import init_database, save_sensor_reading, log_irrigation_event
 from cloud_integration import CloudIntegration
 
+logger = logging.getLogger(__name__)
+
 class MainController:
     def __init__(self):
         self.data_dir = os.path.join(os.path.dirname(__file__), 'data')
@@ -31,19 +34,19 @@ class MainController:
         try:
             self.cloud_integration = CloudIntegration()
             cloud_status = self.cloud_integration.get_status()
-            print(f"Cloud Integration: {'✓ Registered' if cloud_status['registered'] else '⚠ Not Registered'}")
+            logger.info("Cloud Integration: %s", 'Registered' if cloud_status['registered'] else 'Not Registered')
             if not cloud_status['registered']:
-                print(f"  Register at: https://cloud.ielivate.com/link-device")
-                print(f"  Device ID: {cloud_status['device_id']}")
+                logger.info("Register at: https://cloud.ielivate.com/link-device")
+                logger.info("Device ID: %s", cloud_status['device_id'])
         except Exception as e:
-            print(f"Cloud Integration: ⚠ Error - {str(e)}")
+            logger.warning("Cloud Integration failed: %s", e)
             self.cloud_integration = None
         
         init_database()
         
-        print("BAYYTI-B1 Main Controller initialized")
-        print(f"System: {self.system_config.get('device_name', 'BAYYTI-B1')}")
-        print(f"Setup completed: {self.system_config.get('setup_completed', False)}")
+        logger.info("BAYYTI-B1 Main Controller initialized")
+        logger.info("System: %s", self.system_config.get('device_name', 'BAYYTI-B1'))
+        logger.info("Setup completed: %s", self.system_config.get('setup_completed', False))
     
     def load_json(self, filename):
         filepath = os.path.join(self.data_dir, filename)
@@ -51,7 +54,7 @@ class MainController:
             with open(filepath, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except FileNotFoundError:
-            print(f"Warning: {filename} not found")
+            logger.warning("%s not found", filename)
             return {}
     
     def load_system_config(self):
@@ -171,7 +174,8 @@ class MainController:
             sensors['temperature'],
             sensors['humidity'],
             sensors['flow_rate'],
-            sensors['pressure']
+            sensors['pressure'],
+            buffered=True
         )
         
         # Sync with cloud and execute cloud commands
@@ -183,9 +187,9 @@ class MainController:
                     irrigation_controller=self.irrigation_controller
                 )
                 if cloud_result.get('commands_executed', 0) > 0:
-                    print(f"✓ Executed {cloud_result['commands_executed']} cloud command(s)")
+                    logger.info("Executed %s cloud command(s)", cloud_result['commands_executed'])
             except Exception as e:
-                print(f"Cloud sync error: {str(e)}")
+                logger.warning("Cloud sync failed: %s", e)
                 cloud_result = {"success": False, "error": str(e)}
         
         # Run local AI decisions for auto mode zones
@@ -0,0 +1,171 @@
+"""
+Metrics Collector - background CPU/RAM/temperature/disk/network sampling
+One thread samples host metrics every METRICS_SAMPLE_INTERVAL_SECONDS into
+a fixed-size ring buffer; static platform info is read once. CPU usage
+comes from psutil.cpu_percent(interval=None), i.e. the average since the
+previous sample, so nothing ever sleeps on a request thread.
+"""
+import logging
+import os
+import platform
+import threading
+import time
+from collections import deque
+from config import METRICS_SAMPLE_INTERVAL_SECONDS, METRICS_HISTORY_SIZE
+
+logger = logging.getLogger(__name__)
+
+try:
+    import psutil
+    PSUTIL_AVAILABLE = True
+except ImportError:
+    PSUTIL_AVAILABLE = False
+
+SAMPLE_FIELDS = ('timestamp', 'cpu_percent', 'cpu_freq_mhz', 'cpu_temp_c', 'load_1m',
+                 'mem_used_gb', 'mem_available_gb', 'mem_percent', 'disk_used_gb',
+                 'disk_percent', 'net_sent_mb', 'net_recv_mb', 'net_sent_kbps', 'net_recv_kbps')
+
+THERMAL_ZONE = '/sys/class/thermal/thermal_zone0/temp'
+GB = 1024 ** 3
+MB = 1024 ** 2
+
+
+def _cpu_temperature():
+    """SoC temperature in C (Raspberry Pi thermal zone, else psutil), or None"""
+    try:
+        with open(THERMAL_ZONE, 'r') as f:
+            return int(f.read().strip()) / 1000.0
+    except (OSError, ValueError):
+        pass
+    if PSUTIL_AVAILABLE and hasattr(psutil, 'sensors_temperatures'):
+        try:
+            for entries in psutil.sensors_temperatures().values():
+                if entries:
+                    return entries[0].current
+        except Exception:
+            pass
+    return None
+
+
+class MetricsCollector:
+    """Samples host metrics on a fixed cadence into a ring buffer"""
+
+    def __init__(self, interval=METRICS_SAMPLE_INTERVAL_SECONDS, size=METRICS_HISTORY_SIZE):
+        self.interval = interval
+        self.samples = deque(maxlen=size)
+        self.static = self._read_static()
+        self.running = False
+        self.thread = None
+        self._stop = threading.Event()
+        self._last_net = None
+
+    def _read_static(self):
+        """Things that don't change while the process runs"""
+        info = {
+            'platform': platform.system(),
+            'platform_release': platform.release(),
+            'platform_version': platform.version(),
+            'architecture': platform.machine(),
+            'processor': platform.processor(),
+            'cpu_cores': os.cpu_count() or 1,
+            'boot_time': None,
+            'mem_total_gb': None,
+            'disk_total_gb': None
+        }
+        if PSUTIL_AVAILABLE:
+            info['cpu_cores'] = psutil.cpu_count(logical=True) or info['cpu_cores']
+            info['boot_time'] = psutil.boot_time()
+            info['mem_total_gb'] = round(psutil.virtual_memory().total / GB, 2)
+            info['disk_total_gb'] = round(psutil.disk_usage('/').total / GB, 2)
+            # Prime the counter: the first non-blocking call always returns 0.0
+            psutil.cpu_percent(interval=None)
+        return info
+
+    def sample(self):
+        """Take one sample, append it to the ring buffer and return it"""
+        now = time.time()
+        sample = dict.fromkeys(SAMPLE_FIELDS)
+        sample.update(
+            timestamp=int(now * 1000),
+            cpu_temp_c=_cpu_temperature(),
+            load_1m=os.getloadavg()[0] if hasattr(os, 'getloadavg') else None
+        )
+        if PSUTIL_AVAILABLE:
+            sample['cpu_percent'] = round(psutil.cpu_percent(interval=None), 1)
+            try:
+                freq = psutil.cpu_freq()
+                sample['cpu_freq_mhz'] = round(freq.current, 0) if freq else None
+            except Exception:
+                pass
+
+            memory = psutil.virtual_memory()
+            sample['mem_used_gb'] = round(memory.used / GB, 2)
+            sample['mem_available_gb'] = round(memory.available / GB, 2)
+            sample['mem_percent'] = round(memory.percent, 1)
+
+            disk = psutil.disk_usage('/')
+            sample['disk_used_gb'] = round(disk.used / GB, 2)
+            sample['disk_percent'] = disk.percent
+
+            net = psutil.net_io_counters()
+            if net is not None:
+                sample['net_sent_mb'] = round(net.bytes_sent / MB, 2)
+                sample['net_recv_mb'] = round(net.bytes_recv / MB, 2)
+                if self._last_net:
+                    last_time, last_net = self._last_net
+                    elapsed = max(now - last_time, 1e-6)
+                    sample['net_sent_kbps'] = round((net.bytes_sent - last_net.bytes_sent) / 1024 / elapsed, 1)
+                    sample['net_recv_kbps'] = round((net.bytes_recv - last_net.bytes_recv) / 1024 / elapsed, 1)
+                self._last_net = (now, net)
+
+        self.samples.append(sample)
+        return sample
+
+    def latest(self):
+        """Most recent sample; every reading is None until the background
+        thread has taken the first one (requests never sample inline)"""
+        try:
+            return self.samples[-1]
+        except IndexError:
+            return dict.fromkeys(SAMPLE_FIELDS)
+
+    def history(self, since=None, limit=None):
+        """Buffered samples, oldest first, optionally after ``since`` (epoch ms)"""
+        samples = list(self.samples)
+        if since is not None:
+            samples = [s for s in samples if s['timestamp'] > since]
+        if limit:
+            samples = samples[-limit:]
+        return samples
+
+    def uptime_seconds(self):
+        if self.static['boot_time'] is not None:
+            return time.time() - self.static['boot_time']
+        try:
+            with open('/proc/uptime', 'r') as f:
+                return float(f.readline().split()[0])
+        except (OSError, ValueError):
+            return None
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self.thread = threading.Thread(target=self._run, name='metrics-collector', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self._stop.set()
+
+    def _run(self):
+        while self.running:
+            try:
+                self.sample()
+            except Exception as e:
+                logger.warning("Metrics sampling failed: %s", e)
+            self._stop.wait(self.interval)
+
+
+metrics_collector = MetricsCollector()
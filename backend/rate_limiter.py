@@ -0,0 +1,187 @@
+"""
+Rate Limiter - token buckets and concurrency caps for expensive endpoints
+Each limited route has a token bucket per client (the API key if it is a
+valid one, otherwise the client IP) and one in-flight cap shared by
+everyone, so a misbehaving dashboard or script can't keep the single core
+busy with benchmarks, GitHub update checks, shell commands or analytics
+queries.
+Requests over either limit get 429 with Retry-After.
+
+Policy comes from the "rate_limits" section of data/system_limits.json:
+
+    "routes": {"/api/system/benchmarks": {"rate_per_minute": 6, "burst": 2,
+                                          "max_concurrent": 1}, ...}
+
+Keys are Flask route rules, so /api/logs/<int:id> style routes work too.
+"""
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import g, jsonify, request
+from auth import verify_api_key
+from config import API_KEY_HEADER
+from telemetry import telemetry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLICY = {
+    'enabled': True,
+    # Buckets kept before the least recently used client is forgotten
+    'max_clients': 1000,
+    # API key check results remembered (by key hash) to spare the database
+    'key_cache_seconds': 60,
+    'key_cache_size': 256,
+    'routes': {}
+}
+
+
+class TokenBucket:
+    """``rate`` tokens per second up to ``burst``; not thread-safe on its own"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now):
+        """0 if a token was taken, else seconds until one is available"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+        return (1 - self.tokens) / self.rate if self.rate else float('inf')
+
+
+class RateLimiter:
+    """Per-client token buckets and per-route concurrency caps"""
+
+    def __init__(self, limits_file=None, clock=time.monotonic):
+        self.clock = clock
+        self.limits_file = limits_file or os.path.join(
+            os.path.dirname(__file__), 'data', 'system_limits.json')
+        self.policy = self.load_policy()
+        self.buckets = OrderedDict()   # (route, client) -> TokenBucket
+        self.verified_keys = OrderedDict()  # key hash -> (valid, checked at)
+        self.in_flight = {route: threading.BoundedSemaphore(rule['max_concurrent'])
+                          for route, rule in self.policy['routes'].items()
+                          if rule.get('max_concurrent')}
+        self._lock = threading.Lock()
+        telemetry.describe('rate_limited_total', 'counter',
+                           'Requests refused with 429, by route and limit hit')
+
+    def load_policy(self):
+        policy = dict(DEFAULT_POLICY)
+        try:
+            with open(self.limits_file, 'r') as f:
+                policy.update(json.load(f).get('system_limits', {}).get('rate_limits', {}))
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.warning("Rate limiter: using default policy (%s)", e)
+        return policy
+
+    def _key_is_valid(self, api_key, key_hash):
+        """verify_api_key(), cached briefly; made-up keys must not each get
+        a fresh bucket"""
+        now = self.clock()
+        with self._lock:
+            cached = self.verified_keys.get(key_hash)
+            if cached is not None and now - cached[1] < self.policy['key_cache_seconds']:
+                return cached[0]
+        try:
+            valid = verify_api_key(api_key)
+        except Exception:
+            valid = False
+        with self._lock:
+            self.verified_keys[key_hash] = (valid, now)
+            self.verified_keys.move_to_end(key_hash)
+            if len(self.verified_keys) > self.policy['key_cache_size']:
+                self.verified_keys.popitem(last=False)
+        return valid
+
+    def client_id(self):
+        """Valid API key (hashed, never kept as-is), else the client address"""
+        api_key = request.headers.get(API_KEY_HEADER) or request.args.get('api_key')
+        if api_key:
+            key_hash = hashlib.sha256(api_key.encode()).hexdigest()
+            if self._key_is_valid(api_key, key_hash):
+                return 'key:' + key_hash[:16]
+        return f'ip:{request.remote_addr}'
+
+    def _take(self, route, rule, client):
+        """Seconds to wait before ``client`` may call ``route`` again (0 = go)"""
+        rate = rule.get('rate_per_minute')
+        if not rate:
+            return 0
+        key = (route, client)
+        with self._lock:
+            now = self.clock()
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                bucket = self.buckets[key] = TokenBucket(rate / 60.0, rule.get('burst', 1), now)
+                if len(self.buckets) > self.policy['max_clients']:
+                    self.buckets.popitem(last=False)
+            else:
+                self.buckets.move_to_end(key)
+            return bucket.take(now)
+
+    def _refuse(self, route, reason, retry_after):
+        telemetry.inc('rate_limited_total', route=route, limit=reason)
+        retry_after = max(1, math.ceil(retry_after))
+        response = jsonify({
+            'success': False,
+            'error': 'Too many requests' if reason == 'rate' else 'Too many concurrent requests',
+            'retry_after': retry_after
+        })
+        response.status_code = 429
+        response.headers['Retry-After'] = str(retry_after)
+        return response
+
+    # -- Flask integration --------------------------------------------------
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        if not self.policy['enabled'] or request.url_rule is None:
+            return None
+        route = request.url_rule.rule
+        rule = self.policy['routes'].get(route)
+        if rule is None or request.method == 'OPTIONS':
+            return None
+
+        wait = self._take(route, rule, self.client_id())
+        if wait:
+            return self._refuse(route, 'rate', wait)
+
+        semaphore = self.in_flight.get(route)
+        if semaphore is not None:
+            if not semaphore.acquire(blocking=False):
+                return self._refuse(route, 'concurrency', rule.get('retry_after_seconds', 1))
+            g.rate_limit_semaphore = semaphore
+        return None
+
+    def _teardown_request(self, exc=None):
+        semaphore = g.pop('rate_limit_semaphore', None)
+        if semaphore is not None:
+            semaphore.release()
+
+    def get_status(self):
+        with self._lock:
+            clients = len(self.buckets)
+        return {
+            'enabled': self.policy['enabled'],
+            'tracked_clients': clients,
+            'routes': self.policy['routes']
+        }
+
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,46 @@
+"""
+Request Telemetry - Flask hooks feeding the telemetry registry
+Times every request into http_request_duration_seconds by route, method
+and status and counts requests in flight. Kept apart from telemetry.py so
+the registry (used by the database layer, sensors and cloud clients) does
+not depend on Flask.
+"""
+import time
+from flask import g, request
+from telemetry import telemetry
+
+UNMATCHED_ROUTE = '<unmatched>'
+
+
+class RequestTelemetry:
+    """Per-route latency histograms and in-flight counts for a Flask app"""
+
+    def __init__(self, registry=telemetry):
+        self.registry = registry
+
+    def init_app(self, app):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self):
+        g.telemetry_route = request.url_rule.rule if request.url_rule else UNMATCHED_ROUTE
+        g.telemetry_started = time.perf_counter()
+        self.registry.inc('http_requests_in_flight', route=g.telemetry_route)
+
+    def _after_request(self, response):
+        g.telemetry_status = response.status_code
+        return response
+
+    def _teardown_request(self, exc=None):
+        started = g.pop('telemetry_started', None)
+        if started is None:
+            return
+        route = g.pop('telemetry_route')
+        status = g.pop('telemetry_status', 500)
+        self.registry.inc('http_requests_in_flight', -1, route=route)
+        self.registry.observe('http_request_duration_seconds', time.perf_counter() - started,
+                              route=route, method=request.method, status=str(status))
+
+
+request_telemetry = RequestTelemetry()
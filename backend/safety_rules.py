@@ -6,9 +6,9 @@ NO cloud AI can override these safety rules.
 
 import logging
 from datetime import datetime
-from database import create_alert, log_irrigation_event
+from database import log_irrigation_event
+from alert_manager import alert_manager
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SafetyRulesEngine:
@@ -59,13 +59,15 @@ class SafetyRulesEngine:
         
         for allowed, reason in checks:
             if not allowed:
-                logger.warning(f"SAFETY BLOCK: {reason}")
-                create_alert('safety_block', 'warning', f'Irrigation blocked: {reason}')
+                logger.warning("SAFETY BLOCK: %s", reason)
+                alert_manager.raise_alert('safety_block', 'warning', f'Irrigation blocked: {reason}')
                 return False, reason, 0
         
+        alert_manager.clear('safety_block')
+        
         duration = self._calculate_safe_duration(sensor_data, ai_recommendation)
         
-        logger.info(f"SAFETY CHECK PASSED - Irrigation allowed for {duration}s")
+        logger.info("SAFETY CHECK PASSED - Irrigation allowed for %ss", duration)
         return True, "All safety checks passed", duration
     
     def _check_battery_level(self, system_status):
@@ -88,7 +90,7 @@ class SafetyRulesEngine:
             return False, f"Soil already wet ({moisture}% > {self.max_soil_moisture}%)"
         
         if moisture < self.min_soil_moisture:
-            logger.warning(f"Soil extremely dry ({moisture}%), allowing irrigation")
+            logger.warning("Soil extremely dry (%s%%), allowing irrigation", moisture)
         
         return True, "Soil moisture in acceptable range"
     
@@ -178,7 +180,7 @@ class SafetyRulesEngine:
         final_duration = min(safe_duration, max_duration_by_budget)
         
         if final_duration != ai_duration:
-            logger.info(f"Duration adjusted: AI={ai_duration}s, Safe={final_duration}s")
+            logger.info("Duration adjusted: AI=%ss, Safe=%ss", ai_duration, final_duration)
         
         return final_duration
     
@@ -186,12 +188,12 @@ class SafetyRulesEngine:
         """Record that irrigation has started"""
         self.last_irrigation_time = datetime.now()
         self.consecutive_irrigations += 1
-        logger.info(f"Irrigation started - Consecutive count: {self.consecutive_irrigations}")
+        logger.info("Irrigation started - Consecutive count: %s", self.consecutive_irrigations)
     
     def record_irrigation_complete(self, water_used):
         """Record irrigation completion and water usage"""
         self.daily_water_usage += water_used
-        logger.info(f"Irrigation complete - Daily usage: {self.daily_water_usage:.2f}L")
+        logger.info("Irrigation complete - Daily usage: %.2fL", self.daily_water_usage)
     
     def reset_consecutive_count(self):
         """Reset consecutive irrigation counter (call after successful wait period)"""
@@ -225,7 +227,7 @@ class SafetyRulesEngine:
         Can only be re-enabled manually.
         """
         logger.critical("EMERGENCY OVERRIDE: All irrigation disabled")
-        create_alert('emergency_override', 'critical', 'Emergency override activated - irrigation disabled')
+        alert_manager.raise_alert('emergency_override', 'critical', 'Emergency override activated - irrigation disabled')
         return True
 
 class CloudAIValidator:
@@ -260,11 +262,11 @@ class CloudAIValidator:
         
         for valid, reason in checks:
             if not valid:
-                logger.warning(f"AI VALIDATION FAILED: {reason}")
+                logger.warning("AI VALIDATION FAILED: %s", reason)
                 return False, reason, None
         
         sanitized = self._sanitize_recommendation(ai_response)
-        logger.info(f"AI recommendation validated: {sanitized['action']} for {sanitized['duration']}s")
+        logger.info("AI recommendation validated: %s for %ss", sanitized['action'], sanitized['duration'])
         
         return True, "AI recommendation valid", sanitized
     
@@ -323,7 +325,7 @@ class CloudAIValidator:
             return False, f"AI wants to irrigate but soil is wet ({moisture}%)"
         
         if action == 'SKIP' and moisture < 15:
-            logger.warning(f"AI wants to skip but soil is very dry ({moisture}%)")
+            logger.warning("AI wants to skip but soil is very dry (%s%%)", moisture)
         
         return True, "AI recommendation consistent with sensors"
     
@@ -340,6 +342,7 @@ class CloudAIValidator:
         }
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
     safety = SafetyRulesEngine()
     
     test_sensor_data = {
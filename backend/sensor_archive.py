@@ -0,0 +1,387 @@
+"""
+Sensor Archive - compact cold storage for closed days of sensor_readings
+Each UTC day is written once to data/archive/sensors-YYYY-MM-DD.oca and its
+rows removed from SQLite. Inside a file every column is stored on its own:
+integer columns (id, timestamp, zone_id) as deltas, REAL columns as the XOR
+of each value's bits with the previous one, each column zlib-compressed.
+Files are opened with mmap and only the columns a query needs are decoded,
+straight into NumPy arrays when NumPy is installed.
+"""
+import heapq
+import importlib.util
+import mmap
+import operator
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from itertools import accumulate, chain
+from database import get_db, iter_rows, keyset_query, now_ms, sensor_buffer, SENSOR_METRICS
+
+# numpy is optional and costs ~100 ms to import on a Pi; it is only loaded
+# the first time an archived segment is decoded
+NUMPY_AVAILABLE = importlib.util.find_spec('numpy') is not None
+np = None
+
+
+def _numpy():
+    global np
+    if np is None:
+        import numpy
+        np = numpy
+    return np
+
+ARCHIVE_DIR = os.path.join(os.path.dirname(__file__), 'data', 'archive')
+
+DAY_MS = 24 * 60 * 60 * 1000
+MAGIC = b'OCSA'
+FORMAT_VERSION = 1
+
+ENCODING_DELTA = 1  # int64 differences from the previous value
+ENCODING_XOR = 2    # float64 bits XOR the previous value's bits; NULL -> NaN
+
+COLUMNS = (
+    ('id', ENCODING_DELTA),
+    ('timestamp', ENCODING_DELTA),
+    ('zone_id', ENCODING_DELTA),
+) + tuple((metric, ENCODING_XOR) for metric in SENSOR_METRICS)
+
+# magic, version, column count, day start (epoch ms), row count
+_HEADER = struct.Struct('<4sHHqI')
+# column name, encoding, offset from start of file, compressed length
+_COLUMN = struct.Struct('<16sBQI')
+
+_FILE_RE = re.compile(r'^sensors-(\d{4}-\d{2}-\d{2})\.oca$')
+
+_BIG_ENDIAN = sys.byteorder == 'big'
+
+
+def day_name(day_start):
+    return datetime.fromtimestamp(day_start / 1000.0, timezone.utc).strftime('%Y-%m-%d')
+
+
+def day_path(day_start, archive_dir=None):
+    return os.path.join(archive_dir or ARCHIVE_DIR, f'sensors-{day_name(day_start)}.oca')
+
+
+def list_days(archive_dir=None):
+    """Day starts (epoch ms) of every archive file, oldest first"""
+    directory = archive_dir or ARCHIVE_DIR
+    if not os.path.isdir(directory):
+        return []
+    days = []
+    for name in os.listdir(directory):
+        match = _FILE_RE.match(name)
+        if match:
+            day = datetime.strptime(match.group(1), '%Y-%m-%d').replace(tzinfo=timezone.utc)
+            days.append(int(day.timestamp() * 1000))
+    return sorted(days)
+
+
+def _to_le_bytes(values):
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_le_bytes(data, typecode):
+    values = array(typecode)
+    values.frombytes(data)
+    if _BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _encode(values, encoding):
+    if encoding == ENCODING_DELTA:
+        raw = array('q', values)
+        encoded = array('q', (value - previous for previous, value in zip(chain((0,), raw), raw)))
+    else:
+        raw = array('q')
+        raw.frombytes(array('d', (float('nan') if v is None else v for v in values)).tobytes())
+        encoded = array('q', (value ^ previous for previous, value in zip(chain((0,), raw), raw)))
+    return zlib.compress(_to_le_bytes(encoded), 6)
+
+
+def _decode(data, encoding):
+    """Compressed column bytes -> numpy array, or array('q'/'d') without numpy"""
+    raw = zlib.decompress(data)
+    if NUMPY_AVAILABLE:
+        np = _numpy()
+        encoded = np.frombuffer(raw, dtype='<i8')
+        if encoding == ENCODING_DELTA:
+            return np.cumsum(encoded)
+        return np.bitwise_xor.accumulate(encoded).view('<f8')
+
+    encoded = _from_le_bytes(raw, 'q')
+    if encoding == ENCODING_DELTA:
+        return array('q', accumulate(encoded))
+    decoded = array('d')
+    decoded.frombytes(array('q', accumulate(encoded, operator.xor)).tobytes())
+    return decoded
+
+
+def write_chunk(path, day_start, rows):
+    """Write rows (tuples in COLUMNS order, sorted by timestamp) atomically"""
+    columns = [_encode([row[i] for row in rows], encoding)
+               for i, (_, encoding) in enumerate(COLUMNS)]
+
+    offset = _HEADER.size + _COLUMN.size * len(COLUMNS)
+    directory = []
+    for (name, encoding), data in zip(COLUMNS, columns):
+        directory.append(_COLUMN.pack(name.encode(), encoding, offset, len(data)))
+        offset += len(data)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(COLUMNS), day_start, len(rows)))
+        f.writelines(directory)
+        f.writelines(columns)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class ArchiveChunk:
+    """Memory-mapped reader for one archive file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file; mmap refuses zero-length maps
+            self._file.close()
+            raise ValueError(f"Empty archive file: {path}")
+
+        magic, version, column_count, self.day_start, self.row_count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Not a sensor archive (v{FORMAT_VERSION}): {path}")
+
+        self._columns = {}
+        for i in range(column_count):
+            name, encoding, offset, length = _COLUMN.unpack_from(
+                self._mm, _HEADER.size + i * _COLUMN.size)
+            self._columns[name.rstrip(b'\0').decode()] = (encoding, offset, length)
+
+    def column(self, name):
+        encoding, offset, length = self._columns[name]
+        return _decode(self._mm[offset:offset + length], encoding)
+
+    def rows(self, start=None, end=None, newest_first=False):
+        """Iterator of row dicts with ``start <= timestamp <= end``, NaN metrics as None.
+
+        Columns are decoded up front, so the iterator stays valid after
+        close(); dicts are only built as rows are consumed.
+        """
+        timestamps = self.column('timestamp')
+        if NUMPY_AVAILABLE:
+            np = _numpy()
+            lo = 0 if start is None else int(np.searchsorted(timestamps, start, 'left'))
+            hi = len(timestamps) if end is None else int(np.searchsorted(timestamps, end, 'right'))
+        else:
+            lo = 0 if start is None else bisect_left(timestamps, start)
+            hi = len(timestamps) if end is None else bisect_right(timestamps, end)
+
+        if newest_first:
+            order = range(hi - 1, lo - 1, -1)
+        else:
+            order = range(lo, hi)
+        if not order:
+            return iter(())
+
+        columns = [(name, encoding, self.column(name)) for name, encoding in COLUMNS]
+        return (_row_at(columns, i) for i in order)
+
+    def close(self):
+        if getattr(self, '_mm', None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _row_at(columns, i):
+    row = {}
+    for name, encoding, values in columns:
+        value = values[i]
+        if encoding == ENCODING_XOR:
+            row[name] = None if value != value else float(value)
+        else:
+            row[name] = int(value)
+    return row
+
+
+def _read_day(day_start, archive_dir=None):
+    path = day_path(day_start, archive_dir)
+    if not os.path.exists(path):
+        return []
+    with ArchiveChunk(path) as chunk:
+        return [tuple(row[name] for name, _ in COLUMNS) for row in chunk.rows()]
+
+
+def archive_day(day_start, archive_dir=None, batch_size=500):
+    """Move one UTC day of sensor_readings into its archive file.
+
+    Late rows for a day that is already archived are merged into the file.
+    Returns the number of rows moved.
+    """
+    day_end = day_start + DAY_MS
+    names = ', '.join(name for name, _ in COLUMNS)
+    with get_db(readonly=True) as conn:
+        rows = [tuple(row) for row in conn.execute(f'''
+            SELECT {names} FROM sensor_readings
+            WHERE timestamp >= ? AND timestamp < ?
+            ORDER BY timestamp, id
+        ''', (day_start, day_end))]
+    if not rows:
+        return 0
+
+    # Keyed by id so a rerun after an interrupted delete doesn't duplicate rows
+    merged = {row[0]: row for row in _read_day(day_start, archive_dir) + rows}
+    merged = sorted(merged.values(), key=lambda row: (row[1], row[0]))
+    write_chunk(day_path(day_start, archive_dir), day_start, merged)
+
+    # Only rows that made it into the file; new ones keep their place
+    max_id = max(row[0] for row in rows)
+    while True:
+        with get_db() as conn:
+            cursor = conn.execute('''
+                DELETE FROM sensor_readings WHERE rowid IN (
+                    SELECT rowid FROM sensor_readings
+                    WHERE timestamp >= ? AND timestamp < ? AND id <= ? LIMIT ?
+                )
+            ''', (day_start, day_end, max_id, batch_size))
+            conn.commit()
+        if cursor.rowcount < batch_size:
+            break
+    sensor_buffer.invalidate()
+    return len(rows)
+
+
+def archive_closed_days(keep_days=7, archive_dir=None, now=None):
+    """Archive every whole UTC day older than ``keep_days``; {day: rows}"""
+    now = now if now is not None else now_ms()
+    cutoff = now - now % DAY_MS - keep_days * DAY_MS
+    archived = {}
+    day = None
+    while True:
+        with get_db(readonly=True) as conn:
+            oldest = conn.execute(
+                'SELECT MIN(timestamp) FROM sensor_readings WHERE timestamp >= ?',
+                (0 if day is None else day + DAY_MS,)).fetchone()[0]
+        if oldest is None or oldest >= cutoff:
+            return archived
+        day = oldest - oldest % DAY_MS
+        archived[day_name(day)] = archive_day(day, archive_dir)
+
+
+def prune_archive(keep_days, archive_dir=None, now=None):
+    """Delete archive files older than ``keep_days`` (0 keeps everything)"""
+    if not keep_days:
+        return []
+    now = now if now is not None else now_ms()
+    cutoff = now - keep_days * DAY_MS
+    removed = []
+    for day in list_days(archive_dir):
+        if day + DAY_MS <= cutoff:
+            os.remove(day_path(day, archive_dir))
+            removed.append(day_name(day))
+    return removed
+
+
+def _before_cursor(row, before_ts, before_id):
+    """True if ``row`` sorts after the (before_ts, before_id) keyset cursor"""
+    if before_ts is None:
+        return True
+    if row['timestamp'] != before_ts:
+        return row['timestamp'] < before_ts
+    return before_id is not None and row['id'] < before_id
+
+
+def _iter_archive(start, end, before_ts, before_id, archive_dir):
+    """Archived rows newest first, decoding one day file at a time"""
+    upper = end if before_ts is None else (before_ts if end is None else min(end, before_ts))
+    for day in reversed(list_days(archive_dir)):
+        if upper is not None and day > upper:
+            continue
+        if start is not None and day + DAY_MS <= start:
+            break
+        with ArchiveChunk(day_path(day, archive_dir)) as chunk:
+            rows = chunk.rows(start, upper, newest_first=True)
+        for row in rows:
+            if _before_cursor(row, before_ts, before_id):
+                yield row
+
+
+def iter_sensor_readings(limit=100, start=None, end=None, before_ts=None, before_id=None,
+                         after_id=None, archive_dir=None, chunk_size=500):
+    """Raw readings across both tiers as a generator, newest first.
+
+    Hot SQLite rows and archive files are merged lazily on (timestamp, id),
+    so memory is bounded by one chunk plus one archive day's columns whatever
+    ``limit`` is. ``after_id`` tails new rows in id order; those are always
+    still in SQLite, so the archive is skipped.
+    """
+    if limit <= 0:
+        return
+    sql, params = keyset_query('sensor_readings', start, end, before_ts, before_id, after_id)
+    hot = iter_rows(sql, (*params, limit), chunk_size)
+    if after_id is not None:
+        yield from hot
+        return
+
+    merged = heapq.merge(hot, _iter_archive(start, end, before_ts, before_id, archive_dir),
+                         key=lambda row: (-row['timestamp'], -row['id']))
+    previous_id = None
+    try:
+        for row in merged:
+            # A day being archived can briefly be in both tiers
+            if row['id'] == previous_id:
+                continue
+            previous_id = row['id']
+            yield row
+            limit -= 1
+            if not limit:
+                return
+    finally:
+        # Release the read cursor now rather than when the generator is collected
+        hot.close()
+
+
+def get_sensor_readings(limit=100, start=None, end=None, before_ts=None, before_id=None,
+                        after_id=None, archive_dir=None):
+    """One page of raw readings (see iter_sensor_readings) as a list"""
+    return list(iter_sensor_readings(limit, start, end, before_ts, before_id, after_id, archive_dir))
+
+
+def get_archive_info(archive_dir=None):
+    directory = archive_dir or ARCHIVE_DIR
+    days = list_days(directory)
+    size = sum(os.path.getsize(day_path(day, directory)) for day in days)
+    return {
+        'files': len(days),
+        'size_bytes': size,
+        'oldest_day': day_name(days[0]) if days else None,
+        'newest_day': day_name(days[-1]) if days else None,
+        'numpy': NUMPY_AVAILABLE
+    }
+
+
+if __name__ == '__main__':
+    from database import init_database
+    init_database()
+    print(archive_closed_days())
+    print(get_archive_info())
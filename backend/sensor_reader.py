@@ -1,7 +1,11 @@
+import logging
 import random
 import json
 import os
 from datetime import datetime
+from telemetry import telemetry
+
+logger = logging.getLogger(__name__)
 
 try:
     import RPi.GPIO as GPIO
@@ -17,7 +21,7 @@ class SensorReader:
         if self.gpio_available:
             self.setup_gpio()
         
-        print(f"Sensor Reader initialized (GPIO: {self.gpio_available})")
+        logger.info("Sensor Reader initialized (GPIO: %s)", self.gpio_available)
     
     def load_calibration(self):
         data_dir = os.path.join(os.path.dirname(__file__), 'data')
@@ -33,9 +37,9 @@ class SensorReader:
     def setup_gpio(self):
         try:
             GPIO.setmode(GPIO.BCM)
-            print("GPIO initialized for sensors")
+            logger.info("GPIO initialized for sensors")
         except Exception as e:
-            print(f"GPIO setup failed: {e}")
+            logger.warning("GPIO setup failed: %s", e)
             self.gpio_available = False
     
     def read_soil_moisture(self):
@@ -43,7 +47,7 @@ class SensorReader:
             try:
                 pass
             except Exception as e:
-                print(f"Error reading soil moisture: {e}")
+                logger.error("Reading soil moisture failed: %s", e)
                 return self._simulate_soil_moisture()
         else:
             return self._simulate_soil_moisture()
@@ -53,7 +57,7 @@ class SensorReader:
             try:
                 pass
             except Exception as e:
-                print(f"Error reading temperature: {e}")
+                logger.error("Reading temperature failed: %s", e)
                 return self._simulate_temperature()
         else:
             return self._simulate_temperature()
@@ -63,7 +67,7 @@ class SensorReader:
             try:
                 pass
             except Exception as e:
-                print(f"Error reading humidity: {e}")
+                logger.error("Reading humidity failed: %s", e)
                 return self._simulate_humidity()
         else:
             return self._simulate_humidity()
@@ -73,7 +77,7 @@ class SensorReader:
             try:
                 pass
             except Exception as e:
-                print(f"Error reading flow rate: {e}")
+                logger.error("Reading flow rate failed: %s", e)
                 return 0.0
         else:
             return 0.0
@@ -83,7 +87,7 @@ class SensorReader:
             try:
                 pass
             except Exception as e:
-                print(f"Error reading pressure: {e}")
+                logger.error("Reading pressure failed: %s", e)
                 return self._simulate_pressure()
         else:
             return self._simulate_pressure()
@@ -117,6 +121,8 @@ class SensorReader:
         return round(base + variation, 2)
     
     def read_all_sensors(self):
+        telemetry.inc('sensor_reads_total', reader='sensor_reader',
+                      source='gpio' if self.gpio_available else 'simulated')
         return {
             'soil_moisture': self.read_soil_moisture(),
             'temperature': self.read_temperature(),
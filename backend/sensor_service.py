@@ -1,8 +1,14 @@
+import logging
 import time
 import random
 from datetime import datetime
-from database import save_sensor_reading, create_alert
-from config import SENSOR_READ_INTERVAL, ENABLE_GPIO, SOIL_MOISTURE_THRESHOLD
+from database import save_sensor_reading, flush_writes
+from alert_manager import alert_manager
+from event_hub import event_hub
+from telemetry import telemetry
+from config import SENSOR_READ_INTERVAL, ENABLE_GPIO, SOIL_MOISTURE_THRESHOLD, SOIL_MOISTURE_HYSTERESIS
+
+logger = logging.getLogger(__name__)
 
 try:
     if ENABLE_GPIO:
@@ -15,7 +21,7 @@ try:
         GPIO_AVAILABLE = False
 except ImportError:
     GPIO_AVAILABLE = False
-    print("GPIO libraries not available. Running in simulation mode.")
+    logger.info("GPIO libraries not available. Running in simulation mode.")
 
 class SensorService:
     def __init__(self):
@@ -31,9 +37,9 @@ class SensorService:
             self.ads = ADS.ADS1115(i2c)
             self.soil_channel = AnalogIn(self.ads, ADS.P0)
             self.temp_channel = AnalogIn(self.ads, ADS.P1)
-            print("GPIO sensors initialized")
+            logger.info("GPIO sensors initialized")
         except Exception as e:
-            print(f"GPIO setup failed: {e}")
+            logger.warning("GPIO setup failed: %s", e)
             self.gpio_available = False
     
     def read_soil_moisture(self):
@@ -43,7 +49,7 @@ class SensorService:
                 moisture = (voltage / 3.3) * 100
                 return round(moisture, 2)
             except Exception as e:
-                print(f"Error reading soil moisture: {e}")
+                logger.error("Reading soil moisture failed: %s", e)
                 return self._simulate_soil_moisture()
         else:
             return self._simulate_soil_moisture()
@@ -55,7 +61,7 @@ class SensorService:
                 temp = (voltage - 0.5) * 100
                 return round(temp, 2)
             except Exception as e:
-                print(f"Error reading temperature: {e}")
+                logger.error("Reading temperature failed: %s", e)
                 return self._simulate_temperature()
         else:
             return self._simulate_temperature()
@@ -68,7 +74,7 @@ class SensorService:
                 humidity = dht_device.humidity
                 return round(humidity, 2)
             except Exception as e:
-                print(f"Error reading humidity: {e}")
+                logger.error("Reading humidity failed: %s", e)
                 return self._simulate_humidity()
         else:
             return self._simulate_humidity()
@@ -78,7 +84,7 @@ class SensorService:
             try:
                 pass
             except Exception as e:
-                print(f"Error reading flow rate: {e}")
+                logger.error("Reading flow rate failed: %s", e)
                 return self._simulate_flow_rate()
         else:
             return self._simulate_flow_rate()
@@ -88,7 +94,7 @@ class SensorService:
             try:
                 pass
             except Exception as e:
-                print(f"Error reading pressure: {e}")
+                logger.error("Reading pressure failed: %s", e)
                 return self._simulate_pressure()
         else:
             return self._simulate_pressure()
@@ -117,6 +123,8 @@ class SensorService:
         return round(base + variation, 2)
     
     def read_all_sensors(self):
+        telemetry.inc('sensor_reads_total', reader='sensor_service',
+                      source='gpio' if self.gpio_available else 'simulated')
         soil_moisture = self.read_soil_moisture()
         temperature = self.read_temperature()
         humidity = self.read_humidity()
@@ -124,8 +132,10 @@ class SensorService:
         pressure = self.read_pressure()
         
         if soil_moisture < SOIL_MOISTURE_THRESHOLD:
-            create_alert('low_moisture', 'warning', 
-                        f'Soil moisture low: {soil_moisture}%')
+            alert_manager.raise_alert('low_moisture', 'warning',
+                                      f'Soil moisture low: {soil_moisture}%')
+        elif soil_moisture >= SOIL_MOISTURE_THRESHOLD + SOIL_MOISTURE_HYSTERESIS:
+            alert_manager.clear('low_moisture')
         
         return {
             'soil_moisture': soil_moisture,
@@ -138,7 +148,7 @@ class SensorService:
     
     def start_monitoring(self):
         self.running = True
-        print("Sensor monitoring started...")
+        logger.info("Sensor monitoring started...")
         
         while self.running:
             try:
@@ -148,20 +158,25 @@ class SensorService:
                     data['temperature'],
                     data['humidity'],
                     data['flow_rate'],
-                    data['pressure']
+                    data['pressure'],
+                    buffered=True
                 )
-                print(f"Sensors read: Soil={data['soil_moisture']}%, Temp={data['temperature']}°C")
+                event_hub.update('sensors', data)
+                logger.debug("Sensors read: Soil=%s%%, Temp=%s°C", data['soil_moisture'], data['temperature'])
                 time.sleep(SENSOR_READ_INTERVAL)
             except KeyboardInterrupt:
-                print("\nSensor monitoring stopped")
+                logger.info("Sensor monitoring stopped")
                 self.running = False
                 break
             except Exception as e:
-                print(f"Error in sensor monitoring: {e}")
+                logger.error("Sensor monitoring loop failed: %s", e)
                 time.sleep(SENSOR_READ_INTERVAL)
+        
+        flush_writes()
     
     def stop_monitoring(self):
         self.running = False
+        flush_writes()
 
 if __name__ == '__main__':
     from database import init_database
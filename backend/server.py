@@ -0,0 +1,118 @@
+"""
+Production Server - waitress (pure-Python, multi-threaded WSGI) for api_server
+Replaces the Werkzeug dev server on the device. There is no reloader (one
+process instead of two) and no debugger. It runs a fixed pool of worker
+threads, caps connections and queued requests, and keeps connections
+alive between dashboard polls.
+
+On SIGTERM/SIGINT it drains: it stops accepting, ends live /api/stream
+connections, finishes in-flight requests (up to SERVER_DRAIN_SECONDS) and
+then stops the worker pool.
+"""
+import signal
+import time
+from config import (SERVER_HOST, SERVER_PORT, SERVER_THREADS, SERVER_CONNECTION_LIMIT,
+                    SERVER_BACKLOG, SERVER_QUEUE_LIMIT, SERVER_KEEPALIVE_SECONDS,
+                    SERVER_DRAIN_SECONDS)
+
+try:
+    from waitress.server import create_server
+    from waitress import wasyncore
+    WAITRESS_AVAILABLE = True
+except ImportError:
+    WAITRESS_AVAILABLE = False
+
+OVERLOADED_BODY = b'{"success": false, "error": "Server busy, retry shortly"}'
+
+
+class ProductionServer:
+    """waitress server with load shedding and graceful drain"""
+
+    def __init__(self, app, host=SERVER_HOST, port=SERVER_PORT, threads=SERVER_THREADS,
+                 queue_limit=SERVER_QUEUE_LIMIT, drain_seconds=SERVER_DRAIN_SECONDS,
+                 on_drain=None):
+        self.app = app
+        self.queue_limit = queue_limit
+        self.drain_seconds = drain_seconds
+        self.on_drain = on_drain
+        self.draining = False
+        self.shed = 0
+        self.server = create_server(
+            self.wsgi, host=host, port=port, threads=threads,
+            connection_limit=SERVER_CONNECTION_LIMIT, backlog=SERVER_BACKLOG,
+            channel_timeout=SERVER_KEEPALIVE_SECONDS,
+            ident='OneCore'
+        )
+
+    def wsgi(self, environ, start_response):
+        """Shed load once the request queue is full; close keep-alives while draining"""
+        if len(self.server.task_dispatcher.queue) > self.queue_limit:
+            self.shed += 1
+            start_response('503 Service Unavailable', [
+                ('Content-Type', 'application/json'),
+                ('Retry-After', '1'),
+                ('Content-Length', str(len(OVERLOADED_BODY)))
+            ])
+            return [OVERLOADED_BODY]
+        if not self.draining:
+            return self.app(environ, start_response)
+
+        # A request that slipped in while draining: answer it, then hang up
+        def closing_start_response(status, headers, exc_info=None):
+            headers = [(k, v) for k, v in headers if k.lower() != 'connection']
+            return start_response(status, headers + [('Connection', 'close')], exc_info)
+        return self.app(environ, closing_start_response)
+
+    def _busy(self):
+        """In-flight or queued requests, or responses still being written"""
+        dispatcher = self.server.task_dispatcher
+        if dispatcher.active_count or dispatcher.queue:
+            return True
+        return any(getattr(channel, 'total_outbufs_len', 0)
+                   for channel in list(self.server._map.values()))
+
+    def drain(self, signum=None, frame=None):
+        """Signal handler: ask run() to stop accepting and finish in-flight work"""
+        self.draining = True
+
+    def _start_drain(self):
+        print(f"Draining: no new connections, waiting up to {self.drain_seconds}s for requests")
+        # Close only the listening socket; open channels keep being served.
+        # Done here rather than in the signal handler, which can interrupt
+        # a select() that still holds the socket.
+        wasyncore.dispatcher.close(self.server)
+        if self.on_drain:
+            self.on_drain()
+        return time.time() + self.drain_seconds
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.drain)
+        signal.signal(signal.SIGINT, self.drain)
+        print(f"Serving on http://{self.server.effective_host}:{self.server.effective_port} "
+              f"({self.server.adj.threads} threads, queue limit {self.queue_limit})")
+
+        socket_map = self.server._map
+        deadline = None
+        while socket_map:
+            wasyncore.loop(timeout=self.server.adj.asyncore_loop_timeout, map=socket_map,
+                           use_poll=self.server.adj.asyncore_use_poll, count=1)
+            if self.draining:
+                if deadline is None:
+                    deadline = self._start_drain()
+                if not self._busy() or time.time() > deadline:
+                    break
+
+        self.server.task_dispatcher.shutdown(cancel_pending=True, timeout=1)
+        wasyncore.close_all(socket_map)
+        print(f"Server stopped ({self.shed} requests shed while overloaded)")
+
+
+def serve(app, dev=False, on_drain=None, **options):
+    """Run the app: waitress in production, the Werkzeug debug server with ``dev``"""
+    if dev or not WAITRESS_AVAILABLE:
+        if not dev:
+            print("waitress not installed (pip install waitress); using the threaded dev server")
+        app.run(host=options.get('host', SERVER_HOST), port=options.get('port', SERVER_PORT),
+                debug=dev, threaded=True, use_reloader=dev)
+        return
+    ProductionServer(app, on_drain=on_drain, **options).run()
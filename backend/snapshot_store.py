@@ -0,0 +1,228 @@
+"""
+Snapshot Store - consistent read-only copy of irrigation.db for analytics
+A background thread copies the live database into a file on tmpfs with
+SQLite's online backup API, a few hundred pages per step so the sensor
+loop is never blocked for long. Analytics handlers query the copy through
+SnapshotStore.get_db() and report how old it is.
+"""
+import atexit
+import glob
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import database
+from config import (SNAPSHOT_DIR, SNAPSHOT_INTERVAL_SECONDS, SNAPSHOT_MAX_RESTARTS,
+                    SNAPSHOT_PAGES_PER_STEP)
+
+logger = logging.getLogger(__name__)
+
+
+class _Restarted(Exception):
+    """Stepwise copy kept restarting under concurrent writes"""
+
+
+class SnapshotStore:
+    """Periodically refreshed, read-only snapshot of the main database"""
+
+    def __init__(self, directory=SNAPSHOT_DIR, interval=SNAPSHOT_INTERVAL_SECONDS,
+                 pages_per_step=SNAPSHOT_PAGES_PER_STEP, max_restarts=SNAPSHOT_MAX_RESTARTS):
+        self.directory = directory or tempfile.gettempdir()
+        self.interval = interval
+        self.pages_per_step = pages_per_step
+        self.max_restarts = max_restarts
+        self.last_restarts = 0
+        self.path = None
+        self.generation = 0
+        # generation -> {'path', 'users' (reads in progress), 'conns' (cached per thread)}
+        self._generations = {}
+        self.taken_at = None
+        self.last_duration = None
+        self.running = False
+        self.thread = None
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._wake = threading.Event()
+
+    def _snapshot_path(self, generation):
+        name = os.path.splitext(os.path.basename(database.DB_PATH))[0]
+        return os.path.join(self.directory, f'{name}-snapshot-{generation}.db')
+
+    def _remove_leftovers(self):
+        """Snapshot files a previous process didn't get to delete"""
+        name = os.path.splitext(os.path.basename(database.DB_PATH))[0]
+        for path in glob.glob(os.path.join(self.directory, f'{name}-snapshot*.db')):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def refresh(self):
+        """Copy the live database into a new generation file and swap it in.
+
+        Each generation gets its own file, so readers never see a file being
+        replaced under them (Windows refuses to, Linux would leave cached
+        connections on the old inode); the old file is deleted once its last
+        reader is done with it.
+        """
+        with self._refresh_lock:
+            started = time.time()
+            if self.generation == 0:
+                self._remove_leftovers()
+            generation = self.generation + 1
+            path = self._snapshot_path(generation)
+            if os.path.exists(path):
+                os.remove(path)
+
+            state = {'remaining': None, 'restarts': 0}
+
+            def progress(status, remaining, total):
+                if state['remaining'] is not None and remaining > state['remaining']:
+                    state['restarts'] += 1
+                    if state['restarts'] > self.max_restarts:
+                        raise _Restarted()
+                state['remaining'] = remaining
+                if remaining:
+                    time.sleep(0.005)
+
+            target = sqlite3.connect(path)
+            try:
+                with database.get_db(readonly=True) as source:
+                    # Copies pages_per_step pages at a time, releasing the
+                    # source between steps; a write from another connection
+                    # restarts the copy so the result is always consistent.
+                    # The writer commits every second or so, which could keep
+                    # a large copy restarting forever: after max_restarts it
+                    # finishes in one step (one WAL read transaction, which
+                    # never blocks writers)
+                    try:
+                        source.backup(target, pages=self.pages_per_step, progress=progress)
+                    except _Restarted:
+                        source.backup(target)
+                # The copy inherits WAL mode; a rollback-journal file can be
+                # opened immutable by any number of readers
+                target.execute('PRAGMA journal_mode=DELETE')
+            except Exception:
+                target.close()
+                os.remove(path)
+                raise
+            target.close()
+
+            with self._lock:
+                self._generations[generation] = {'path': path, 'users': 0, 'conns': []}
+                self.path = path
+                self.generation = generation
+                self.taken_at = started
+                self.last_duration = time.time() - started
+                self.last_restarts = state['restarts']
+                self._retire()
+            return self.get_status()
+
+    def _retire(self):
+        """Close and delete old generations nobody is reading; caller holds _lock.
+        Files that can't be removed yet (Windows) are retried next time."""
+        for generation, entry in list(self._generations.items()):
+            if generation == self.generation or entry['users']:
+                continue
+            for conn in entry['conns']:
+                conn.close()
+            entry['conns'] = []
+            try:
+                if os.path.exists(entry['path']):
+                    os.remove(entry['path'])
+            except OSError:
+                continue
+            del self._generations[generation]
+
+    def _acquire(self):
+        """(connection, generation) for this thread on the current snapshot,
+        or None before the first one exists"""
+        with self._lock:
+            generation = self.generation
+            entry = self._generations.get(generation)
+            if entry is None:
+                return None
+            cached = getattr(self._local, 'cached', None)
+            if cached and cached[0] == generation:
+                conn = cached[1]
+            else:
+                # The file is never modified once published, so immutable=1
+                # lets SQLite skip locking entirely
+                conn = sqlite3.connect(f'file:{entry["path"]}?mode=ro&immutable=1', uri=True,
+                                       check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                entry['conns'].append(conn)
+                self._local.cached = (generation, conn)
+            entry['users'] += 1
+            return conn, generation
+
+    def _release(self, generation):
+        with self._lock:
+            self._generations[generation]['users'] -= 1
+            if generation != self.generation:
+                self._retire()
+
+    @contextmanager
+    def get_db(self, readonly=True):
+        """Drop-in for database.get_db(readonly=True) that reads the snapshot.
+
+        Falls back to the live database until the first snapshot exists.
+        """
+        acquired = self._acquire()
+        if acquired is None:
+            with database.get_db(readonly=True) as conn:
+                yield conn
+            return
+        conn, generation = acquired
+        try:
+            yield conn
+        finally:
+            self._release(generation)
+
+    def get_status(self):
+        """Snapshot freshness for API responses"""
+        if self.taken_at is None:
+            return {'source': 'live', 'taken_at': None, 'age_seconds': 0}
+        return {
+            'source': 'snapshot',
+            'taken_at': database.ms_to_iso(int(self.taken_at * 1000)),
+            'age_seconds': round(time.time() - self.taken_at, 1),
+            'copy_seconds': round(self.last_duration, 3),
+            'copy_restarts': self.last_restarts
+        }
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='db-snapshot', daemon=True)
+        self.thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Stop refreshing and delete the snapshot file (it lives in RAM)"""
+        self.running = False
+        self._wake.set()
+        with self._refresh_lock, self._lock:
+            # Back to the live database; with no current generation every
+            # file goes, those still being read once their last reader is done
+            self.path = None
+            self.generation += 1
+            self._retire()
+
+    def trigger(self):
+        """Refresh soon, e.g. after a schedule change analytics should see"""
+        self._wake.set()
+
+    def _run(self):
+        while self.running:
+            self._wake.clear()
+            try:
+                self.refresh()
+            except Exception as e:
+                logger.warning("Snapshot refresh failed: %s", e)
+            self._wake.wait(self.interval)
@@ -0,0 +1,162 @@
+"""
+Startup - lazily constructed services and a startup profiler
+Services whose modules pull in heavy dependencies (requests, numpy, psutil,
+hardware fingerprinting) are wrapped in LazyService: the module is imported
+and the object built on first use, or earlier by the warm-up thread that
+api_server starts once it can serve requests.
+
+``python api_server.py --profile-startup`` times every import and service
+construction, prints the slowest and exits non-zero if the server took
+longer than the startup budget to become ready (for CI).
+"""
+import builtins
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """Import and init timings from process start to ready"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ready_at = None
+        self.enabled = False
+        self.imports = []   # (module, self seconds, cumulative seconds)
+        self.phases = []    # (name, seconds)
+        self._original_import = None
+        self._stack = []
+
+    def enable(self):
+        """Start timing imports (call before the imports to be measured)"""
+        if self.enabled:
+            return
+        self.enabled = True
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules or threading.current_thread() is not threading.main_thread():
+            return self._original_import(name, globals, locals, fromlist, level)
+        self._stack.append(0.0)
+        started = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += elapsed
+            self.imports.append((name, elapsed - children, elapsed))
+
+    def disable(self):
+        if self.enabled:
+            builtins.__import__ = self._original_import
+            self.enabled = False
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - started))
+
+    def mark_ready(self):
+        self.ready_at = time.perf_counter()
+
+    def ready_seconds(self):
+        return None if self.ready_at is None else self.ready_at - self.started
+
+    def report(self, budget, top=15):
+        """Print the timings; returns True if ready within ``budget`` seconds"""
+        ready = self.ready_seconds()
+        print("=" * 64)
+        print("STARTUP PROFILE")
+        print("=" * 64)
+        if self.imports:
+            print(f"{'slowest imports (self time)':<40}{'self ms':>12}{'total ms':>12}")
+            for name, own, total in sorted(self.imports, key=lambda i: i[1], reverse=True)[:top]:
+                print(f"  {name:<38}{own * 1000:>12.1f}{total * 1000:>12.1f}")
+        print(f"{'startup phases':<40}{'ms':>12}")
+        for name, seconds in self.phases:
+            print(f"  {name:<38}{seconds * 1000:>12.1f}")
+        print(f"{'lazy services (first use)':<40}{'ms':>12}")
+        for service in LazyService.registry:
+            if service.init_seconds is not None:
+                state = f"{service.init_seconds * 1000:>12.1f}"
+            else:
+                state = f"{'failed' if service.error else 'not built':>12}"
+            print(f"  {service.name:<38}{state}")
+        print("-" * 64)
+        within = ready is not None and ready <= budget
+        print(f"Ready to serve after {ready:.3f}s (budget {budget:.3f}s): {'OK' if within else 'OVER BUDGET'}")
+        print("=" * 64)
+        return within
+
+
+startup_profiler = StartupProfiler()
+
+
+class LazyService:
+    """Proxy that builds its object with ``factory()`` on first attribute access"""
+
+    registry = []
+
+    def __init__(self, name, factory):
+        self.name = name
+        self.factory = factory
+        self.instance = None
+        self.error = None
+        self.init_seconds = None
+        self._lock = threading.Lock()
+        LazyService.registry.append(self)
+
+    @property
+    def loaded(self):
+        return self.instance is not None
+
+    def get(self):
+        """The service, building it now if needed (failures are remembered)"""
+        if self.instance is not None:
+            return self.instance
+        with self._lock:
+            if self.instance is None:
+                if self.error is not None:
+                    raise self.error
+                started = time.perf_counter()
+                try:
+                    self.instance = self.factory()
+                except Exception as e:
+                    self.error = e
+                    logger.warning("%s failed to initialize: %s", self.name, e)
+                    raise
+                self.init_seconds = time.perf_counter() - started
+        return self.instance
+
+    def available(self):
+        """True once built successfully (building it if it hasn't been tried)"""
+        try:
+            self.get()
+            return True
+        except Exception:
+            return False
+
+    def __getattr__(self, attr):
+        return getattr(self.get(), attr)
+
+
+def warm_up(services, then=None):
+    """Build ``services`` in a background thread, then call ``then()``"""
+    def run():
+        for service in services:
+            service.available()
+        if then:
+            then()
+    thread = threading.Thread(target=run, name='startup-warm-up', daemon=True)
+    thread.start()
+    return thread
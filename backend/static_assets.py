@@ -0,0 +1,263 @@
+"""
+Static Assets - content-hashed, precompressed frontend files
+A build step (python static_assets.py build, also run at startup whenever
+frontend/ has changed) hashes every file under frontend/ into a manifest,
+rewrites the HTML pages to reference assets by hashed name
+(js/app.js -> js/app.3f9a1c2b7d4e.js) and stores a copy of every file, plus
+gzip, and brotli if installed, variants of compressible ones, in
+STATIC_BUILD_DIR.
+
+Serving rules:
+- everything is sent from the build's copies, never from frontend/, so a
+  file updated in place can't appear under an old hash; it is picked up by
+  the next load() (startup, or after the updater ran)
+- hashed URLs never change content: cached for a year, immutable
+- HTML and unhashed URLs: ETag + no-cache, so revisits cost a 304
+- a .br/.gz variant is sent when Accept-Encoding allows it
+"""
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+import shutil
+import time
+from flask import request, send_file, Response
+from config import STATIC_BUILD_DIR
+
+logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'frontend')
+MANIFEST_NAME = 'manifest.json'
+MANIFEST_VERSION = 3
+
+IMMUTABLE_CACHE = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE = 'no-cache'
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'image/svg+xml', 'image/x-icon', 'image/vnd.microsoft.icon')
+# Variants that don't save at least this much are not worth a second file
+MIN_COMPRESSION_RATIO = 0.9
+# Preference order when the client accepts several
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_URL_ATTR_RE = re.compile(r'''(\b(?:src|href)=)(["'])([^"']+)\2''', re.IGNORECASE)
+
+
+def _mimetype(path):
+    return mimetypes.guess_type(path)[0] or 'application/octet-stream'
+
+
+def _hashed_name(path, digest):
+    stem, ext = os.path.splitext(path)
+    return f'{stem}.{digest}{ext}'
+
+
+def _source_files(root):
+    for directory, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')]
+        for filename in filenames:
+            if not filename.startswith('.'):
+                full_path = os.path.join(directory, filename)
+                yield os.path.relpath(full_path, root).replace(os.sep, '/'), full_path
+
+
+def _source_fingerprint(root):
+    """Hash of every source file's (path, size, mtime): changes when a file
+    is added, deleted, renamed or rewritten, even if its mtime went backwards
+    (tar/rsync -t, the updater's extraction)"""
+    digest = hashlib.sha256()
+    for path, full_path in sorted(_source_files(root)):
+        stat = os.stat(full_path)
+        digest.update(f'{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class StaticAssets:
+    """Manifest-driven static file serving for the frontend"""
+
+    def __init__(self, root=FRONTEND_DIR, build_dir=STATIC_BUILD_DIR):
+        self.root = root
+        self.build_dir = build_dir
+        self.files_dir = os.path.join(build_dir, 'files')
+        self.manifest = None
+        self.hashed = {}  # hashed URL path -> source path
+
+    def _rewrite_html(self, html, assets):
+        """Point src/href attributes at hashed asset names"""
+        def replace(match):
+            attr, quote, url = match.groups()
+            if '://' in url or url.startswith(('//', 'data:', '#', 'mailto:', 'javascript:')):
+                return match.group(0)
+            path = re.split(r'[?#]', url, 1)[0]
+            prefix = '/' if path.startswith('/') else ''
+            asset = assets.get(path.lstrip('/').removeprefix('./'))
+            if asset is None:
+                return match.group(0)
+            return f'{attr}{quote}{prefix}{asset["url"]}{quote}'
+        return _URL_ATTR_RE.sub(replace, html)
+
+    def _write_file(self, path, data):
+        target = os.path.join(self.files_dir, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as f:
+            f.write(data)
+
+    def _write_variants(self, path, data):
+        """gzip/brotli copies of data under files/; returns the encodings kept"""
+        encodings = []
+        if not _mimetype(path).startswith(COMPRESSIBLE_TYPES):
+            return encodings
+        variants = [('gzip', '.gz', lambda raw: gzip.compress(raw, compresslevel=9, mtime=0))]
+        if BROTLI_AVAILABLE:
+            variants.insert(0, ('br', '.br', lambda raw: brotli.compress(raw, quality=11)))
+        for encoding, suffix, compress in variants:
+            packed = compress(data)
+            if len(packed) <= len(data) * MIN_COMPRESSION_RATIO:
+                self._write_file(path + suffix, packed)
+                encodings.append(encoding)
+        return encodings
+
+    def build(self):
+        """Hash, rewrite and precompress everything under the frontend root"""
+        started = time.time()
+        fingerprint = _source_fingerprint(self.root)
+        tmp_files = self.files_dir + '.tmp'
+        if os.path.exists(tmp_files):
+            shutil.rmtree(tmp_files)
+        final_files, self.files_dir = self.files_dir, tmp_files
+
+        assets, pages = {}, {}
+        try:
+            sources = sorted(_source_files(self.root))
+            for path, full_path in sources:
+                if path.endswith('.html'):
+                    continue
+                with open(full_path, 'rb') as f:
+                    data = f.read()
+                digest = hashlib.sha256(data).hexdigest()[:12]
+                self._write_file(path, data)
+                assets[path] = {
+                    'hash': digest,
+                    'url': _hashed_name(path, digest),
+                    'size': len(data),
+                    'encodings': self._write_variants(path, data)
+                }
+            for path, full_path in sources:
+                if not path.endswith('.html'):
+                    continue
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    data = self._rewrite_html(f.read(), assets).encode('utf-8')
+                self._write_file(path, data)
+                pages[path] = {
+                    'hash': hashlib.sha256(data).hexdigest()[:12],
+                    'size': len(data),
+                    'encodings': self._write_variants(path, data)
+                }
+        finally:
+            self.files_dir = final_files
+
+        if os.path.exists(final_files):
+            shutil.rmtree(final_files)
+        os.replace(tmp_files, final_files)
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'built_at': time.time(),
+            'source_fingerprint': fingerprint,
+            'brotli': BROTLI_AVAILABLE,
+            'assets': assets,
+            'pages': pages
+        }
+        manifest_path = os.path.join(self.build_dir, MANIFEST_NAME)
+        with open(manifest_path + '.tmp', 'w') as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(manifest_path + '.tmp', manifest_path)
+        self._use(manifest)
+        logger.info("Static assets: %s assets, %s pages built in %.2fs",
+                    len(assets), len(pages), time.time() - started)
+        return manifest
+
+    def _use(self, manifest):
+        self.manifest = manifest
+        self.hashed = {asset['url']: path for path, asset in manifest['assets'].items()}
+
+    def load(self):
+        """Use the existing build, rebuilding it if frontend/ changed since"""
+        try:
+            with open(os.path.join(self.build_dir, MANIFEST_NAME), 'r') as f:
+                manifest = json.load(f)
+            if (manifest.get('version') == MANIFEST_VERSION
+                    and manifest.get('brotli') == BROTLI_AVAILABLE
+                    and manifest.get('source_fingerprint') == _source_fingerprint(self.root)):
+                self._use(manifest)
+                return manifest
+        except (FileNotFoundError, json.JSONDecodeError):
+            pass
+        return self.build()
+
+    def _send(self, file_path, variant_path, mimetype, etag, cache_control, encodings):
+        """Send file_path (or a compressed variant) with validators and caching"""
+        headers = {'Cache-Control': cache_control, 'Vary': 'Accept-Encoding'}
+        for encoding, suffix in ENCODINGS:
+            if encoding in encodings and encoding in request.accept_encodings:
+                file_path = variant_path + suffix
+                headers['Content-Encoding'] = encoding
+                etag = f'{etag}-{encoding}'
+                break
+        headers['ETag'] = f'"{etag}"'
+        # Weak comparison, as RFC 9110 specifies for If-None-Match; also
+        # matches "*" and W/ tags
+        if request.if_none_match.contains_weak(etag):
+            return Response(status=304, headers=headers)
+        response = send_file(file_path, mimetype=mimetype, conditional=False, etag=False)
+        response.headers.update(headers)
+        return response
+
+    def serve(self, path):
+        """Response for a frontend path, or None if it isn't a known file"""
+        if self.manifest is None:
+            self.load()
+
+        source = self.hashed.get(path)
+        if source is not None:
+            asset = self.manifest['assets'][source]
+            built = os.path.join(self.files_dir, source)
+            return self._send(built, built, _mimetype(source), asset['hash'],
+                              IMMUTABLE_CACHE, asset['encodings'])
+
+        entry = self.manifest['pages'].get(path) or self.manifest['assets'].get(path)
+        if entry is not None:
+            built = os.path.join(self.files_dir, path)
+            return self._send(built, built, _mimetype(path), entry['hash'],
+                              REVALIDATE_CACHE, entry['encodings'])
+        return None
+
+    def get_status(self):
+        manifest = self.manifest or {}
+        return {
+            'build_dir': self.build_dir,
+            'built_at': manifest.get('built_at'),
+            'assets': len(manifest.get('assets', {})),
+            'pages': len(manifest.get('pages', {})),
+            'brotli': BROTLI_AVAILABLE
+        }
+
+
+static_assets = StaticAssets()
+
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) > 1 and sys.argv[1] != 'build':
+        sys.exit('usage: python static_assets.py [build]')
+    manifest = static_assets.build()
+    total = sum(a['size'] for a in manifest['assets'].values())
+    print(f"Manifest written to {os.path.join(STATIC_BUILD_DIR, MANIFEST_NAME)} ({total} bytes of assets)")
@@ -0,0 +1,91 @@
+"""
+Status Sampler - reads hardware in the background, serves snapshots
+A single thread calls the status builder (sensors, energy, valve, CPU/RAM)
+every STATUS_SAMPLE_INTERVAL_SECONDS and publishes the result as an
+immutable, versioned snapshot of pre-serialized JSON bodies. Status
+endpoints hand out the current snapshot, so a poll costs the same whether
+one browser tab is open or fifty, and never waits on sensor I/O.
+"""
+import json
+import logging
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from config import STATUS_SAMPLE_INTERVAL_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# payloads: read-only mapping of name -> UTF-8 JSON body
+StatusSnapshot = namedtuple('StatusSnapshot', ['version', 'taken_at', 'duration', 'payloads'])
+
+
+class StatusSampler:
+    """Publishes build() results as versioned snapshots on a background thread"""
+
+    def __init__(self, build, interval=STATUS_SAMPLE_INTERVAL_SECONDS):
+        self.build = build
+        self.interval = interval
+        self.snapshot = None
+        self.last_error = None
+        self.running = False
+        self.thread = None
+        self._wake = threading.Event()
+        self._sample_lock = threading.Lock()
+
+    def sample(self):
+        """Run build() once and publish the result; returns the new snapshot"""
+        with self._sample_lock:
+            started = time.time()
+            payloads = {
+                name: json.dumps(body, default=str).encode('utf-8')
+                for name, body in self.build().items()
+            }
+            version = self.snapshot.version + 1 if self.snapshot else 1
+            # Readers grab self.snapshot once and never see a half-built one
+            self.snapshot = StatusSnapshot(version, started, time.time() - started,
+                                           MappingProxyType(payloads))
+            return self.snapshot
+
+    def get(self):
+        """Current snapshot, or None until the background thread has taken
+        the first one (requests never read hardware inline)"""
+        return self.snapshot
+
+    def start(self):
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='status-sampler', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self._wake.set()
+
+    def trigger(self):
+        """Sample again now, e.g. right after the valve was switched"""
+        self._wake.set()
+
+    def _run(self):
+        while self.running:
+            self._wake.clear()
+            try:
+                self.sample()
+                self.last_error = None
+            except Exception as e:
+                # Keep serving the previous snapshot
+                self.last_error = str(e)
+                logger.warning("Status sampling failed: %s", e)
+            self._wake.wait(self.interval)
+
+    def get_status(self):
+        snapshot = self.snapshot
+        return {
+            'running': self.running,
+            'interval_seconds': self.interval,
+            'version': snapshot.version if snapshot else None,
+            'age_seconds': round(time.time() - snapshot.taken_at, 2) if snapshot else None,
+            'sample_seconds': round(snapshot.duration, 3) if snapshot else None,
+            'last_error': self.last_error
+        }
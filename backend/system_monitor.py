@@ -1,14 +1,15 @@
 """
 System Monitor - CPU and RAM monitoring for Raspberry Pi
+Reads the latest sample from metrics_collector; nothing here touches psutil
+on the caller's thread.
 """
-import platform
+import logging
+from metrics_collector import metrics_collector, PSUTIL_AVAILABLE
 
-try:
-    import psutil
-    PSUTIL_AVAILABLE = True
-except ImportError:
-    PSUTIL_AVAILABLE = False
-    print("psutil not available. System monitoring will use simulation mode.")
+logger = logging.getLogger(__name__)
+
+if not PSUTIL_AVAILABLE:
+    logger.warning("psutil not available. System monitoring will use simulation mode.")
 
 
 class SystemMonitor:
@@ -16,67 +17,46 @@ class SystemMonitor:
     
     def __init__(self):
         self.psutil_available = PSUTIL_AVAILABLE
-        print(f"System Monitor initialized (psutil: {self.psutil_available})")
+        logger.info("System Monitor initialized (psutil: %s)", self.psutil_available)
     
     def get_cpu_usage(self):
         """Get current CPU usage percentage"""
         if self.psutil_available:
-            try:
-                # Get CPU usage over 1 second interval
-                cpu_percent = psutil.cpu_percent(interval=0.1)
-                return round(cpu_percent, 1)
-            except Exception as e:
-                print(f"Error reading CPU usage: {e}")
-                return self._simulate_cpu_usage()
+            # Average since the collector's previous sample
+            return metrics_collector.latest()['cpu_percent']
         else:
             return self._simulate_cpu_usage()
     
     def get_cpu_count(self):
         """Get number of CPU cores"""
-        if self.psutil_available:
-            try:
-                return psutil.cpu_count(logical=True)
-            except:
-                return 1
-        else:
-            return 1
+        return metrics_collector.static['cpu_cores']
     
     def get_cpu_frequency(self):
         """Get CPU frequency in MHz"""
-        if self.psutil_available:
-            try:
-                freq = psutil.cpu_freq()
-                if freq:
-                    return round(freq.current, 0)
-            except:
-                pass
-        return 0
+        return metrics_collector.latest()['cpu_freq_mhz'] or 0
     
     def get_ram_usage(self):
         """Get RAM usage statistics"""
         if self.psutil_available:
-            try:
-                ram = psutil.virtual_memory()
-                return {
-                    'total': round(ram.total / (1024**3), 2),  # GB
-                    'used': round(ram.used / (1024**3), 2),    # GB
-                    'available': round(ram.available / (1024**3), 2),  # GB
-                    'percent': round(ram.percent, 1)
-                }
-            except Exception as e:
-                print(f"Error reading RAM usage: {e}")
-                return self._simulate_ram_usage()
+            sample = metrics_collector.latest()
+            return {
+                'total': metrics_collector.static['mem_total_gb'],  # GB
+                'used': sample['mem_used_gb'],    # GB
+                'available': sample['mem_available_gb'],  # GB
+                'percent': sample['mem_percent']
+            }
         else:
             return self._simulate_ram_usage()
     
     def get_system_info(self):
-        """Get system information"""
+        """Get system information (read once at startup)"""
+        static = metrics_collector.static
         return {
-            'platform': platform.system(),
-            'platform_release': platform.release(),
-            'platform_version': platform.version(),
-            'architecture': platform.machine(),
-            'processor': platform.processor()
+            'platform': static['platform'],
+            'platform_release': static['platform_release'],
+            'platform_version': static['platform_version'],
+            'architecture': static['architecture'],
+            'processor': static['processor']
         }
     
     def get_status(self):
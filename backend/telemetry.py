@@ -0,0 +1,196 @@
+"""
+Telemetry - request latency histograms and operation counters
+request_telemetry.py's Flask hooks time every request into a histogram per
+route, method and status and count requests in flight. Services count
+their own work (database blocks, sensor reads, cloud calls, valve
+actuations) with inc() or track(); the registry itself has no Flask
+dependency, so the database layer can use it. render() writes everything in the Prometheus text format for
+/api/metrics; collectors registered with add_collector() contribute
+values read at scrape time (host metrics, write queue, stream clients).
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds in seconds; dashboard endpoints should land in the first few
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIX = 'onecore_'
+
+
+def _labels(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Telemetry:
+    """Counters, gauges and latency histograms in one lock-guarded registry"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._meta = {}        # name -> (type, help)
+        self._values = {}      # name -> {labels: value} for counters and gauges
+        self._histograms = {}  # name -> {labels: [bucket counts..., sum, count]}
+        self._collectors = []
+
+        self.describe('http_request_duration_seconds', 'histogram',
+                      'API request latency by route, method and status')
+        self.describe('http_requests_in_flight', 'gauge', 'Requests being handled, by route')
+        self.describe('db_queries_total', 'counter',
+                      'get_db() blocks (queries/transactions) by connection mode')
+        self.describe('sensor_reads_total', 'counter', 'Full sensor sweeps by reader')
+        self.describe('cloud_requests_total', 'counter', 'Outgoing cloud calls by service and outcome')
+        self.describe('cloud_request_duration_seconds', 'histogram', 'Outgoing cloud call latency by service')
+        self.describe('valve_actuations_total', 'counter', 'Valve open/close commands applied, by valve')
+
+    def describe(self, name, kind, help_text):
+        self._meta[name] = (kind, help_text)
+
+    def inc(self, name, amount=1, **labels):
+        key = _labels(labels)
+        with self._lock:
+            values = self._values.setdefault(name, {})
+            values[key] = values.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = _labels(labels)
+        with self._lock:
+            series = self._histograms.setdefault(name, {})
+            counts = series.get(key)
+            if counts is None:
+                counts = series[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    counts[i] += 1
+                    break
+            counts[-2] += seconds
+            counts[-1] += 1
+
+    @contextmanager
+    def track(self, kind, **labels):
+        """Count and time one operation, e.g. track('cloud', service='vps')"""
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            yield
+            outcome = 'ok'
+        finally:
+            self.observe(f'{kind}_request_duration_seconds', time.perf_counter() - started, **labels)
+            self.inc(f'{kind}_requests_total', outcome=outcome, **labels)
+
+    def add_collector(self, collect):
+        """``collect()`` returns [(name, type, help, labels dict, value), ...] at scrape time"""
+        self._collectors.append(collect)
+
+    # -- Reading ------------------------------------------------------------
+
+    def _quantile(self, counts, q):
+        """Estimate a quantile from bucket counts (linear within the bucket)"""
+        total = counts[-1]
+        if not total:
+            return None
+        rank = q * total
+        seen, lower = 0, 0.0
+        for i, bound in enumerate(self.buckets):
+            if seen + counts[i] >= rank:
+                fraction = (rank - seen) / counts[i] if counts[i] else 0
+                return lower + (bound - lower) * fraction
+            seen += counts[i]
+            lower = bound
+        return self.buckets[-1]
+
+    def _summary(self, counts):
+        return {
+            'requests': counts[-1],
+            'avg_ms': round(counts[-2] / counts[-1] * 1000, 2),
+            'p50_ms': round(self._quantile(counts, 0.5) * 1000, 2),
+            'p95_ms': round(self._quantile(counts, 0.95) * 1000, 2),
+            'p99_ms': round(self._quantile(counts, 0.99) * 1000, 2)
+        }
+
+    def request_latency(self, exclude=()):
+        """Overall and per-route request latency in ms (routes slowest p95 first)"""
+        merged = {}
+        overall = [0] * (len(self.buckets) + 2)
+        with self._lock:
+            for labels, counts in self._histograms.get('http_request_duration_seconds', {}).items():
+                route = dict(labels)['route']
+                if route in exclude:
+                    continue
+                total = merged.setdefault(route, [0] * len(counts))
+                for i, value in enumerate(counts):
+                    total[i] += value
+                    overall[i] += value
+        routes = [{'route': route, **self._summary(counts)} for route, counts in merged.items()]
+        routes.sort(key=lambda r: r['p95_ms'], reverse=True)
+        return {
+            'overall': self._summary(overall) if overall[-1] else None,
+            'routes': routes
+        }
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format (0.0.4)"""
+        lines = []
+        with self._lock:
+            values = {name: dict(series) for name, series in self._values.items()}
+            histograms = {name: {k: list(v) for k, v in series.items()}
+                          for name, series in self._histograms.items()}
+
+        extra = {}
+        for collect in self._collectors:
+            try:
+                for name, kind, help_text, labels, value in collect():
+                    if value is None:
+                        continue
+                    self._meta.setdefault(name, (kind, help_text))
+                    extra.setdefault(name, {})[_labels(labels)] = value
+            except Exception as e:
+                logger.warning("Metrics collector failed: %s", e)
+
+        for name in sorted(set(values) | set(histograms) | set(extra)):
+            kind, help_text = self._meta.get(name, ('untyped', name))
+            lines.append(f'# HELP {PREFIX}{name} {help_text}')
+            lines.append(f'# TYPE {PREFIX}{name} {kind}')
+            if name in histograms:
+                for labels, counts in sorted(histograms[name].items()):
+                    cumulative = 0
+                    for bound, count in zip(self.buckets + (float('inf'),), counts[:-2] + [0]):
+                        cumulative += count
+                        if bound == float('inf'):
+                            cumulative = counts[-1]
+                        bucket = _format_labels(labels, [('le', _format_value(float(bound)))])
+                        lines.append(f'{PREFIX}{name}_bucket{bucket} {cumulative}')
+                    lines.append(f'{PREFIX}{name}_sum{_format_labels(labels)} {_format_value(counts[-2])}')
+                    lines.append(f'{PREFIX}{name}_count{_format_labels(labels)} {counts[-1]}')
+                continue
+            series = dict(values.get(name, {}))
+            series.update(extra.get(name, {}))
+            for labels, value in sorted(series.items()):
+                lines.append(f'{PREFIX}{name}{_format_labels(labels)} {_format_value(value)}')
+
+        lines.append(f'# HELP {PREFIX}process_start_time_seconds Server start time (epoch seconds)')
+        lines.append(f'# TYPE {PREFIX}process_start_time_seconds gauge')
+        lines.append(f'{PREFIX}process_start_time_seconds {_format_value(round(self.started, 3))}')
+        return '\n'.join(lines) + '\n'
+
+
+telemetry = Telemetry()
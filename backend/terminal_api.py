@@ -9,6 +9,8 @@ from flask import Blueprint, request, jsonify, Response
 import time
 import threading
 import queue
+from config import LOG_DIR, LOG_TAIL_SIZE
+from logging_setup import log_tail, read_log_file, LOG_FILE_NAME
 
 terminal_bp = Blueprint('terminal', __name__)
 
@@ -133,31 +135,37 @@ def test_gpio():
 
 @terminal_bp.route('/terminal/logs', methods=['GET'])
 def get_logs():
-    """Get recent system logs"""
+    """Get recent logs.
+
+    type=app (default) reads the server's in-memory log tail; ``level``
+    filters (e.g. WARNING) and ``after`` returns only records newer than
+    that sequence number, for polling. type=system reads the syslog file.
+    """
     try:
-        log_type = request.args.get('type', 'system')
-        lines = int(request.args.get('lines', 50))
-        
+        log_type = request.args.get('type', 'app')
+        lines = min(int(request.args.get('lines', 50)), LOG_TAIL_SIZE)
+
+        if log_type in ('app', 'api'):
+            after = request.args.get('after', type=int)
+            records = log_tail.tail(lines, level=request.args.get('level'), after=after)
+            return jsonify({
+                'success': True,
+                'log_type': 'app',
+                'records': records,
+                'logs': '\n'.join(f"{r['ts']} {r['level']} {r['logger']}: {r['msg']}" for r in records),
+                'last_seq': log_tail.seq,
+                'lines': lines
+            })
+
         log_files = {
             'system': '/var/log/syslog',
-            'irrigation': 'logs/irrigation.log',
-            'api': 'logs/api.log'
+            'file': os.path.join(LOG_DIR, LOG_FILE_NAME)
         }
-        
         log_file = log_files.get(log_type, log_files['system'])
-        
         try:
-            # Use tail command to get last N lines
-            result = subprocess.run(
-                ['tail', '-n', str(lines), log_file],
-                capture_output=True,
-                text=True,
-                timeout=5
-            )
-            
             return jsonify({
                 'success': True,
-                'logs': result.stdout,
+                'logs': read_log_file(log_file, lines),
                 'log_type': log_type,
                 'lines': lines
             })
@@ -166,9 +174,9 @@ def get_logs():
                 'success': False,
                 'error': f'Log file not found: {log_file}'
             }), 404
-        except Exception as e:
-            return jsonify({'success': False, 'error': str(e)}), 500
-            
+
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
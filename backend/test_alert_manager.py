@@ -0,0 +1,149 @@
+"""
+Alert manager state machine - fingerprint dedup, clear hysteresis,
+reopen cooldown and restart recovery decide whether an alerts row is
+written at all. Runs against a throwaway database with a fake clock.
+"""
+import sys
+from contextlib import contextmanager
+
+import database
+import alert_manager as alert_module
+from alert_manager import AlertManager
+from config import SOIL_MOISTURE_THRESHOLD, SOIL_MOISTURE_HYSTERESIS
+from conftest import FakeClock, temp_database
+
+T0 = 1704067200000  # 2024-01-01 00:00:00 UTC, epoch ms
+CLEAR_SECONDS = 120
+COOLDOWN_SECONDS = 1800
+SYNC_SECONDS = 300
+
+
+@contextmanager
+def fresh_alerts():
+    """(AlertManager, clock) on an empty database; restores the module state"""
+    original_now = alert_module.now_ms
+    clock = FakeClock(T0, per_second=1000)
+    with temp_database('alerts.db'):
+        alert_module.now_ms = clock
+        try:
+            yield AlertManager(CLEAR_SECONDS, COOLDOWN_SECONDS, SYNC_SECONDS, timers=False), clock
+        finally:
+            alert_module.now_ms = original_now
+
+
+def _rows():
+    with database.get_db(readonly=True) as conn:
+        return [dict(row) for row in conn.execute(
+            'SELECT id, state, resolved, occurrences, resolved_at FROM alerts ORDER BY id')]
+
+
+def test_repeated_low_moisture_stays_one_row():
+    with fresh_alerts() as (manager, clock):
+        first = manager.raise_alert('low_moisture', 'warning', 'Soil moisture low: 21.3%')
+        for reading in (20.8, 19.5, 18.1):
+            clock.advance(60)
+            assert manager.raise_alert('low_moisture', 'warning',
+                                       f'Soil moisture low: {reading}%') == first
+        manager.flush()
+        rows = _rows()
+        assert len(rows) == 1
+        assert rows[0]['state'] == 'ongoing'
+        assert rows[0]['occurrences'] == 4
+        # open + ongoing + flush; the other repeats only bumped the counter
+        assert manager.writes == 3
+
+
+def test_clear_inside_hysteresis_window_does_not_resolve():
+    with fresh_alerts() as (manager, clock):
+        manager.raise_alert('low_moisture', 'warning', 'Soil moisture low: 21%')
+        clock.advance(10)
+        assert manager.clear('low_moisture') == []
+        clock.advance(CLEAR_SECONDS - 20)
+        assert manager.clear('low_moisture') == []
+        assert _rows()[0]['resolved'] == 0
+
+        # Coming back during the window restarts it
+        manager.raise_alert('low_moisture', 'warning', 'Soil moisture low: 22%')
+        clock.advance(CLEAR_SECONDS - 10)
+        assert manager.clear('low_moisture') == []
+        clock.advance(CLEAR_SECONDS)
+        assert manager.clear('low_moisture') == [_rows()[0]['id']]
+        assert _rows()[0]['state'] == 'resolved'
+
+
+def test_single_clear_resolves_after_window():
+    with fresh_alerts() as (manager, clock):
+        blocked = manager.raise_alert('safety_block', 'warning', 'Irrigation blocked: battery')
+        stopped = manager.raise_alert('emergency_stop', 'critical', 'Emergency stop triggered')
+        # One passing check, then nothing reports safety_block again
+        assert manager.clear('safety_block') == []
+        clock.advance(CLEAR_SECONDS - 1)
+        assert manager.settle() == []
+        clock.advance(1)
+        # What the timer calls
+        assert manager.settle() == [blocked]
+        assert {row['id']: row['state'] for row in _rows()}[blocked] == 'resolved'
+
+        # Any later report also closes out an expired clear window
+        manager.clear('emergency_stop')
+        clock.advance(CLEAR_SECONDS)
+        manager.raise_alert('low_moisture', 'warning', 'Soil moisture low: 21%')
+        assert {row['id']: row['state'] for row in _rows()}[stopped] == 'resolved'
+
+
+def test_moisture_inside_hysteresis_band_does_not_clear():
+    from sensor_service import SensorService
+    with fresh_alerts() as (manager, clock):
+        original = alert_module.alert_manager
+        sensor_service_module = sys.modules['sensor_service']
+        sensor_service_module.alert_manager = manager
+        try:
+            service = SensorService()
+            service.gpio_available = False
+            readings = iter([SOIL_MOISTURE_THRESHOLD - 5,
+                             SOIL_MOISTURE_THRESHOLD + SOIL_MOISTURE_HYSTERESIS / 2])
+            service.read_soil_moisture = lambda: next(readings)
+            service.read_all_sensors()
+            service.read_all_sensors()
+            alert = next(iter(manager._alerts.values()))
+            assert alert['state'] == 'open'
+            assert alert['clear_since'] is None
+        finally:
+            sensor_service_module.alert_manager = original
+
+
+def test_reraise_inside_cooldown_reuses_row():
+    with fresh_alerts() as (manager, clock):
+        alert_id = manager.raise_alert('safety_block', 'warning', 'Irrigation blocked: battery')
+        manager.clear('safety_block', force=True)
+        clock.advance(COOLDOWN_SECONDS - 60)
+        assert manager.raise_alert('safety_block', 'warning', 'Irrigation blocked: battery') == alert_id
+        rows = _rows()
+        assert len(rows) == 1
+        assert rows[0]['state'] == 'open' and rows[0]['resolved'] == 0
+
+        # After the cooldown the same condition is a new episode
+        manager.clear('safety_block', force=True)
+        clock.advance(COOLDOWN_SECONDS + 1)
+        assert manager.raise_alert('safety_block', 'warning', 'Irrigation blocked: battery') != alert_id
+        assert len(_rows()) == 2
+
+
+def test_load_restores_open_alerts_after_restart():
+    with fresh_alerts() as (manager, clock):
+        open_id = manager.raise_alert('low_moisture', 'warning', 'Soil moisture low: 21%')
+        manager.raise_alert('low_moisture', 'warning', 'Soil moisture low: 20%')
+        resolved_id = manager.raise_alert('safety_block', 'warning', 'Irrigation blocked: leak')
+        manager.clear('safety_block', force=True)
+        manager.flush()
+
+        clock.advance(60)
+        restarted = AlertManager(CLEAR_SECONDS, COOLDOWN_SECONDS, SYNC_SECONDS, timers=False)
+        # Same fingerprint after the restart: counted on the old row
+        assert restarted.raise_alert('low_moisture', 'warning', 'Soil moisture low: 19%') == open_id
+        assert restarted.get_stats()['active'] == 1
+        assert restarted._alerts[alert_module.fingerprint(
+            'low_moisture', 'Soil moisture low: 19%')]['occurrences'] == 3
+        # Resolved but still cooling down: reopens instead of a new row
+        assert restarted.raise_alert('safety_block', 'warning', 'Irrigation blocked: leak') == resolved_id
+        assert len(_rows()) == 2
@@ -0,0 +1,114 @@
+"""
+Irrigation job runner - the timer wheel decides when a valve closes.
+Drives TimerWheel with a fake clock (no sleeping) against a throwaway
+database: a job's valve closes at its deadline and not before, a restart
+closes out a job left running, and emergency stop disarms the pending
+expiry.
+"""
+from contextlib import contextmanager
+
+import database
+import irrigation_service as service_module
+from irrigation_jobs import JobRunner, TimerWheel
+from config import WATER_FLOW_LITRES_PER_SECOND
+from conftest import FakeClock, temp_database
+
+
+@contextmanager
+def fresh_runner():
+    """(JobRunner on a hand-driven wheel, clock) with an empty database;
+    IrrigationService instances built inside attach to this runner"""
+    original_runner = service_module.job_runner
+    clock = FakeClock()
+    runner = JobRunner(TimerWheel(tick_seconds=1.0, slots=8, clock=clock, autostart=False))
+    with temp_database('jobs.db'):
+        service_module.job_runner = runner
+        try:
+            yield runner, clock
+        finally:
+            service_module.job_runner = original_runner
+
+
+def test_wheel_fires_on_deadline_not_before():
+    clock = FakeClock()
+    wheel = TimerWheel(tick_seconds=1.0, slots=8, clock=clock, autostart=False)
+    fired = []
+    wheel.schedule(2.5, lambda: fired.append('short'))
+    # Longer than one turn of the wheel: has to go round twice
+    wheel.schedule(20, lambda: fired.append('long'))
+    cancelled = wheel.schedule(5, lambda: fired.append('cancelled'))
+    assert wheel.cancel(cancelled)
+
+    clock.advance(2.4)
+    assert wheel.run_due() == 0
+    clock.advance(0.7)
+    assert wheel.run_due() == 1 and fired == ['short']
+    clock.advance(16)
+    assert wheel.run_due() == 0
+    clock.advance(2)
+    assert wheel.run_due() == 1 and fired == ['short', 'long']
+    assert wheel.pending() == 0
+
+
+def test_job_expires_and_closes_valve():
+    with fresh_runner() as (runner, clock):
+        service = service_module.IrrigationService()
+        result = service.valve_on(trigger_type='manual', duration=30)
+        assert result['success'] and service.valve_state
+        job_id = result['job_id']
+        assert database.get_irrigation_job(job_id)['state'] == 'running'
+
+        clock.advance(29)
+        runner.wheel.run_due()
+        assert service.valve_state
+        assert runner.get_job(job_id)['state'] == 'running'
+
+        clock.advance(1.5)
+        runner.wheel.run_due()
+        assert not service.valve_state
+        assert service.job_id is None
+        assert database.get_irrigation_job(job_id)['state'] == 'completed'
+        assert runner.active == {}
+
+
+def test_reconcile_closes_out_job_past_its_deadline():
+    with fresh_runner() as (runner, clock):
+        now = database.now_ms()
+        created = now - 600 * 1000
+        job_id = database.create_irrigation_job(created, created + 120 * 1000, 120, 'schedule')
+
+        # What the next process start does: the valve is closed, the job is not
+        service = service_module.IrrigationService()
+        assert runner.reconciled == [job_id]
+        assert not service.valve_state
+
+        job = database.get_irrigation_job(job_id)
+        assert job['state'] == 'interrupted'
+        # Ran until its deadline, not until the restart
+        assert job['finished_at'] == created + 120 * 1000
+        assert job['water_used'] == 120 * WATER_FLOW_LITRES_PER_SECOND
+        with database.get_db(readonly=True) as conn:
+            logged = conn.execute(
+                "SELECT duration, trigger_type FROM irrigation_logs WHERE action = 'valve_closed'"
+            ).fetchall()
+        assert [tuple(row) for row in logged] == [(120, 'restart')]
+
+
+def test_emergency_stop_cancels_scheduled_expiry():
+    with fresh_runner() as (runner, clock):
+        service = service_module.IrrigationService()
+        job_id = service.valve_on(trigger_type='manual', duration=30)['job_id']
+        assert runner.wheel.pending() == 1
+
+        assert service.emergency_stop()['success']
+        assert not service.valve_state
+        assert runner.wheel.pending() == 0
+        assert database.get_irrigation_job(job_id)['state'] == 'emergency_stopped'
+
+        # The old deadline passing must not touch the valve again
+        closes = []
+        service.valve_off = lambda **kwargs: closes.append(kwargs) or {'success': False}
+        clock.advance(60)
+        assert runner.wheel.run_due() == 0
+        assert closes == []
+        assert database.get_irrigation_job(job_id)['state'] == 'emergency_stopped'
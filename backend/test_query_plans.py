@@ -0,0 +1,87 @@
+"""
+Query plan regression test - the dashboard's time-range queries must be
+answered from an index, never a full table scan.
+Runs against a throwaway database built by init_database().
+
+Run: python test_query_plans.py   (or under pytest)
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import database
+
+T0 = 1704067200000  # 2024-01-01 00:00:00 UTC, epoch ms
+T1 = T0 + 24 * 60 * 60 * 1000
+
+# name -> (sql, params)
+HOT_QUERIES = {
+    'irrigation totals': (database.SQL_IRRIGATION_TOTALS, (T0, T1)),
+    'irrigation history': (database.SQL_IRRIGATION_HISTORY, (T0, T1, 10)),
+    'zones below moisture': (database.SQL_ZONES_BELOW_MOISTURE, (T0, T1, 30)),
+    'zone last reading': (database.SQL_ZONE_LAST_READING, (1,)),
+    'recent sensor data': ('SELECT * FROM sensor_readings ORDER BY timestamp DESC LIMIT ?', (100,)),
+    'recent logs': ('SELECT * FROM irrigation_logs ORDER BY timestamp DESC LIMIT ?', (50,)),
+    'sensor history page': (database.keyset_query('sensor_readings', before_ts=T1, before_id=10)[0],
+                            (T1, T1, 10, 500)),
+    'irrigation log page': (database.keyset_query('irrigation_logs', before_ts=T1)[0], (T1, 50)),
+    'unresolved alerts': ('SELECT * FROM alerts WHERE resolved = 0 ORDER BY timestamp DESC', ()),
+    'rollup history': ('''
+        SELECT bucket, metric, count, sum, min, max FROM sensor_rollups
+        WHERE resolution = ? AND bucket BETWEEN ? AND ? ORDER BY bucket
+    ''', ('1h', T0, T1)),
+}
+
+
+def _plan(conn, sql, params):
+    return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, params)]
+
+
+def _uses_index(detail):
+    return 'USING' in detail and ('INDEX' in detail or 'PRIMARY KEY' in detail)
+
+
+def check_query_plans():
+    """Return {query name: plan lines} for every query that scans a table"""
+    original_path = database.DB_PATH
+    database.connection_manager.close_all()
+    failures = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        database.DB_PATH = os.path.join(tmp, 'plans.db')
+        try:
+            database.init_database()
+            with database.get_db(readonly=True) as conn:
+                for name, (sql, params) in HOT_QUERIES.items():
+                    plan = _plan(conn, sql, params)
+                    # A full scan or a sort of the whole result set fails;
+                    # a temp b-tree for COUNT(DISTINCT zone_id) is fine.
+                    bad = [d for d in plan
+                           if (d.startswith('SCAN') and not _uses_index(d))
+                           or 'TEMP B-TREE FOR ORDER BY' in d]
+                    if bad:
+                        failures[name] = plan
+        finally:
+            database.connection_manager.close_all()
+            database.DB_PATH = original_path
+    return failures
+
+
+def test_hot_queries_use_indexes():
+    failures = check_query_plans()
+    assert not failures, f"Queries not using an index: {failures}"
+
+
+if __name__ == '__main__':
+    print("=" * 60)
+    print("QUERY PLAN REGRESSION TEST")
+    print("=" * 60)
+    failures = check_query_plans()
+    for name in HOT_QUERIES:
+        status = "❌ SCAN" if name in failures else "✅ index"
+        print(f"{status:10} {name}")
+        for line in failures.get(name, []):
+            print(f"           {line}")
+    print("=" * 60)
+    sys.exit(1 if failures else 0)
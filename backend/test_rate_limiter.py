@@ -0,0 +1,107 @@
+"""
+Rate limiter - token buckets, concurrency caps and who counts as a client.
+A small Flask app with a hand-written policy and a fake clock (no
+sleeping) against a throwaway database: an empty bucket answers 429 with
+Retry-After, tokens come back over time, a failing handler still frees its
+concurrency slot, and made-up API keys share the caller's IP bucket.
+"""
+import json
+import os
+from contextlib import contextmanager
+
+from flask import Flask, jsonify
+
+from auth import create_api_key
+from conftest import FakeClock, temp_database
+from rate_limiter import RateLimiter
+
+POLICY = {
+    'system_limits': {
+        'rate_limits': {
+            'routes': {
+                '/limited': {'rate_per_minute': 6, 'burst': 2},
+                '/busy': {'max_concurrent': 1, 'retry_after_seconds': 3}
+            }
+        }
+    }
+}
+
+
+@contextmanager
+def limited_app():
+    """(test client, limiter, clock) on an empty database"""
+    clock = FakeClock()
+    with temp_database('limits.db') as tmp:
+        limits_file = os.path.join(tmp, 'system_limits.json')
+        with open(limits_file, 'w') as f:
+            json.dump(POLICY, f)
+        limiter = RateLimiter(limits_file, clock=clock)
+        app = Flask(__name__)
+        limiter.init_app(app)
+
+        @app.route('/limited')
+        def limited():
+            return jsonify({'success': True})
+
+        @app.route('/busy')
+        def busy():
+            raise RuntimeError('handler failed')
+
+        yield app.test_client(), limiter, clock
+
+
+def test_empty_bucket_returns_429_with_retry_after():
+    with limited_app() as (client, limiter, clock):
+        assert client.get('/limited').status_code == 200
+        assert client.get('/limited').status_code == 200
+        response = client.get('/limited')
+        assert response.status_code == 429
+        # 6 per minute: the next token is 10 seconds away
+        assert response.headers['Retry-After'] == '10'
+        assert response.get_json()['retry_after'] == 10
+
+
+def test_bucket_refills_over_time():
+    with limited_app() as (client, limiter, clock):
+        for _ in range(2):
+            client.get('/limited')
+        clock.advance(9)
+        response = client.get('/limited')
+        assert response.status_code == 429
+        assert response.headers['Retry-After'] == '1'
+        clock.advance(1)
+        assert client.get('/limited').status_code == 200
+        # A long pause refills up to the burst, not beyond
+        clock.advance(600)
+        assert [client.get('/limited').status_code for _ in range(3)] == [200, 200, 429]
+
+
+def test_failing_handler_releases_concurrency_slot():
+    with limited_app() as (client, limiter, clock):
+        for _ in range(3):
+            assert client.get('/busy').status_code == 500
+        semaphore = limiter.in_flight['/busy']
+        assert semaphore.acquire(blocking=False)
+        semaphore.release()
+
+        # Held by someone else: refused with the route's Retry-After
+        semaphore.acquire()
+        try:
+            response = client.get('/busy')
+            assert response.status_code == 429
+            assert response.headers['Retry-After'] == '3'
+        finally:
+            semaphore.release()
+
+
+def test_made_up_api_keys_share_the_ip_bucket():
+    with limited_app() as (client, limiter, clock):
+        statuses = [client.get('/limited', headers={'X-API-Key': f'made-up-{n}'}).status_code
+                    for n in range(3)]
+        assert statuses == [200, 200, 429]
+        assert client.get('/limited', query_string={'api_key': 'made-up-9'}).status_code == 429
+
+        # A real key gets a bucket of its own
+        key = create_api_key('dashboard')
+        assert client.get('/limited', headers={'X-API-Key': key}).status_code == 200
+        assert limiter.get_status()['tracked_clients'] == 2
@@ -23,7 +23,9 @@ VERSION_FILE = os.path.join(APP_DIR, "version.txt")
 PROTECTED_FILES = [
     "version.txt",
     "system_config.json",
-    "irrigation_system.db",
+    "irrigation.db",
+    "*.db-wal",
+    "*.db-shm",
     ".env",
     "*.log"
 ]
@@ -162,8 +164,13 @@ def backup_current_version():
         # Backup critical files only
         os.makedirs(backup_dir, exist_ok=True)
         
+        # The live database can't be copied safely by name; take an online backup
+        from backup_service import BackupService
+        report = BackupService().run_once()
+        logger.info(f"Backed up database: {report['file']}")
+
         for protected_file in PROTECTED_FILES:
-            if '*' not in protected_file:
+            if '*' not in protected_file and not protected_file.endswith('.db'):
                 src = os.path.join(APP_DIR, protected_file)
                 if os.path.exists(src):
                     dst = os.path.join(backup_dir, protected_file)
@@ -401,12 +401,19 @@ function initUtilizationChart() {
 // Update Charts with Real Data
 async function updateAllCharts(analytics) {
     try {
-        // Fetch historical data
-        const history = await fetch(`${API_BASE}/sensors/history?limit=100`).then(r => r.json());
+        // Pre-aggregated rollup buckets - no raw rows cross the wire
+        const now = Date.now();
+        const since = (ms) => new Date(now - ms).toISOString();
+        const [daily, hourly] = await Promise.all([
+            fetch(`${API_BASE}/sensors/history?resolution=1d&from=${since(7 * 24 * 3600 * 1000)}`).then(r => r.json()),
+            fetch(`${API_BASE}/sensors/history?resolution=1h&from=${since(20 * 3600 * 1000)}`).then(r => r.json())
+        ]);
         
-        if (history.success && history.data) {
-            updateFarmlandStatsChart(history.data);
-            updateWeatherTrendsChart(history.data);
+        if (daily.success && daily.data) {
+            updateFarmlandStatsChart(daily.data);
+        }
+        if (hourly.success && hourly.data) {
+            updateWeatherTrendsChart(hourly.data);
         }
         
         // Update donut with current area
@@ -419,24 +426,19 @@ async function updateAllCharts(analytics) {
     }
 }
 
-function updateFarmlandStatsChart(historyData) {
-    // Group by day and count irrigation recommendations
-    const grouped = groupByTimeWindow(historyData, 'day', 7);
-    
-    if (farmlandStatsChart && grouped.length > 0) {
-        farmlandStatsChart.data.labels = grouped.map(g => g.label);
-        farmlandStatsChart.data.datasets[0].data = grouped.map(g => g.count);
+function updateFarmlandStatsChart(dailyBuckets) {
+    if (farmlandStatsChart && dailyBuckets.length > 0) {
+        farmlandStatsChart.data.labels = dailyBuckets.map(b => b.timestamp.slice(5, 10));
+        farmlandStatsChart.data.datasets[0].data = dailyBuckets.map(b => b.count);
         farmlandStatsChart.update();
     }
 }
 
-function updateWeatherTrendsChart(historyData) {
-    const grouped = groupByTimeWindow(historyData, 'hour', 20);
-    
-    if (weatherTrendsChart && grouped.length > 0) {
-        weatherTrendsChart.data.labels = grouped.map(g => g.label);
-        weatherTrendsChart.data.datasets[0].data = grouped.map(g => g.avgTemp);
-        weatherTrendsChart.data.datasets[1].data = grouped.map(g => g.avgHumidity);
+function updateWeatherTrendsChart(hourlyBuckets) {
+    if (weatherTrendsChart && hourlyBuckets.length > 0) {
+        weatherTrendsChart.data.labels = hourlyBuckets.map(b => b.timestamp.slice(11, 16));
+        weatherTrendsChart.data.datasets[0].data = hourlyBuckets.map(b => b.temperature);
+        weatherTrendsChart.data.datasets[1].data = hourlyBuckets.map(b => b.humidity);
         weatherTrendsChart.update();
     }
 }
@@ -455,24 +457,6 @@ function updateAreaDonutChart(data) {
 }
 
 // Helper Functions
-function groupByTimeWindow(data, window, count) {
-    if (!data || data.length === 0) return [];
-    
-    const result = [];
-    const windowSize = window === 'day' ? 24 * 60 * 60 * 1000 : 60 * 60 * 1000;
-    
-    for (let i = 0; i < count; i++) {
-        result.push({
-            label: window === 'day' ? `Day ${i + 1}` : `Hour ${i + 1}`,
-            count: Math.floor(Math.random() * 3000) + 1500,
-            avgTemp: 18 + Math.random() * 6,
-            avgHumidity: 50 + Math.random() * 30
-        });
-    }
-    
-    return result;
-}
-
 function generateWeatherData(length, min, max) {
     return Array.from({length}, () => min + Math.random() * (max - min));
 }
@@ -0,0 +1,35 @@
+// Several GET endpoints in one round-trip (/api/batch)
+// apiBatch(['/api/status', '/api/alerts']) resolves to
+// { '/api/status': { status, body }, ... }. If the batch endpoint itself is
+// unavailable (older server, proxy error) it falls back to one fetch per path.
+
+async function fetchEach(paths, base) {
+    const results = await Promise.all(paths.map(async path => {
+        try {
+            const response = await fetch(`${base}${path}`);
+            const body = await response.json().catch(() => null);
+            return [path, { status: response.status, body }];
+        } catch (error) {
+            return [path, { status: 0, body: null }];
+        }
+    }));
+    return Object.fromEntries(results);
+}
+
+async function apiBatch(paths, base = window.location.origin) {
+    try {
+        const response = await fetch(`${base}/api/batch`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ requests: paths })
+        });
+        if (!response.ok) throw new Error(`HTTP ${response.status}`);
+        const data = await response.json();
+        return Object.fromEntries(data.responses.map(item => [item.path, { status: item.status, body: item.body }]));
+    } catch (error) {
+        console.warn('Batch request failed, fetching individually:', error);
+        return fetchEach(paths, base);
+    }
+}
+
+window.apiBatch = apiBatch;
@@ -34,8 +34,37 @@ document.addEventListener('DOMContentLoaded', () => {
     setInterval(updateHeaderDateTime, 1000);
     // Update schedule every 30 seconds
     setInterval(loadIrrigationSchedule, 30000);
+
+    setupLiveStream();
 });
 
+// Push updates: sensors/energy are applied as they change, valve and zone
+// changes refresh the full status at once, and polling drops to a slow
+// fallback while the stream is connected
+function setupLiveStream() {
+    if (!window.liveStream) return;
+
+    liveStream
+        .on('sensors', sensors => {
+            updateSensorDisplay(sensors);
+            updateLastUpdate();
+        })
+        .on('energy', energy => updateEnergyDisplay(energy))
+        .on('valve', (valve, delta) => {
+            if ('valve_state' in delta) loadSystemData();
+        })
+        .on('irrigation', () => loadSystemData())
+        .on('connected', () => {
+            clearInterval(updateInterval);
+            updateInterval = setInterval(loadSystemData, 60000);
+        })
+        .on('disconnected', () => {
+            clearInterval(updateInterval);
+            updateInterval = setInterval(loadSystemData, 5000);
+        })
+        .start();
+}
+
 // Load irrigation schedule
 async function loadIrrigationSchedule() {
     try {
@@ -254,8 +283,10 @@ async function loadSystemData() {
             updateBtn.classList.add('refreshing');
         }
         
-        const response = await fetch(`${API_BASE}/api/status`);
-        const data = await response.json();
+        // Status, safety and AI recommendation in one round-trip
+        const results = await apiBatch(['/api/status', '/api/safety/status', '/api/ai/recommendation'], API_BASE);
+        const data = results['/api/status'].body;
+        if (!data) throw new Error(`Status request failed (${results['/api/status'].status})`);
         
         updateSensorDisplay(data.sensors);
         updateEnergyDisplay(data.energy);
@@ -269,11 +300,11 @@ async function loadSystemData() {
         // Monitor battery levels for notifications
         checkBatteryLevelAndNotify(data.energy);
         
-        // Load Safety Status (CRITICAL for lithium battery monitoring)
-        loadSafetyStatus();
+        // Safety Status (CRITICAL for lithium battery monitoring)
+        renderSafetyStatus(results['/api/safety/status'].body, data);
         
-        // Load AI recommendation
-        loadAIRecommendation();
+        // AI recommendation
+        renderAIRecommendation(results['/api/ai/recommendation'].body);
         
         // Remove spinning animation after data loads
         if (updateBtn) {
@@ -647,25 +678,8 @@ function initializeZoneCharts(zoneIndex, totalWater, totalIrrigations) {
 // Load Safety Status (CRITICAL for lithium battery monitoring)
 async function loadSafetyStatus() {
     try {
-        // Fetch both safety status and system status in parallel
-        const [safetyResponse, systemResponse] = await Promise.all([
-            fetch(`${API_BASE}/api/safety/status`),
-            fetch(`${API_BASE}/api/status`)
-        ]);
-        
-        const safetyData = await safetyResponse.json();
-        const systemData = await systemResponse.json();
-        
-        if (safetyData.success && safetyData.data) {
-            const safety = safetyData.data;
-            const batteryVoltage = systemData.energy?.battery_voltage || 0;
-            const batteryPercent = systemData.energy?.battery_percentage || 0;
-            const sensors = systemData.sensors || {};
-            
-            updateSafetyDisplay(safety, batteryVoltage, batteryPercent, sensors);
-        } else {
-            updateSafetyDisplay(null, 0, 0, null, 'Failed to load safety status');
-        }
+        const results = await apiBatch(['/api/safety/status', '/api/status'], API_BASE);
+        renderSafetyStatus(results['/api/safety/status'].body, results['/api/status'].body || {});
     } catch (error) {
         console.error('Error loading safety status:', error);
         // Show error status
@@ -673,6 +687,19 @@ async function loadSafetyStatus() {
     }
 }
 
+function renderSafetyStatus(safetyData, systemData) {
+    if (safetyData && safetyData.success && safetyData.data) {
+        const safety = safetyData.data;
+        const batteryVoltage = systemData.energy?.battery_voltage || 0;
+        const batteryPercent = systemData.energy?.battery_percentage || 0;
+        const sensors = systemData.sensors || {};
+        
+        updateSafetyDisplay(safety, batteryVoltage, batteryPercent, sensors);
+    } else {
+        updateSafetyDisplay(null, 0, 0, null, 'Failed to load safety status');
+    }
+}
+
 // Update Safety Status display
 function updateSafetyDisplay(safety, batteryVoltage, batteryPercent, sensors, error = null) {
     const statusGrid = document.getElementById('safety-status-grid') || document.querySelector('.status-grid');
@@ -803,31 +830,33 @@ function updateSafetyDisplay(safety, batteryVoltage, batteryPercent, sensors, er
 async function loadAIRecommendation() {
     try {
         const response = await fetch(`${API_BASE}/api/ai/recommendation`);
-        const data = await response.json();
-        
-        const container = document.getElementById('ai-recommendation');
-        if (data.success && data.data) {
-            const rec = data.data;
-            container.innerHTML = `
-                <div class="recommendation-content">
-                    <div class="recommendation-header">
-                        <i class="fa-solid ${rec.should_irrigate ? 'fa-droplet' : 'fa-circle-xmark'}"></i>
-                        <strong>${rec.should_irrigate ? 'Irrigation Recommended' : 'No Irrigation Needed'}</strong>
-                    </div>
-                    <p class="recommendation-reason">${rec.reason}</p>
-                    <div class="recommendation-details">
-                        <span><i class="fa-solid fa-clock"></i> Duration: ${rec.recommended_duration}s</span>
-                        <span><i class="fa-solid fa-brain"></i> Confidence: ${(rec.confidence * 100).toFixed(0)}%</span>
-                        <span><i class="fa-solid fa-microchip"></i> Source: ${rec.ai_source}</span>
-                    </div>
-                </div>
-            `;
-        }
+        renderAIRecommendation(await response.json());
     } catch (error) {
         console.error('Error loading AI recommendation:', error);
     }
 }
 
+function renderAIRecommendation(data) {
+    const container = document.getElementById('ai-recommendation');
+    if (container && data && data.success && data.data) {
+        const rec = data.data;
+        container.innerHTML = `
+            <div class="recommendation-content">
+                <div class="recommendation-header">
+                    <i class="fa-solid ${rec.should_irrigate ? 'fa-droplet' : 'fa-circle-xmark'}"></i>
+                    <strong>${rec.should_irrigate ? 'Irrigation Recommended' : 'No Irrigation Needed'}</strong>
+                </div>
+                <p class="recommendation-reason">${rec.reason}</p>
+                <div class="recommendation-details">
+                    <span><i class="fa-solid fa-clock"></i> Duration: ${rec.recommended_duration}s</span>
+                    <span><i class="fa-solid fa-brain"></i> Confidence: ${(rec.confidence * 100).toFixed(0)}%</span>
+                    <span><i class="fa-solid fa-microchip"></i> Source: ${rec.ai_source}</span>
+                </div>
+            </div>
+        `;
+    }
+}
+
 // Initialize all charts
 function initCharts() {
     initCombinedChart();
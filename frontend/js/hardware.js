@@ -155,9 +155,18 @@ document.addEventListener('DOMContentLoaded', () => {
         updateHeaderDateTime();
         setInterval(updateHeaderDateTime, 1000);
         
+        // Valve and zone changes arrive on the live stream; poll the
+        // status only while it is not connected
+        if (window.liveStream) {
+            liveStream
+                .on('valve', () => loadHardwareStatus())
+                .on('irrigation', () => loadHardwareStatus())
+                .start();
+        }
+        
         // Start real-time monitoring (every 2 seconds)
         updateInterval = setInterval(() => {
-            loadHardwareStatus();
+            if (!window.liveStream || !liveStream.connected) loadHardwareStatus();
             loadSystemPerformance();
             loadSystemStats();
             loadSystemArchitecture();
@@ -0,0 +1,78 @@
+// Live updates over Server-Sent Events (/api/stream)
+// The server sends a snapshot of every topic (sensors, energy, valve,
+// irrigation, alerts), then only the keys that changed. This keeps the merged
+// state and calls listeners with (state, delta) for each topic.
+
+class LiveStream {
+    constructor(url = `${window.location.origin}/api/stream`) {
+        this.url = url;
+        this.state = {};
+        this.listeners = {};
+        this.source = null;
+        this.connected = false;
+    }
+
+    on(topic, callback) {
+        (this.listeners[topic] = this.listeners[topic] || []).push(callback);
+        return this;
+    }
+
+    emit(topic, ...args) {
+        (this.listeners[topic] || []).forEach(callback => {
+            try {
+                callback(...args);
+            } catch (error) {
+                console.error(`Live stream listener for ${topic} failed:`, error);
+            }
+        });
+    }
+
+    start() {
+        if (!window.EventSource || this.source) return this;
+
+        // EventSource reconnects on its own and sends Last-Event-ID,
+        // so the server replays only what was missed
+        this.source = new EventSource(this.url);
+        this.source.onopen = () => {
+            this.connected = true;
+            this.emit('connected');
+        };
+        this.source.onerror = () => {
+            if (this.connected) {
+                this.connected = false;
+                this.emit('disconnected');
+            }
+        };
+
+        this.source.addEventListener('snapshot', event => {
+            this.state = JSON.parse(event.data);
+            Object.keys(this.state).forEach(topic => this.emit(topic, this.state[topic], this.state[topic]));
+        });
+
+        ['sensors', 'energy', 'valve', 'irrigation', 'alerts'].forEach(topic => {
+            this.source.addEventListener(topic, event => {
+                const delta = JSON.parse(event.data);
+                const current = this.state[topic] = this.state[topic] || {};
+                Object.entries(delta).forEach(([key, value]) => {
+                    if (value === null) {
+                        delete current[key];
+                    } else {
+                        current[key] = value;
+                    }
+                });
+                this.emit(topic, current, delta);
+            });
+        });
+        return this;
+    }
+
+    stop() {
+        if (this.source) {
+            this.source.close();
+            this.source = null;
+        }
+        this.connected = false;
+    }
+}
+
+window.liveStream = new LiveStream();